@@ -1,14 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
 import joblib
 import os
+import threading
 import pandas as pd
 import numpy as np
 import yfinance as yf
 
 # Import services
 from ..services.portfolio_service import PortfolioService
+from ..services.job_service import JOB_SERVICE, JobQueueFull
+from ..utils.payload_utils import compact_sim_returns, compact_visualization, SIM_RETURN_FORMATS, ARRAY_ENCODINGS
+from ..utils.result_cache import RESULT_CACHE
+from ..utils.frontier_utils import FRONTIER_CACHE
+from ..utils.quantum_utils import QUBO_DEADLINE, QUBO_SOLVERS
+from ..utils.covariance_utils import COVARIANCE_ESTIMATORS
 
 portfolio_bp = Blueprint('portfolio', __name__)
 
@@ -21,6 +28,9 @@ cached_stock_info = None
 
 PKL_FILE = "assets_data.pkl"
 
+# Serializes the pickle update and the cache rebinding between request and job threads
+DATA_LOCK = threading.Lock()
+
 def fetch_and_update_data(assets, force_refresh=False):
     data = {}
     global PKL_FILE
@@ -92,18 +102,26 @@ def fetch_and_update_data(assets, force_refresh=False):
 def fetch_and_cache_data(force_refresh=False):
     """Fetch stock data once and store in global cache."""
     global cached_returns, cached_tickers, cached_stock_info
-    data = fetch_and_update_data(assets=PortfolioService.get_tickers())
-    if cached_returns is None or cached_tickers is None or cached_stock_info is None or force_refresh:
-        # Fetch live stock data
-        returns= PortfolioService.fetch_stock_data(PKL_FILE)
-        tickers = PortfolioService.get_tickers()
-        stock_info = PortfolioService.get_stock_information(tickers, PKL_FILE)
-
-        cached_returns = returns
-        cached_tickers = tickers
-        cached_stock_info = stock_info
-
-    return cached_returns, cached_tickers, cached_stock_info
+    with DATA_LOCK:
+        data = fetch_and_update_data(assets=PortfolioService.get_tickers())
+        if cached_returns is None or cached_tickers is None or cached_stock_info is None or force_refresh:
+            # Fetch live stock data
+            returns= PortfolioService.fetch_stock_data(PKL_FILE)
+            tickers = PortfolioService.get_tickers()
+            stock_info = PortfolioService.get_stock_information(tickers, PKL_FILE)
+
+            cached_returns = returns
+            cached_tickers = tickers
+            cached_stock_info = stock_info
+
+            # Selections computed from the previous data can no longer be requested
+            if force_refresh:
+                RESULT_CACHE.clear()
+                FRONTIER_CACHE.clear()
+            # Covariance states are kept: COVARIANCE_TRACKER feeds them only the new
+            # rows, and refits by itself when the history was revised
+
+        return cached_returns, cached_tickers, cached_stock_info
 
 # -------------------------------
 # Fetch Stock Data Endpoint
@@ -117,7 +135,8 @@ def fetch_stock_data_endpoint():
     """
 
     try:
-        returns, tickers, stock_info = fetch_and_cache_data()
+        force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+        returns, tickers, stock_info = fetch_and_cache_data(force_refresh=force_refresh)
         print(type(returns), type(tickers), type(stock_info))
 
         # Convert returns to dict for JSON
@@ -139,46 +158,129 @@ def fetch_stock_data_endpoint():
 # -------------------------------
 # Optimize Portfolio Endpoint
 # -------------------------------
-@portfolio_bp.route('/optimize', methods=['POST'])
-@jwt_required()
-def optimize():
+def request_deadline(data):
+    """Time budget in seconds from a request body ('deadline'), else the QUBO_DEADLINE default."""
+    deadline = data.get('deadline')
+    return QUBO_DEADLINE if deadline is None else (float(deadline) or None)
+
+
+def request_flag(value, default):
+    """Boolean request field: JSON booleans, 0/1, or strings such as "false"/"true"; None gives ``default``."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('true', '1', 'yes', 'on'):
+            return True
+        if text in ('false', '0', 'no', 'off', ''):
+            return False
+        raise ValueError(f"Expected a boolean, got {value!r}")
+    return bool(value)
+
+
+def estimator_error(data):
+    """Error message for an unknown covariance 'estimator' in a request body, else None."""
+    estimator = data.get('estimator')
+    if estimator is not None and estimator not in COVARIANCE_ESTIMATORS:
+        return f'Unknown estimator: {estimator}. Expected one of {sorted(COVARIANCE_ESTIMATORS)}'
+    return None
+
+
+def payload_request_error(data):
+    """Error message for invalid sim_returns, histogram_bins, max_points or encoding options, else None."""
+    sim_returns = data.get('sim_returns', 'raw')
+    if sim_returns not in SIM_RETURN_FORMATS:
+        return f'Unknown sim_returns format: {sim_returns}. Expected one of {list(SIM_RETURN_FORMATS)}'
+    encoding = data.get('encoding', 'json')
+    if encoding not in ARRAY_ENCODINGS:
+        return f'Unknown encoding: {encoding}. Expected one of {list(ARRAY_ENCODINGS)}'
     try:
-        data = request.get_json()
-        risk_tolerance = data.get('risk')
-        investment_amount = data.get('amount')
-        investment_horizon = data.get('time')
-        k = data.get('num_assets')
+        bins = int(data.get('histogram_bins', 50))
+        if data.get('max_points') is not None:
+            int(data['max_points'])
+    except (TypeError, ValueError):
+        return 'histogram_bins and max_points must be integers'
+    if bins < 1:
+        return 'histogram_bins must be at least 1'
+    return None
 
-        if None in (risk_tolerance, investment_amount, investment_horizon, k):
-            return jsonify({'error': 'Missing required parameters: risk, amount, time, num_assets'}), 400
 
-        # Fetch cached returns and tickers
-        returns, tickers, _ = fetch_and_cache_data()
+def optimization_request_error(data):
+    """
+    Error message for an invalid /optimize or /comparison body, else None.
 
-        # Compute expected returns and covariance
-        print("Start Sentiment")
-        mu, cov = PortfolioService.compute_mu_cov(returns)
-        print("End Sentiment")
-        # Calculate portfolio metrics and optimized weights
-        metrics, weights_dict = PortfolioService.calculate_portfolio_metrics(returns, mu, cov, risk_tolerance, k, method="quantum")
+    Checks the required parameters, the solver, the covariance estimator and
+    the response format options, so a bad value fails before the solve.
+    """
+    if None in (data.get('risk'), data.get('amount'), data.get('time'), data.get('num_assets')):
+        return 'Missing required parameters: risk, amount, time, num_assets'
+    # Checked here: build_and_solve_qubo would otherwise answer an unknown solver with its fallback
+    solver = data.get('solver', 'qaoa')
+    if solver not in QUBO_SOLVERS:
+        return f'Unknown solver: {solver}. Expected one of {sorted(QUBO_SOLVERS)}'
+    return estimator_error(data) or payload_request_error(data)
 
-        # Compute portfolio projection (value over time)
-        portfolio_metrics = PortfolioService.get_portfolio_metrics(
-            metrics, mu, cov,risk_tolerance, investment_amount, investment_horizon
-        )
 
-        # Ensure all numpy/pandas objects are converted to native types for JSON
-        metrics_native = {k: float(v) if np.isscalar(v) else v for k, v in metrics.items()}
-        portfolio_metrics_native = portfolio_metrics.to_dict() if isinstance(portfolio_metrics, pd.DataFrame) else portfolio_metrics
-        weights_native = {k: float(v) for k, v in weights_dict.items()}
-        response_data = {
-            'success': True,
-            'weights': weights_native,
-            'optimization_metrics': metrics_native,
-            'portfolio_projection': portfolio_metrics_native
-        }
+def run_optimization(data, report=lambda progress, message=None: None):
+    """
+    Quantum optimization for an /optimize request body.
 
-        return jsonify(response_data)
+    Args:
+        data: dict with risk, amount, time, num_assets and optional
+            sampling, model, solver, estimator, sim_returns, histogram_bins
+        report: Progress callback ``report(fraction, message)``
+
+    Returns:
+        dict: Response payload
+    """
+    risk_tolerance = data.get('risk')
+    investment_amount = data.get('amount')
+    investment_horizon = data.get('time')
+    k = data.get('num_assets')
+
+    # Fetch cached returns and tickers
+    report(0.05, "Loading market data")
+    returns, tickers, _ = fetch_and_cache_data()
+
+    # Compute expected returns and covariance
+    report(0.15, "Estimating returns and covariance")
+    mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
+    # Calculate portfolio metrics and optimized weights
+    report(0.3, "Optimizing portfolio")
+    metrics, weights_dict = PortfolioService.calculate_portfolio_metrics(
+        returns, mu, cov, risk_tolerance, k, method="quantum", sampling=data.get('sampling', 'mc'),
+        model=data.get('model', 'gaussian'), solver=data.get('solver', 'qaoa'), deadline=request_deadline(data)
+    )
+    compact_sim_returns(metrics, data.get('sim_returns', 'raw'), int(data.get('histogram_bins', 50)))
+
+    # Compute portfolio projection (value over time)
+    report(0.85, "Projecting portfolio value")
+    portfolio_metrics = PortfolioService.get_portfolio_metrics(
+        metrics, mu, cov,risk_tolerance, investment_amount, investment_horizon
+    )
+
+    # Ensure all numpy/pandas objects are converted to native types for JSON
+    metrics_native = {k: float(v) if np.isscalar(v) else v for k, v in metrics.items()}
+    portfolio_metrics_native = portfolio_metrics.to_dict() if isinstance(portfolio_metrics, pd.DataFrame) else portfolio_metrics
+    weights_native = {k: float(v) for k, v in weights_dict.items()}
+    return {
+        'success': True,
+        'weights': weights_native,
+        'optimization_metrics': metrics_native,
+        'portfolio_projection': portfolio_metrics_native
+    }
+
+
+@portfolio_bp.route('/optimize', methods=['POST'])
+@jwt_required()
+def optimize():
+    try:
+        data = request.get_json()
+        error = optimization_request_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
+        return jsonify(run_optimization(data))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -218,19 +320,41 @@ def simulate_portfolio():
         weights_dict = data.get('weights')
         investment_amount = data.get('amount')
         investment_horizon = data.get('time')
+        num_simulations = int(data.get('simulations', 1000))
+        sampling = data.get('sampling', 'mc')
+        try:
+            # Analytic mode has no paths to take drawdowns over, so it only computes them on request
+            path_stats = request_flag(data.get('drawdowns'), default=sampling != 'analytic')
+        except ValueError as e:
+            return jsonify({'error': f'Invalid drawdowns flag: {e}'}), 400
 
         if None in (investment_amount, investment_horizon):
             return jsonify({'error': 'Missing required parameters: weights, cov, amount, time'}), 400
 
+        model = data.get('model', 'gaussian')
+
+        error = estimator_error(data) or payload_request_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
         returns, _, _ = fetch_and_cache_data()
 
         # Compute expected returns and covariance
-        _, cov = PortfolioService.compute_mu_cov(returns)
+        _, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
 
         # Run Monte Carlo simulation
         global PKL_FILE
         simulation_results = PortfolioService.get_monte_carlo_simulation(
-            weights_dict, cov, investment_amount, investment_horizon, PKL_FILE
+            weights_dict, cov, investment_amount, investment_horizon, PKL_FILE,
+            num_simulations=num_simulations, sampling=sampling, path_stats=path_stats,
+            model=model, history=returns if model == 'bootstrap' else None
+        )
+        # Optional payload controls: LTTB downsampling and float32 base64 arrays
+        max_points = data.get('max_points')
+        simulation_results['visualization'] = compact_visualization(
+            simulation_results['visualization'],
+            max_points=int(max_points) if max_points is not None else None,
+            encoding=data.get('encoding', 'json')
         )
         return jsonify({    
             'success': True,
@@ -350,15 +474,21 @@ def classical_optimize():
         if None in (risk_tolerance, investment_amount, investment_horizon, k):
             return jsonify({'error': 'Missing required parameters: risk, amount, time, num_assets'}), 400
 
+        error = estimator_error(data) or payload_request_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
         # Fetch cached returns and tickers
         returns, tickers, _ = fetch_and_cache_data()
 
         # Compute expected returns and covariance
-        mu, cov = PortfolioService.compute_mu_cov(returns)
+        mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
         # Calculate portfolio metrics and optimized weights using classical method
         metrics, weights_dict = PortfolioService.calculate_portfolio_metrics(
-            returns, mu, cov, risk_tolerance, k, method="classical"
+            returns, mu, cov, risk_tolerance, k, method="classical", sampling=data.get('sampling', 'mc'),
+            model=data.get('model', 'gaussian')
         )
+        compact_sim_returns(metrics, data.get('sim_returns', 'raw'), int(data.get('histogram_bins', 50)))
         
         # Compute portfolio projection (value over time)
         portfolio_metrics = PortfolioService.get_portfolio_metrics(
@@ -384,40 +514,282 @@ def classical_optimize():
 # -------------------------------
 # Portfolio Comparison Endpoint
 # -------------------------------
+def run_comparison(data, report=lambda progress, message=None: None):
+    """
+    Quantum vs classical comparison for a /comparison request body.
+
+    Args:
+        data: dict with risk, amount, time, num_assets and optional
+            sampling, model, solver, estimator
+        report: Progress callback ``report(fraction, message)``
+
+    Returns:
+        dict: Response payload
+    """
+    risk_tolerance = data.get('risk')
+    investment_amount = data.get('amount')
+    investment_horizon = data.get('time')
+    k = data.get('num_assets')
+
+    # Fetch cached returns and tickers
+    report(0.05, "Loading market data")
+    returns, tickers, _ = fetch_and_cache_data()
+
+    # Compute expected returns and covariance
+    report(0.15, "Estimating returns and covariance")
+    mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
+
+    # Get comparison metrics for both quantum and classical methods
+    report(0.3, "Optimizing quantum and classical portfolios")
+    comparison = PortfolioService.calculate_comparison_metrics( 
+        returns, mu, cov, risk_tolerance, k, investment_amount, investment_horizon,
+        sampling=data.get('sampling', 'mc'), model=data.get('model', 'gaussian'),
+        solver=data.get('solver', 'qaoa'), deadline=request_deadline(data)
+    )
+    
+    # Add investment details to the response
+    comparison['investment_details'] = {
+        'amount': investment_amount,
+        'horizon': investment_horizon
+    }
+    
+    return {
+        'success': True,
+        'data': comparison
+    }
+
+
 @portfolio_bp.route('/comparison', methods=['POST'])
 @jwt_required()
 def compare_portfolios():
     try:
         data = request.get_json()
-        risk_tolerance = data.get('risk')
-        investment_amount = data.get('amount')
-        investment_horizon = data.get('time')
-        k = data.get('num_assets')
+        error = optimization_request_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
 
-        if None in (risk_tolerance, investment_amount, investment_horizon, k):
-            return jsonify({'error': 'Missing required parameters: risk, amount, time, num_assets'}), 400
+        return jsonify(run_comparison(data))
+    except Exception as e:
+        print("Error in compare_portfolios:", e)
+        return jsonify({'error': str(e)}), 500
 
-        # Fetch cached returns and tickers
-        returns, tickers, _ = fetch_and_cache_data()
+# -------------------------------
+# Risk Sweep Endpoint
+# -------------------------------
+def risk_sweep_request_error(data):
+    """
+    Error message for an invalid /risk-sweep body, else None.
 
-        # Compute expected returns and covariance
-        mu, cov = PortfolioService.compute_mu_cov(returns)
+    Checks num_assets, the grid bounds and the covariance estimator.
+    """
+    if data.get('num_assets') is None:
+        return 'Missing required parameter: num_assets'
+    risks = data.get('risks')
+    if risks is not None:
+        if not 1 <= len(risks) <= 500:
+            return 'risks must hold between 1 and 500 values'
+    elif not 2 <= int(data.get('steps', 11)) <= 500:
+        return 'steps must be between 2 and 500'
+    return estimator_error(data)
+
+
+def run_risk_sweep(data, report=lambda progress, message=None: None):
+    """
+    Quantum selections over a risk grid for a /risk-sweep request body.
 
-        # Get comparison metrics for both quantum and classical methods
-        comparison = PortfolioService.calculate_comparison_metrics( 
-            returns, mu, cov, risk_tolerance, k, investment_amount, investment_horizon
+    Args:
+        data: dict with num_assets and either risks or optional
+            risk_min, risk_max, steps; optional estimator
+        report: Progress callback ``report(fraction, message)``
+
+    Returns:
+        dict: Response payload
+    """
+    risk_grid = data.get('risks')
+    if risk_grid is None:
+        risk_grid = np.linspace(float(data.get('risk_min', 0.0)), float(data.get('risk_max', 1.0)),
+                                int(data.get('steps', 11))).tolist()
+
+    report(0.05, "Loading market data")
+    returns, _, _ = fetch_and_cache_data()
+    report(0.15, "Estimating returns and covariance")
+    mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
+    report(0.3, "Sweeping risk grid")
+    selections = PortfolioService.sweep_risk_selections(mu, cov, int(data['num_assets']), risk_grid)
+
+    return {
+        'success': True,
+        'data': selections
+    }
+
+
+@portfolio_bp.route('/risk-sweep', methods=['POST'])
+@jwt_required()
+def risk_sweep():
+    """Solve the quantum selection for a grid of risk values so later requests are cache hits.
+
+    Body: num_assets plus either risks (list, at most 500) or risk_min, risk_max and
+    steps (2..500); optional estimator.
+    """
+    try:
+        data = request.get_json()
+        error = risk_sweep_request_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
+        return jsonify(run_risk_sweep(data))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@portfolio_bp.route('/weights-batch', methods=['POST'])
+@jwt_required()
+def weights_batch():
+    """Quantum-method weights for many (selected assets, risk) pairs, e.g. to precompute a risk slider.
+
+    Body: items, a list of {selected_assets, risk}, or selected_assets plus a list of risks;
+    optional estimator.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items')
+        if items is None:
+            if data.get('selected_assets') is None or data.get('risks') is None:
+                return jsonify({'error': 'Provide items, or selected_assets and risks'}), 400
+            items = [{'selected_assets': data['selected_assets'], 'risk': r} for r in data['risks']]
+        if any(item.get('selected_assets') is None or item.get('risk') is None for item in items):
+            return jsonify({'error': 'Every item needs selected_assets and risk'}), 400
+
+        error = estimator_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
+        returns, _, _ = fetch_and_cache_data()
+        mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
+        results = PortfolioService.get_weights_batch(
+            mu, cov, [(item['selected_assets'], float(item['risk'])) for item in items]
         )
-        
-        # Add investment details to the response
-        comparison['investment_details'] = {
-            'amount': investment_amount,
-            'horizon': investment_horizon
-        }
-        
+
         return jsonify({
             'success': True,
-            'data': comparison
+            'data': results
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@portfolio_bp.route('/frontier', methods=['POST'])
+@jwt_required()
+def frontier():
+    """Long-only efficient frontier of the asset universe.
+
+    Body (optional): points (default 50, at most 500), risk_free (default 0.02) and estimator.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        points = int(data.get('points', 50))
+        if not 2 <= points <= 500:
+            return jsonify({'error': 'points must be between 2 and 500'}), 400
+
+        error = estimator_error(data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
+        returns, _, _ = fetch_and_cache_data()
+        mu, cov = PortfolioService.compute_mu_cov(returns, data.get('estimator'))
+        result = PortfolioService.get_efficient_frontier(mu, cov, points, float(data.get('risk_free', 0.02)))
+
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@portfolio_bp.route('/historical-drawdowns', methods=['POST'])
+@jwt_required()
+def historical_drawdowns():
+    """Max drawdown, recovery times and underwater periods of the cached price history.
+
+    Body: tickers and optional threshold (default 0.05), the smallest drawdown counted as an episode.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        tickers = data.get('tickers')
+        if not tickers:
+            return jsonify({'error': 'Missing tickers'}), 400
+        try:
+            threshold = float(data.get('threshold', 0.05))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'threshold must be a number'}), 400
+        if not 0 < threshold < 1:
+            return jsonify({'error': 'threshold must be between 0 and 1'}), 400
+
+        # Brings the cached history up to date
+        fetch_and_cache_data()
+        try:
+            result = PortfolioService.get_historical_drawdowns(tickers, PKL_FILE, threshold)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'data': result
         })
     except Exception as e:
-        print("Error in compare_portfolios:", e)
         return jsonify({'error': str(e)}), 500
+
+# -------------------------------
+# Background Job Endpoints
+# -------------------------------
+JOB_RUNNERS = {
+    'optimize': run_optimization,
+    'comparison': run_comparison,
+    'risk-sweep': run_risk_sweep,
+}
+
+# Body checks run before a job is queued, so bad requests get a 400 instead of a failed job
+JOB_VALIDATORS = {
+    'optimize': optimization_request_error,
+    'comparison': optimization_request_error,
+    'risk-sweep': risk_sweep_request_error,
+}
+
+
+@portfolio_bp.route('/jobs/<kind>', methods=['POST'])
+@jwt_required()
+def submit_job(kind):
+    """Queue an /optimize, /comparison or /risk-sweep request and return its job id (202)."""
+    try:
+        runner = JOB_RUNNERS.get(kind)
+        if runner is None:
+            return jsonify({'error': f'Unknown job type: {kind}. Expected one of {sorted(JOB_RUNNERS)}'}), 404
+
+        data = request.get_json()
+        error = JOB_VALIDATORS[kind](data)
+        if error is not None:
+            return jsonify({'error': error}), 400
+
+        job_id = JOB_SERVICE.submit(kind, lambda report: runner(data, report), owner=get_jwt_identity())
+        return jsonify({'success': True, 'job_id': job_id, 'status': 'queued'}), 202
+    except JobQueueFull as e:
+        return jsonify({'error': f'Too many pending jobs: {e}'}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@portfolio_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """Status, progress and, once finished, the result or error of a job."""
+    job = JOB_SERVICE.get(job_id, owner=get_jwt_identity())
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@portfolio_bp.route('/jobs/<job_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_job(job_id):
+    """Cancel a job that has not started yet."""
+    if not JOB_SERVICE.cancel(job_id, owner=get_jwt_identity()):
+        return jsonify({'error': 'Job not found or already running'}), 409
+    return jsonify({'success': True, 'job_id': job_id, 'status': 'cancelled'})
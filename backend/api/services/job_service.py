@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads running submitted jobs
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+# Most jobs that may be queued or running at once; further submissions are rejected
+JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 32))
+# Seconds a finished job's result is kept for polling
+JOB_RESULT_TTL = float(os.environ.get('JOB_RESULT_TTL', 600))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already queued or running."""
+
+
+class JobService:
+    """
+    Submit-and-poll execution of long-running work on a bounded thread pool.
+
+    A job is a callable taking a ``report(progress, message=None)`` callback
+    and returning a JSON-serializable result. Jobs are identified by random
+    ids, visible only to the owner that submitted them, and kept for
+    ``result_ttl`` seconds after they finish. Expired jobs are purged lazily
+    on every submit and lookup.
+
+    Jobs are held in this process only. Behind several server processes
+    (e.g. gunicorn workers) a poll that lands on another process returns
+    404, so the app must be served by a single process.
+    """
+
+    def __init__(self, n_workers, max_pending, result_ttl):
+        self.max_pending = int(max_pending)
+        self.result_ttl = float(result_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(n_workers)), thread_name_prefix="job")
+        self._jobs = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, owner=None):
+        """
+        Queue ``func`` for execution.
+
+        Args:
+            kind: Job type shown in its status, e.g. "optimize"
+            func: Callable ``func(report)`` returning the job result
+            owner: Identity allowed to read the job (None for anyone)
+
+        Returns:
+            str: Job id
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            self._purge()
+            pending = sum(job['status'] in ("queued", "running") for job in self._jobs.values())
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'kind': kind,
+                'owner': owner,
+                'status': "queued",
+                'progress': 0.0,
+                'message': None,
+                'result': None,
+                'error': None,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+            }
+            self._futures[job_id] = self._executor.submit(self._run, job_id, func)
+        return job_id
+
+    def _run(self, job_id, func):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != "queued":
+                return
+            job['status'] = "running"
+            job['started'] = time.time()
+
+        def report(progress, message=None):
+            with self._lock:
+                job['progress'] = float(min(1.0, max(0.0, progress)))
+                if message is not None:
+                    job['message'] = message
+
+        try:
+            result = func(report)
+        except Exception as e:
+            with self._lock:
+                job.update(status="failed", error=str(e), finished=time.time())
+            return
+        with self._lock:
+            job.update(status="succeeded", result=result, progress=1.0, finished=time.time())
+
+    def get(self, job_id, owner=None):
+        """
+        Status of a job, or None if it is unknown, expired or owned by someone else.
+
+        Returns:
+            dict with id, kind, status, progress, message, timestamps and,
+            once finished, result or error
+        """
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            if job is None or (job['owner'] is not None and job['owner'] != owner):
+                return None
+            return {key: value for key, value in job.items() if key != 'owner'}
+
+    def cancel(self, job_id, owner=None):
+        """
+        Cancel a job that has not started yet.
+
+        Returns:
+            bool: True if the job was cancelled
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or (job['owner'] is not None and job['owner'] != owner):
+                return False
+            if job['status'] != "queued" or not self._futures[job_id].cancel():
+                return False
+            job.update(status="cancelled", finished=time.time())
+            return True
+
+    def _purge(self):
+        """Drop finished jobs older than result_ttl; callers hold the lock."""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished'] is not None and job['finished'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+            del self._futures[job_id]
+
+    def stats(self):
+        """Job counts by status."""
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return counts
+
+
+JOB_SERVICE = JobService(JOB_WORKERS, JOB_MAX_PENDING, JOB_RESULT_TTL)
@@ -1,20 +1,34 @@
 from datetime import datetime, timedelta
 from ..utils.portfolio_utils import fetch_data
-from ..utils.quantum_utils import build_and_solve_qubo
+from ..utils.quantum_utils import build_and_solve_qubo, QUBO_DEADLINE
+from ..utils.qaoa_sweep import sweep_risk_grid
+from ..utils.frontier_utils import efficient_frontier
 from ..utils.classical_portfolio import build_and_solve_classical
-from ..utils.data_utils import get_stock_info, calculate_annual_returns, create_table_values, get_market_index_data
+from ..utils.data_utils import (get_stock_info, calculate_annual_returns, calculate_historical_drawdowns,
+                               create_table_values, get_market_index_data)
 from ..utils.metrics_utils import project_portfolio, unified_portfolio_metrics, monte_carlo_simulation
+from ..utils.metrics_utils import get_weights_batch_quantum
 from ..utils.sentiment import aggregate_sentiment_for_tickers
 from ..utils.metrics_utils import classical_model
+from ..utils.scenario_cache import get_scenarios
+from ..utils.analytic_utils import ANALYTIC_MODE
+from ..utils.covariance_utils import COVARIANCE_TRACKER, COVARIANCE_ESTIMATOR
 import pandas as pd
 import numpy as np
 import joblib
+import os
 # from ..utils.config import PKL_FILE
 
 ALPHA = 0.001
 SENTIMENT = None
 NEWS = None
 
+# Monte Carlo runs larger than this many (day, path) cells are streamed in chunks
+MC_DENSE_CELLS = 2_000_000
+MC_CHUNK_SIZE = 256
+# Worker processes for streamed Monte Carlo runs (0 or unset keeps them in-process)
+MC_WORKERS = int(os.environ.get('MC_WORKERS', 0)) or None
+
 class PortfolioService:
     """
     Service for portfolio operations
@@ -93,19 +107,23 @@ class PortfolioService:
         return SENTIMENT, NEWS
 
     @staticmethod
-    def compute_mu_cov(returns):
+    def compute_mu_cov(returns, estimator=None):
         """
         Compute expected returns and covariance matrix
         
         Args:
             returns: DataFrame of stock returns
+            estimator: Covariance estimator ("sample", "ewma", "ledoit-wolf"),
+                default COVARIANCE_ESTIMATOR. Its state is advanced with new
+                rows only, see covariance_utils.CovarianceTracker.
             
         Returns:
             mu: Expected returns (annualized)
             cov: Covariance matrix (annualized)
         """
         mu = returns.mean(axis=0) * 252.0  # Annualized returns
-        cov = returns.cov() * 252.0  # Annualized covariance
+        daily_cov = COVARIANCE_TRACKER.covariance(returns, estimator or COVARIANCE_ESTIMATOR)
+        cov = pd.DataFrame(daily_cov * 252.0, index=returns.columns, columns=returns.columns)  # Annualized covariance
 
         # Add sentiment factor
         tickers = PortfolioService.get_tickers()
@@ -132,7 +150,8 @@ class PortfolioService:
 
 
     @staticmethod
-    def calculate_portfolio_metrics(returns, mu, cov, user_risk, k, risk_free=0.02, method="quantum"):
+    def calculate_portfolio_metrics(returns, mu, cov, user_risk, k, risk_free=0.02, method="quantum", sampling="mc",
+                                    model="gaussian", solver="qaoa", deadline=QUBO_DEADLINE):
         """
         Optimize portfolio using quantum-inspired or classical methods.
 
@@ -143,14 +162,27 @@ class PortfolioService:
             k (int): Number of assets to select
             risk_free (float): Risk-free rate
             method (str): Optimization method ("quantum" or "classical")
+            sampling (str): Monte Carlo sampling mode ("mc", "antithetic", "sobol", "control")
+                or "analytic" for closed-form VaR/CVaR
+            model (str): Return model, "gaussian" or "bootstrap" (block bootstrap of `returns`)
+            solver (str): QUBO backend for the quantum method ("qaoa", "annealing", "tabu")
+            deadline (float): Time budget in seconds for the quantum selection (None = no limit)
 
         Returns:
             dict: Portfolio metrics
             dict: Selected weights keyed by ticker
         """
         
+        # Asset-level scenarios are shared by every portfolio drawn from this mu/cov;
+        # the analytic mode needs none
+        scenarios = None if sampling == ANALYTIC_MODE else get_scenarios(
+            mu, cov, sampling=sampling, model=model, history=returns
+        )
+
         if method == "quantum":
-            selection_vec, selected_assets = build_and_solve_qubo(mu, cov, list(mu.index), k, user_risk)
+            selection_vec, selected_assets, solver_info = build_and_solve_qubo(
+                mu, cov, list(mu.index), k, user_risk, solver=solver, deadline=deadline, return_info=True
+            )
             metrics = unified_portfolio_metrics(
                 selection_vec=selection_vec,
                 selected_assets=selected_assets,
@@ -159,11 +191,17 @@ class PortfolioService:
                 tickers=list(mu.index),
                 user_risk=user_risk,
                 risk_free=risk_free,
-                quantum=True
+                quantum=True,
+                scenarios=scenarios,
+                sampling=sampling,
+                model=model
             )
+            # Which path produced the selection: "cache", the solver, or "fallback:<heuristic>"
+            metrics["solver"] = solver_info
         else:  # classical
             metrics_classic, mu_sub, cov_sub = build_and_solve_classical(returns, mu, cov, user_risk, N_ASSETS_SELECT=k)
-            metrics = classical_model(metrics_classic,mu=mu_sub,cov=cov_sub)
+            metrics = classical_model(metrics_classic,mu=mu_sub,cov=cov_sub,scenarios=scenarios,sampling=sampling,
+                                      model=model)
         # metrics = unified_portfolio_metrics(
         #     selection_vec=selection_vec,
         #     selected_assets=selected_assets,
@@ -177,7 +215,8 @@ class PortfolioService:
         return metrics, weights_dict
         
     @staticmethod
-    def calculate_comparison_metrics(returns, mu, cov, user_risk, k, investment_amount, investment_horizon, risk_free=0.02):
+    def calculate_comparison_metrics(returns, mu, cov, user_risk, k, investment_amount, investment_horizon, risk_free=0.02,
+                                     sampling="mc", model="gaussian", solver="qaoa", deadline=QUBO_DEADLINE):
         """
         Calculate and compare portfolio metrics using both quantum and classical methods.
 
@@ -188,13 +227,18 @@ class PortfolioService:
             user_risk (float): Risk tolerance parameter (0–1)
             k (int): Number of assets to select
             risk_free (float): Risk-free rate
+            sampling (str): Monte Carlo sampling mode
+            model (str): Return model, "gaussian" or "bootstrap"
+            solver (str): QUBO backend for the quantum portfolio
+            deadline (float): Time budget in seconds for the quantum selection (None = no limit)
 
         Returns:
             dict: Comparison of quantum and classical portfolio metrics
         """
         # Calculate quantum portfolio metrics
         quantum_metrics, quantum_weights = PortfolioService.calculate_portfolio_metrics(
-            returns, mu, cov, user_risk, k, risk_free, method="quantum"
+            returns, mu, cov, user_risk, k, risk_free, method="quantum", sampling=sampling, model=model,
+            solver=solver, deadline=deadline
         )
         quantum_portfolio_metrics = PortfolioService.get_portfolio_metrics(
             quantum_metrics, mu, cov, user_risk, investment_amount, investment_horizon
@@ -202,7 +246,7 @@ class PortfolioService:
         
         # Calculate classical portfolio metrics
         classical_metrics, classical_weights = PortfolioService.calculate_portfolio_metrics(
-            returns, mu, cov, user_risk, k, risk_free, method="classical"
+            returns, mu, cov, user_risk, k, risk_free, method="classical", sampling=sampling, model=model
         )
         classical_portfolio_metrics = PortfolioService.get_portfolio_metrics(
             classical_metrics, mu, cov, user_risk, investment_amount, investment_horizon
@@ -218,6 +262,7 @@ class PortfolioService:
                 "sharpe_ratio": quantum_metrics.get("sharpe_ratio", 0),
                 "portfolio_beta": quantum_portfolio_metrics.get("portfolio_beta", 0),
                 "var": quantum_metrics.get("VaR_loss", 0),
+                "solver": quantum_metrics.get("solver"),
             },
             "classical": {
                 "selected_assets": classical_metrics.get("selected_assets", []),
@@ -232,6 +277,69 @@ class PortfolioService:
         
         return comparison
 
+    @staticmethod
+    def sweep_risk_selections(mu, cov, k, risk_grid):
+        """
+        QAOA asset selections for a grid of risk tolerances.
+
+        Args:
+            mu (pd.Series): Expected returns
+            cov (pd.DataFrame): Covariance matrix
+            k (int): Number of assets to select
+            risk_grid (list): Risk tolerance values (0–1)
+
+        Returns:
+            list: One dict per rounded risk value with 'risk', 'selected_assets' and 'source'
+        """
+        results = sweep_risk_grid(mu, cov, k, risk_grid)
+        return [
+            {'risk': r['user_risk'], 'selected_assets': r['selected_assets'], 'source': r['source']}
+            for r in results
+        ]
+
+    @staticmethod
+    def get_weights_batch(mu, cov, items):
+        """
+        Quantum-method weights for many (selected assets, risk) pairs in one call.
+
+        Args:
+            mu (pd.Series): Expected returns
+            cov (pd.DataFrame): Covariance matrix
+            items (list): (selected tickers, user_risk) pairs
+
+        Returns:
+            list: One dict per pair, in order, with 'risk', 'selected_assets', 'weights'
+                and 'optimizer_stats'
+        """
+        unknown = sorted({t for assets, _ in items for t in assets} - set(mu.index))
+        if unknown:
+            raise ValueError(f"Unknown tickers: {unknown}")
+        pairs = [(mu.index.isin(assets).astype(int), user_risk) for assets, user_risk in items]
+        return [
+            {'risk': r['user_risk'], 'selected_assets': r['selected_assets'], 'weights': r['weights'],
+             'optimizer_stats': r['optimizer_stats']}
+            for r in get_weights_batch_quantum(pairs, mu, cov)
+        ]
+
+    @staticmethod
+    def get_efficient_frontier(mu, cov, points=50, risk_free=0.02):
+        """
+        Long-only efficient frontier over the whole universe.
+
+        Corner portfolios are computed once per mu/cov and cached; the
+        requested points are interpolated from them.
+
+        Args:
+            mu (pd.Series): Expected returns
+            cov (pd.DataFrame): Covariance matrix
+            points (int): Number of frontier points
+            risk_free (float): Risk-free rate
+
+        Returns:
+            dict: 'points', 'corners', 'min_volatility' and 'max_sharpe' portfolios
+        """
+        return efficient_frontier(mu, cov, n_points=points, risk_free=risk_free)
+
     @staticmethod
     def get_portfolio_metrics(metrics, mu, cov, user_risk, investment_amount, investment_horizon):
         """
@@ -265,7 +373,8 @@ class PortfolioService:
         return metrics['selected_assets']
 
     @staticmethod
-    def get_monte_carlo_simulation(weights, cov, investment_amount, investment_horizon, pkl_file):
+    def get_monte_carlo_simulation(weights, cov, investment_amount, investment_horizon, pkl_file, num_simulations=1000,
+                                   sampling="mc", path_stats=True, model="gaussian", history=None):
         """
         Compute portfolio projection metrics using Monte Carlo simulation.
 
@@ -274,7 +383,12 @@ class PortfolioService:
             cov (pd.DataFrame): Covariance matrix
             investment_amount (float): Investment capital
             investment_horizon (int): Time horizon in years
+            pkl_file (str): Path to joblib .pkl file
             num_simulations (int): Number of Monte Carlo simulations
+            sampling (str): Monte Carlo sampling mode, or "analytic" for closed-form results
+            path_stats (bool): In analytic mode, whether to simulate drawdowns and sample paths
+            model (str): Return model, "gaussian" or "bootstrap"
+            history (pd.DataFrame): Daily asset returns, required by the bootstrap model
 
         Returns:
             dict: Projected portfolio performance metrics
@@ -282,15 +396,25 @@ class PortfolioService:
         selected_assets = list(weights.keys())
         returns = calculate_annual_returns(selected_assets, pkl_file)["Annualized Return"]
         selected_cov = cov.loc[selected_assets, selected_assets]
+        time_horizon = 252 * investment_horizon  # 1 year of trading days
+
+        # Stream large runs so memory stays bounded by the chunk size
+        chunk_size = MC_CHUNK_SIZE if time_horizon * num_simulations > MC_DENSE_CELLS else None
 
         simulation_results = monte_carlo_simulation(
             np.array(list(weights.values())),
             returns,
             selected_cov,
             initial_investment=investment_amount,
-            time_horizon=252 * investment_horizon,  # 1 year of trading days
-            num_simulations=1000,
-            percentiles=[5, 25, 50, 75, 95]
+            time_horizon=time_horizon,
+            num_simulations=num_simulations,
+            percentiles=[5, 25, 50, 75, 95],
+            chunk_size=chunk_size,
+            n_workers=MC_WORKERS if chunk_size is not None else None,
+            sampling=sampling,
+            path_stats=path_stats,
+            model=model,
+            history=history[selected_assets].values if history is not None else None
         )
         return simulation_results
     
@@ -308,6 +432,21 @@ class PortfolioService:
         table_data = create_table_values(pkl_file, weights, investment_amount, investment_horizon)
         return table_data
 
+    @staticmethod
+    def get_historical_drawdowns(tickers, pkl_file, threshold=0.05):
+        """
+        Drawdown, recovery-time and underwater-period analytics of the cached price history.
+
+        Args:
+            tickers (list): Stock tickers
+            pkl_file: Path to joblib .pkl file
+            threshold (float): Minimum drawdown that counts as an underwater episode
+
+        Returns:
+            dict: Analytics per ticker, see drawdown_utils.historical_drawdowns
+        """
+        return calculate_historical_drawdowns(tickers, pkl_file, threshold)
+
     @staticmethod
     def get_market_index_data(ticker):
         """
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy.stats import norm
+
+# Evaluation mode that replaces simulation with closed-form results
+ANALYTIC_MODE = "analytic"
+
+
+def normal_var_cvar(mean, std, alpha=0.05):
+    """
+    Lower-tail VaR and CVaR of a normal return.
+
+    Args:
+        mean: Mean return
+        std: Standard deviation of the return
+        alpha: Tail probability
+
+    Returns:
+        var_ret: alpha-quantile of the return
+        cvar_ret: Mean return below the alpha-quantile
+    """
+    z = norm.ppf(alpha)
+    return float(mean + std * z), float(mean - std * norm.pdf(z) / alpha)
+
+
+def normal_portfolio_risk(mu, cov, weights, horizon_days=30, alpha=0.05):
+    """
+    Closed-form counterpart of ``monte_carlo_portfolio``.
+
+    Asset horizon returns are N(mu_h, cov_h), so the portfolio return is
+    exactly N(w @ mu_h, w' cov_h w).
+
+    Args:
+        mu: Annualized expected returns
+        cov: Annualized covariance matrix
+        weights: Portfolio weights aligned with mu
+        horizon_days: Horizon in trading days
+        alpha: Tail probability for VaR/CVaR
+
+    Returns:
+        mean, std, var_ret, cvar_ret of the horizon return
+    """
+    h = max(1, int(horizon_days)) / 252.0
+    w = np.asarray(weights, dtype=float)
+    mean = float(w @ np.asarray(mu, dtype=float)) * h
+    std = float(np.sqrt(max(float(w @ np.asarray(cov, dtype=float) @ w) * h, 0.0)))
+    var_ret, cvar_ret = normal_var_cvar(mean, std, alpha)
+    return mean, std, var_ret, cvar_ret
+
+
+def compounded_lognormal(initial, period_mu, period_vol, periods):
+    """
+    Log-normal approximation of a value compounded over iid period returns.
+
+    The parameters match the exact first two moments of
+    initial * prod(1 + r_i) with r_i ~ N(period_mu, period_vol**2).
+
+    Args:
+        initial: Starting value
+        period_mu: Mean return per period
+        period_vol: Volatility per period
+        periods: Number of periods (scalar or np.array)
+
+    Returns:
+        m, s: Mean and standard deviation of the log value
+    """
+    periods = np.asarray(periods, dtype=float)
+    growth = max(1.0 + period_mu, 1e-12)
+    s2 = periods * np.log1p((period_vol / growth) ** 2)
+    m = np.log(initial) + periods * np.log(growth) - 0.5 * s2
+    return m, np.sqrt(s2)
+
+
+def lognormal_quantiles(m, s, percentiles):
+    """
+    Percentiles of a log-normal value.
+
+    Args:
+        m, s: Log mean and log standard deviation (scalars or arrays)
+        percentiles: list of percentiles in (0, 100)
+
+    Returns:
+        dict {percentile: value}
+    """
+    return {p: np.exp(m + s * norm.ppf(p / 100.0)) for p in percentiles}
+
+
+def lognormal_tail_mean(m, s, alpha):
+    """
+    Mean of a log-normal value below its alpha-quantile.
+
+    Args:
+        m, s: Log mean and log standard deviation
+        alpha: Tail probability
+
+    Returns:
+        float
+    """
+    if s <= 0:
+        return float(np.exp(m))
+    return float(np.exp(m + 0.5 * s ** 2) * norm.cdf(norm.ppf(alpha) - s) / alpha)
@@ -11,19 +11,167 @@ def portfolio_stats(weights, assets, mu, cov):
     sharpe = port_return / port_vol if port_vol > 1e-12 else 0
     return port_return, port_vol, sharpe
 
-def solve_mvo_min_var_target(mu, cov, target_return):
+# Free covariance blocks less well conditioned than this are left to SLSQP
+MAX_CONDITION = 1e10
+
+
+def _block_inverse(Q, idx):
+    """Inverse of Q[idx][:, idx], or None when the block is numerically singular."""
+    block = Q[np.ix_(idx, idx)]
+    if np.linalg.cond(block) > MAX_CONDITION:
+        return None
+    return np.linalg.solve(block, np.eye(len(idx)))
+
+
+def _add_to_inverse(H, Q, idx, i):
+    """
+    Inverse of Q[idx + [i]][:, idx + [i]] from H = inv(Q[idx][:, idx]) (bordering),
+    or None when asset i is numerically a combination of the free assets.
+    """
+    b = Q[idx, i]
+    u = H @ b
+    schur = Q[i, i] - b @ u
+    if schur <= Q[i, i] / MAX_CONDITION:
+        return None
+    m = len(idx)
+    out = np.empty((m + 1, m + 1))
+    out[:m, :m] = H + np.outer(u, u) / schur
+    out[:m, m] = out[m, :m] = -u / schur
+    out[m, m] = 1.0 / schur
+    return out
+
+
+def _drop_from_inverse(H, r):
+    """Inverse of Q with row/column r removed, from H = inv(Q)."""
+    keep = np.arange(len(H)) != r
+    return H[np.ix_(keep, keep)] - np.outer(H[keep, r], H[r, keep]) / H[r, r]
+
+
+def _min_variance_slsqp(mu, cov, target_return):
+    """SLSQP fallback of ``min_variance_target_qp`` for singular covariance blocks."""
+    n = len(mu)
+    constraints = [
+        {'type': 'eq', 'fun': lambda w: w.sum() - 1.0, 'jac': lambda w: np.ones(n)},
+        {'type': 'ineq', 'fun': lambda w: mu @ w - target_return, 'jac': lambda w: mu},
+    ]
+    result = minimize(lambda w: w @ cov @ w, np.full(n, 1.0 / n), jac=lambda w: 2.0 * cov @ w, method='SLSQP',
+                      bounds=[(0.0, 1.0)] * n, constraints=constraints, options={'ftol': 1e-12, 'maxiter': 1000})
+    w = np.clip(result.x, 0.0, None)
+    return w / w.sum()
+
+
+def min_variance_target_qp(mu, cov, target_return, tol=1e-12, max_iter=None):
+    """
+    Long-only minimum variance portfolio with a minimum expected return.
+
+        min w'cov w  s.t.  sum(w) = 1,  mu'w >= target_return,  w >= 0
+
+    Primal active-set method (Nocedal & Wright, Algorithm 16.3). It starts
+    from the equal-weight portfolio tilted just enough towards the highest
+    return asset to meet the target, so every weight starts free and the
+    iterations only pin the assets that end at zero. The inverse of the
+    free covariance block is updated by bordering instead of refactored,
+    so an iteration costs O(n^2). When a free block is numerically singular
+    (condition number above MAX_CONDITION, e.g. duplicated assets) the
+    problem is handed to SLSQP instead.
+
+    Args:
+        mu: Expected returns (n,)
+        cov: Covariance matrix (n, n), positive semi-definite
+        target_return: Minimum portfolio expected return
+        tol: Tolerance for zero steps and multiplier signs
+        max_iter: Iteration cap (default 10 * n + 100)
+
+    Returns:
+        np.array (n,) of weights, or None when no long-only portfolio reaches the target
+    """
+    mu = np.asarray(mu, dtype=float)
+    Q = 2.0 * np.asarray(cov, dtype=float)
     n = len(mu)
-    best_w, best_vol = None, 1e9
-    for _ in range(20000):
-        w = np.random.dirichlet(np.ones(n))
-        ret = np.dot(w, mu)
-        if ret >= target_return:
-            vol = np.sqrt(np.dot(w.T, np.dot(cov.values, w)))
-            if vol < best_vol:
-                best_w, best_vol = w, vol
-    if best_w is None:
-        best_w = np.ones(n)/n
-    return best_w
+    if n == 0 or mu.max() < target_return - tol:
+        return None
+
+    w = np.full(n, 1.0 / n)
+    j = int(np.argmax(mu))
+    if mu @ w < target_return and mu[j] > mu @ w:
+        theta = (target_return - mu @ w) / (mu[j] - mu @ w)
+        w = (1.0 - theta) * w
+        w[j] += theta
+    free = w > 0
+    idx = list(np.flatnonzero(free))
+    H = _block_inverse(Q, idx)
+    if H is None:
+        return _min_variance_slsqp(mu, Q / 2.0, target_return)
+    # A start on the target activates the return constraint through a zero-length blocking step
+    return_active = False
+    scale = max(1.0, np.abs(Q).max())
+
+    for _ in range(max_iter or 10 * n + 100):
+        g = Q @ w
+        A = np.ones((2 if return_active else 1, len(idx)))
+        if return_active:
+            A[1] = mu[idx]
+        HA = H @ A.T
+        Hg = H @ g[idx]
+        try:
+            lam = np.linalg.solve(A @ HA, A @ Hg)
+        except np.linalg.LinAlgError:
+            lam = np.linalg.lstsq(A @ HA, A @ Hg, rcond=None)[0]
+        p_free = HA @ lam - Hg
+
+        if np.abs(p_free).max() <= tol * 1e3:
+            # Stationary on the working set: check the inequality multipliers
+            nu = lam[0]
+            rho = lam[1] if return_active else 0.0
+            bound_mult = g - nu - rho * mu
+            bound_mult[free] = np.inf
+            i = int(np.argmin(bound_mult))
+            worst = bound_mult[i]
+            if return_active and rho < min(worst, 0.0) - tol * scale:
+                return_active = False
+                continue
+            if worst >= -tol * scale:
+                return w
+            H = _add_to_inverse(H, Q, idx, i)
+            if H is None:
+                return _min_variance_slsqp(mu, Q / 2.0, target_return)
+            idx.append(i)
+            free[i] = True
+            continue
+
+        # Longest step before a bound or the return constraint blocks
+        alpha, blocking = 1.0, None
+        cols = np.asarray(idx)
+        shrinking = np.flatnonzero(p_free < -tol)
+        if len(shrinking):
+            ratios = -w[cols[shrinking]] / p_free[shrinking]
+            k = int(np.argmin(ratios))
+            if ratios[k] < alpha:
+                alpha, blocking = ratios[k], int(shrinking[k])
+        mu_p = mu[cols] @ p_free
+        if not return_active and mu_p < -tol:
+            ratio = (target_return - mu @ w) / mu_p
+            if ratio < alpha:
+                alpha, blocking = max(ratio, 0.0), "return"
+
+        w[cols] += alpha * p_free
+        if blocking == "return":
+            return_active = True
+        elif blocking is not None:
+            w[cols[blocking]] = 0.0
+            free[cols[blocking]] = False
+            H = _drop_from_inverse(H, blocking)
+            del idx[blocking]
+    w = np.clip(w, 0.0, None)
+    return w / w.sum()
+
+
+def solve_mvo_min_var_target(mu, cov, target_return):
+    w = min_variance_target_qp(mu, cov, target_return)
+    if w is None:
+        n = len(mu)
+        w = np.ones(n)/n
+    return w
     
 def classical_underperforming_portfolio(returns, mu_annual, cov_annual, risk_level, N_ASSETS_SELECT=5):
     # Select assets with the worst risk-return profile
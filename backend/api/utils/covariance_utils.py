@@ -0,0 +1,242 @@
+import os
+import threading
+
+import numpy as np
+
+# Covariance estimator used when a request does not name one
+COVARIANCE_ESTIMATOR = os.environ.get('COVARIANCE_ESTIMATOR', 'sample')
+# Daily decay of the EWMA estimator (RiskMetrics uses 0.94)
+EWMA_DECAY = float(os.environ.get('EWMA_DECAY', 0.94))
+
+
+class SampleCovariance:
+    """
+    Sample covariance, updated a block of rows at a time.
+
+    Keeps the row count, mean and sum of squared deviations, and merges new
+    rows with Chan et al.'s pairwise update, so adding b rows costs
+    O(b n^2) and matches ``DataFrame.cov`` (ddof=1) on the full history.
+    """
+
+    def __init__(self, n_assets):
+        self.count = 0
+        self.mean = np.zeros(n_assets)
+        self.m2 = np.zeros((n_assets, n_assets))
+
+    def update(self, rows):
+        """
+        Add daily return rows.
+
+        Args:
+            rows: np.array (b, n)
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        b = len(rows)
+        if b == 0:
+            return
+        block_mean = rows.mean(axis=0)
+        centered = rows - block_mean
+        delta = block_mean - self.mean
+        total = self.count + b
+        self.m2 += centered.T @ centered + np.outer(delta, delta) * (self.count * b / total)
+        self.mean += delta * (b / total)
+        self.count = total
+
+    def covariance(self):
+        """Unbiased sample covariance of the daily returns seen so far."""
+        return self.m2 / max(self.count - 1, 1)
+
+
+class EwmaCovariance:
+    """
+    Exponentially weighted covariance (RiskMetrics-style).
+
+    Each new row x with d = x - mean updates
+        mean <- mean + (1 - decay) d
+        cov  <- decay (cov + (1 - decay) d d')
+    which costs O(n^2) per day. Recent days dominate, so the estimate
+    follows volatility regimes instead of averaging over the full history.
+    """
+
+    def __init__(self, n_assets, decay=EWMA_DECAY):
+        if not 0.0 < decay < 1.0:
+            raise ValueError(f"EWMA decay must be in (0, 1), got {decay}")
+        self.decay = float(decay)
+        self.count = 0
+        self.mean = np.zeros(n_assets)
+        self.cov = np.zeros((n_assets, n_assets))
+
+    def update(self, rows):
+        """
+        Add daily return rows.
+
+        Args:
+            rows: np.array (b, n)
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        for x in rows:
+            if self.count == 0:
+                self.mean = x.copy()
+            else:
+                d = x - self.mean
+                self.mean += (1.0 - self.decay) * d
+                self.cov = self.decay * (self.cov + (1.0 - self.decay) * np.outer(d, d))
+            self.count += 1
+
+    def covariance(self):
+        """Exponentially weighted covariance of the daily returns."""
+        return self.cov.copy()
+
+
+class LedoitWolfCovariance:
+    """
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity.
+
+    Ledoit & Wolf, "A well-conditioned estimator for large-dimensional
+    covariance matrices" (2004), with the same estimator as scikit-learn's
+    ``LedoitWolf``. The shrinkage intensity needs sum_t ||x_t - mean||^4.
+    Expanding it around the running mean leaves raw power sums of the
+    rows, which are kept next to the sample moments:
+        sum_t ||x_t||^4,  sum_t ||x_t||^2 x_t,  sum_t ||x_t||^2
+    Adding a row costs O(n^2).
+    """
+
+    def __init__(self, n_assets):
+        self.sample = SampleCovariance(n_assets)
+        self.sum_q2 = 0.0
+        self.sum_qx = np.zeros(n_assets)
+        self.sum_q = 0.0
+
+    @property
+    def count(self):
+        return self.sample.count
+
+    def update(self, rows):
+        """
+        Add daily return rows.
+
+        Args:
+            rows: np.array (b, n)
+        """
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        q = np.einsum("ij,ij->i", rows, rows)
+        self.sum_q2 += float(q @ q)
+        self.sum_qx += q @ rows
+        self.sum_q += float(q.sum())
+        self.sample.update(rows)
+
+    def shrinkage(self):
+        """Shrinkage intensity in [0, 1] and the identity scale."""
+        t = self.count
+        n = len(self.sample.mean)
+        m = self.sample.mean
+        emp = self.sample.m2 / t                      # biased sample covariance
+        scale = np.trace(emp) / n
+
+        # sum_t ||x_t - m||^4 from the raw sums, with p_t = x_t . m
+        mm = m @ m
+        sum_x = t * m
+        raw_second = t * (emp + np.outer(m, m))       # sum_t x_t x_t'
+        sum_p = sum_x @ m
+        sum_p2 = m @ raw_second @ m
+        sum_qp = self.sum_qx @ m
+        fourth = (self.sum_q2 + 4 * sum_p2 + t * mm * mm - 4 * sum_qp
+                  + 2 * mm * self.sum_q - 4 * mm * sum_p)
+
+        emp_sq = float(np.sum(emp * emp))
+        beta = (fourth / t - emp_sq) / (n * t)
+        delta = (emp_sq - 2 * scale * np.trace(emp) + n * scale * scale) / n
+        beta = min(beta, delta)
+        return (0.0 if beta <= 0 else beta / delta), scale
+
+    def covariance(self):
+        """Shrunk covariance, rescaled to the unbiased sample covariance's ddof."""
+        t = self.count
+        if t < 2:
+            return self.sample.covariance()
+        shrink, scale = self.shrinkage()
+        emp = self.sample.m2 / t
+        shrunk = (1.0 - shrink) * emp
+        shrunk[np.diag_indices_from(shrunk)] += shrink * scale
+        return shrunk * (t / (t - 1))
+
+
+COVARIANCE_ESTIMATORS = {
+    'sample': SampleCovariance,
+    'ewma': EwmaCovariance,
+    'ledoit-wolf': LedoitWolfCovariance,
+}
+
+
+def make_estimator(name, n_assets):
+    """Fresh estimator state for ``name`` in COVARIANCE_ESTIMATORS."""
+    if name not in COVARIANCE_ESTIMATORS:
+        raise ValueError(f"Unknown covariance estimator: {name}. Expected one of {sorted(COVARIANCE_ESTIMATORS)}")
+    return COVARIANCE_ESTIMATORS[name](n_assets)
+
+
+class CovarianceTracker:
+    """
+    Estimator states kept across requests and advanced with new rows.
+
+    One state per (estimator, asset columns) remembers how many rows it has
+    absorbed and the last of them. A later returns frame that extends the
+    same history only feeds its new rows to the estimator; anything else
+    (different columns, fewer rows, a revised last row) refits from scratch.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+        self.refits = 0
+        self.updates = 0
+
+    def covariance(self, returns, estimator=COVARIANCE_ESTIMATOR):
+        """
+        Daily covariance of ``returns`` under the named estimator.
+
+        Args:
+            returns: pd.DataFrame of daily returns, oldest row first
+            estimator: Name in COVARIANCE_ESTIMATORS
+
+        Returns:
+            np.array (n, n)
+        """
+        if len(returns) == 0:
+            raise ValueError("No return rows to estimate a covariance from")
+        columns = tuple(str(c) for c in returns.columns)
+        values = returns.to_numpy(dtype=float)
+        key = (estimator, columns)
+        with self._lock:
+            entry = self._states.get(key)
+            seen = entry['rows'] if entry is not None else 0
+            extends = (entry is not None and seen <= len(values)
+                       and returns.index[seen - 1] == entry['last_index']
+                       and np.array_equal(values[seen - 1], entry['last_row']))
+            if not extends:
+                entry = {'state': make_estimator(estimator, len(columns)), 'rows': 0}
+                self._states[key] = entry
+                self.refits += 1
+            elif seen < len(values):
+                self.updates += 1
+
+            if entry['rows'] < len(values):
+                entry['state'].update(values[entry['rows']:])
+                entry['rows'] = len(values)
+                entry['last_index'] = returns.index[-1]
+                entry['last_row'] = values[-1].copy()
+                entry['cov'] = entry['state'].covariance()
+            return entry['cov'].copy()
+
+    def clear(self):
+        """Drop every estimator state."""
+        with self._lock:
+            self._states.clear()
+
+    def stats(self):
+        """State count and refit/update counters."""
+        with self._lock:
+            return {'states': len(self._states), 'refits': self.refits, 'updates': self.updates}
+
+
+COVARIANCE_TRACKER = CovarianceTracker()
@@ -3,6 +3,7 @@ import pandas as pd
 import yfinance as yf
 import joblib
 from datetime import datetime, timedelta
+from .drawdown_utils import historical_drawdowns
 
 
 def get_stock_info(tickers, pkl_file):
@@ -102,6 +103,28 @@ def calculate_annual_returns(assets, pkl_file):
 
     return df
 
+def calculate_historical_drawdowns(assets, pkl_file, threshold=0.05):
+    """
+    Calculate drawdown, recovery-time and underwater-period analytics for
+    given assets using cached historical data from joblib file.
+    """
+    # Load cached data
+    data = joblib.load(pkl_file)
+
+    prices = {}
+    for ticker in assets:
+        asset_data = data.get(ticker, {})
+        hist = asset_data.get("history")
+        if hist is None or hist.empty:
+            raise ValueError(f"No cached history found for {ticker}")
+
+        if "Close" not in hist.columns:
+            raise ValueError(f"No 'Close' data for {ticker}")
+
+        prices[ticker] = hist["Close"]
+
+    return historical_drawdowns(pd.DataFrame(prices), threshold)
+
 def create_table_values(pkl_file, weights, investment_amount, investment_horizon, risk_free=0.02):
     tickers = list(weights.keys())
     
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+DRAWDOWN_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def drawdown_matrix(paths):
+    """
+    Drawdown from the running peak at every point of every path.
+
+    Args:
+        paths: np.array of shape (time, sims), or a 1-D price series
+
+    Returns:
+        drawdowns: np.array of the same shape, (peak - value) / peak
+        running_max: np.array of the running peak
+    """
+    paths = np.asarray(paths, dtype=float)
+    running_max = np.maximum.accumulate(paths, axis=0)
+    drawdowns = (running_max - paths) / running_max
+    return drawdowns, running_max
+
+
+def drawdown_episodes(paths, threshold=0.05, drawdowns=None, running_max=None):
+    """
+    Locate drawdown episodes deeper than ``threshold`` in every path.
+
+    An episode starts on the first day the drawdown exceeds the threshold and
+    ends on the next day the path sets a new high. A path can have at most
+    one episode between two consecutive highs, so episodes are found with a
+    run-length pass over the "segment since last high" labels instead of a
+    per-value loop.
+
+    Args:
+        paths: np.array of shape (time, sims)
+        threshold: Minimum drawdown that starts an episode
+        drawdowns, running_max: Optional output of ``drawdown_matrix``
+
+    Returns:
+        columns: Path index of each episode
+        starts: Time index where each episode starts
+        lengths: Days spent in each episode (underwater period)
+        recovered: Whether each episode ended with a new high
+    """
+    paths = np.asarray(paths, dtype=float)
+    if paths.ndim == 1:
+        paths = paths[:, None]
+    if drawdowns is None or running_max is None:
+        drawdowns, running_max = drawdown_matrix(paths)
+    drawdowns = drawdowns.reshape(paths.shape)
+    running_max = running_max.reshape(paths.shape)
+    n_steps = paths.shape[0]
+
+    # Strict new highs close the current segment; day 0 only sets the first peak
+    new_high = np.zeros(paths.shape, dtype=bool)
+    new_high[1:] = paths[1:] > running_max[:-1]
+    segment = np.cumsum(new_high, axis=0)
+
+    # Flatten path by path (column-major) so each path's days are contiguous
+    segment_key = (segment + np.arange(paths.shape[1]) * n_steps).ravel(order="F")
+    deep = np.flatnonzero((drawdowns > threshold).ravel(order="F"))
+    if deep.size == 0:
+        empty = np.zeros(0, dtype=int)
+        return empty, empty, empty, np.zeros(0, dtype=bool)
+
+    # First deep day of each segment starts an episode
+    keys = segment_key[deep]
+    first = np.empty(keys.size, dtype=bool)
+    first[0] = True
+    first[1:] = keys[1:] != keys[:-1]
+    start_flat = deep[first]
+    columns = start_flat // n_steps
+    starts = start_flat % n_steps
+
+    # The episode ends at the next new high on the same path, if any
+    highs = np.flatnonzero(new_high.ravel(order="F"))
+    recovered = np.zeros(start_flat.size, dtype=bool)
+    ends = np.full(start_flat.size, n_steps)
+    if highs.size:
+        nxt = np.searchsorted(highs, start_flat, side="right")
+        has_next = nxt < highs.size
+        nxt_flat = highs[np.minimum(nxt, highs.size - 1)]
+        recovered = has_next & (nxt_flat // n_steps == columns)
+        ends = np.where(recovered, nxt_flat % n_steps, n_steps)
+
+    return columns, starts, ends - starts, recovered
+
+
+def _distribution(values):
+    """Mean, median and max of a sample, or None when it is empty."""
+    if len(values) == 0:
+        return {'mean': None, 'median': None, 'max': None}
+    return {
+        'mean': float(np.mean(values)),
+        'median': float(np.median(values)),
+        'max': float(np.max(values))
+    }
+
+
+def summarize_drawdown_stats(max_drawdowns, recovery_times, underwater_periods):
+    """
+    Build the max drawdown, recovery time and underwater period result blocks.
+
+    Args:
+        max_drawdowns: Maximum drawdown of each path
+        recovery_times: Length of every recovered episode
+        underwater_periods: Length of every episode, recovered or not
+
+    Returns:
+        dict with 'max_drawdown', 'recovery_time' and 'underwater_periods'
+    """
+    return {
+        'max_drawdown': {
+            'mean': float(np.mean(max_drawdowns)),
+            'median': float(np.median(max_drawdowns)),
+            'max': float(np.max(max_drawdowns)),
+            'min': float(np.min(max_drawdowns)),
+            'percentiles': {
+                str(p): float(v) for p, v in zip(
+                    DRAWDOWN_PERCENTILES, np.percentile(max_drawdowns, DRAWDOWN_PERCENTILES)
+                )
+            }
+        },
+        'recovery_time': _distribution(recovery_times),
+        'underwater_periods': _distribution(underwater_periods)
+    }
+
+
+def path_drawdown_stats(paths, threshold=0.05):
+    """
+    Per-path drawdown statistics for a (time, sims) matrix.
+
+    Args:
+        paths: np.array of shape (time, sims)
+        threshold: Minimum drawdown that counts as an underwater episode
+
+    Returns:
+        max_drawdowns: Maximum drawdown of each path
+        recovery_times: Lengths of recovered episodes
+        underwater_periods: Lengths of all episodes
+    """
+    drawdowns, running_max = drawdown_matrix(paths)
+    max_drawdowns = drawdowns.max(axis=0)
+    _, _, lengths, recovered = drawdown_episodes(paths, threshold, drawdowns, running_max)
+    return max_drawdowns, lengths[recovered], lengths
+
+
+def drawdown_analytics(paths, threshold=0.05):
+    """
+    Drawdown, recovery-time and underwater-period summary over many paths.
+
+    Args:
+        paths: np.array of shape (time, sims)
+        threshold: Minimum drawdown that counts as an underwater episode
+
+    Returns:
+        dict with 'max_drawdown', 'recovery_time' and 'underwater_periods'
+    """
+    return summarize_drawdown_stats(*path_drawdown_stats(paths, threshold))
+
+
+def historical_drawdowns(prices, threshold=0.05):
+    """
+    Drawdown analytics for historical price series.
+
+    Each column is analysed on its own trading days, so assets with
+    different calendars (e.g. crypto vs equities) are not misaligned.
+
+    Args:
+        prices: pd.Series or pd.DataFrame of prices indexed by date
+        threshold: Minimum drawdown that counts as an underwater episode
+
+    Returns:
+        dict keyed by column with 'max_drawdown', 'current_drawdown',
+        'recovery_time' and 'underwater_periods'
+    """
+    if isinstance(prices, pd.Series):
+        prices = prices.to_frame(name=prices.name if prices.name is not None else 0)
+
+    results = {}
+    for column in prices.columns:
+        series = prices[column].dropna()
+        if series.empty:
+            continue
+        values = series.to_numpy(dtype=float)[:, None]
+        drawdowns, running_max = drawdown_matrix(values)
+        _, _, lengths, recovered = drawdown_episodes(values, threshold, drawdowns, running_max)
+        worst = int(np.argmax(drawdowns[:, 0]))
+        results[column] = {
+            'max_drawdown': float(drawdowns[worst, 0]),
+            'max_drawdown_date': str(series.index[worst].date()),
+            'current_drawdown': float(drawdowns[-1, 0]),
+            'recovery_time': _distribution(lengths[recovered]),
+            'underwater_periods': _distribution(lengths)
+        }
+    return results
@@ -0,0 +1,370 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .classical_portfolio import _add_to_inverse, _drop_from_inverse
+from .scenario_cache import array_fingerprint
+
+# Number of (mu, cov) universes whose corner portfolios are kept in memory
+FRONTIER_CACHE_MAX_ENTRIES = int(os.environ.get('FRONTIER_CACHE_MAX_ENTRIES', 64))
+
+# Tolerance for distinct turning points and bound hits
+_TOL = 1e-10
+
+
+def _free_solution(mu, cov, weights, free_idx, bounded_idx, inv):
+    """
+    Free weights as an affine function of lambda, with the budget multiplier.
+
+    On a fixed free set F the weights solve
+        min 0.5 w'cov w - lambda mu'w  s.t.  sum(w) = 1,  w_B fixed,
+    so w_F = alpha + lambda * beta and gamma = gamma0 + lambda * gamma1.
+    ``inv`` is the inverse of cov[F][:, F] in the order of free_idx.
+    """
+    ones = np.ones(len(free_idx))
+    inv_ones = inv @ ones
+    inv_mu = inv @ mu[free_idx]
+    inv_fixed = inv @ (cov[np.ix_(free_idx, bounded_idx)] @ weights[bounded_idx])
+    c1 = ones @ inv_ones
+    gamma0 = (1.0 - weights[bounded_idx].sum() + ones @ inv_fixed) / c1
+    gamma1 = -(ones @ inv_mu) / c1
+    alpha = gamma0 * inv_ones - inv_fixed
+    beta = inv_mu + gamma1 * inv_ones
+    return alpha, beta, gamma0, gamma1
+
+
+def _face_min_variance(cov, weights, group, start, lower, upper, max_iter=None):
+    """
+    Minimum variance weights of ``group`` with every other weight fixed.
+
+        min w'cov w  s.t.  sum(w[group]) unchanged,  lower <= w <= upper
+
+    Primal active-set method started from the (feasible) current weights,
+    with ``group[start]`` and every weight strictly inside its bounds free.
+
+    Returns:
+        np.array of weights for ``group``, boolean mask of the weights left free
+    """
+    group = np.asarray(group)
+    w = weights.copy()
+    lo, hi = lower[group], upper[group]
+    x = w[group].copy()
+    at_bound = (x <= lo + _TOL) | (x >= hi - _TOL)
+    at_bound[start] = False
+    q = cov[np.ix_(group, group)]
+    for _ in range(max_iter or 10 * len(group) + 10):
+        w[group] = x
+        g = (cov @ w)[group]
+        f = np.flatnonzero(~at_bound)
+        m = len(f)
+        kkt = np.zeros((m + 1, m + 1))
+        kkt[:m, :m] = q[np.ix_(f, f)]
+        kkt[:m, m] = kkt[m, :m] = 1.0
+        sol = np.linalg.solve(kkt, np.concatenate([-g[f], [0.0]]))
+        p, nu = sol[:m], sol[m]
+
+        if np.abs(p).max() <= _TOL:
+            # Reduced gradients of the bounded weights; release the worst violator
+            reduced = g + nu
+            violation = np.where(x <= lo + _TOL, -reduced, reduced)
+            violation[~at_bound] = -np.inf
+            i = int(np.argmax(violation))
+            if violation[i] <= _TOL:
+                return x, ~at_bound
+            at_bound[i] = False
+            continue
+
+        step, blocking = 1.0, None
+        for pos, i in enumerate(f):
+            if p[pos] < -_TOL:
+                ratio = (lo[i] - x[i]) / p[pos]
+            elif p[pos] > _TOL:
+                ratio = (hi[i] - x[i]) / p[pos]
+            else:
+                continue
+            if ratio < step:
+                step, blocking = max(ratio, 0.0), i
+        x[f] += step * p
+        if blocking is not None:
+            x[blocking] = lo[blocking] if p[f == blocking][0] < 0 else hi[blocking]
+            at_bound[blocking] = True
+    return x, ~at_bound
+
+
+def critical_line(mu, cov, lower=0.0, upper=1.0):
+    """
+    Corner portfolios of the bounded mean-variance frontier in one pass.
+
+    Markowitz's critical line algorithm, as in Bailey & Lopez de Prado,
+    "An Open-Source Implementation of the Critical-Line Algorithm for
+    Portfolio Optimization" (2013). It starts from the highest-return
+    portfolio and lowers the risk-aversion multiplier lambda; between
+    turning points the set of assets at a bound is fixed and the weights
+    move linearly, so the frontier is fully described by the corners. The
+    inverse of the free covariance block is updated by bordering as assets
+    enter and leave, so a turning point costs O(n^2).
+
+    Args:
+        mu: Expected returns (n,)
+        cov: Covariance matrix (n, n), positive definite
+        lower: Lower weight bound, scalar or (n,)
+        upper: Upper weight bound, scalar or (n,)
+
+    Returns:
+        np.array (m, n) of corner weights, from the highest-return portfolio
+        down to the minimum variance portfolio
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    n = len(mu)
+    lower = np.broadcast_to(np.asarray(lower, dtype=float), (n,)).copy()
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), (n,)).copy()
+    if lower.sum() > 1.0 + _TOL or upper.sum() < 1.0 - _TOL:
+        raise ValueError("Weight bounds admit no fully invested portfolio")
+
+    # Highest-return portfolio: fill assets from the best return down
+    weights = lower.copy()
+    marginal = None
+    for i in np.argsort(-mu, kind="stable"):
+        weights[i] = min(upper[i], lower[i] + 1.0 - weights.sum())
+        if weights.sum() >= 1.0 - _TOL:
+            marginal = i
+            break
+    # Assets tying the marginal return share its budget; on that face the
+    # frontier starts from their minimum variance split
+    tied = np.flatnonzero(np.abs(mu - mu[marginal]) <= _TOL)
+    free = np.zeros(n, dtype=bool)
+    free[marginal] = True
+    if len(tied) > 1:
+        start = int(np.flatnonzero(tied == marginal)[0])
+        weights[tied], free[tied] = _face_min_variance(cov, weights, tied, start, lower, upper)
+    corners = [weights.copy()]
+    free_idx = list(np.flatnonzero(free))
+    inv = np.linalg.inv(cov[np.ix_(free_idx, free_idx)])
+
+    lam = np.inf
+    for _ in range(4 * n + 10):
+        bounded_idx = np.flatnonzero(~free)
+        alpha, beta, gamma0, gamma1 = _free_solution(mu, cov, weights, free_idx, bounded_idx, inv)
+        best_lam, event = -np.inf, None
+
+        # A free asset reaching a bound
+        if len(free_idx) > 1:
+            for pos, i in enumerate(free_idx):
+                if abs(beta[pos]) < _TOL:
+                    continue
+                bound = lower[i] if beta[pos] > 0 else upper[i]
+                hit = (bound - alpha[pos]) / beta[pos]
+                # A free weight already at the bound it moves towards leaves at once
+                if abs(weights[i] - bound) <= _TOL:
+                    hit = min(hit, lam)
+                if 0.0 <= hit and (hit < lam - _TOL or abs(weights[i] - bound) <= _TOL) and hit > best_lam:
+                    best_lam, event = hit, ("leave", pos, bound)
+
+        # A bounded asset whose gradient reaches zero joins the free set
+        if len(bounded_idx):
+            grad0 = (cov[np.ix_(bounded_idx, free_idx)] @ alpha
+                     + cov[np.ix_(bounded_idx, bounded_idx)] @ weights[bounded_idx] - gamma0)
+            grad1 = cov[np.ix_(bounded_idx, free_idx)] @ beta - mu[bounded_idx] - gamma1
+            for pos, i in enumerate(bounded_idx):
+                if abs(grad1[pos]) < _TOL:
+                    continue
+                hit = -grad0[pos] / grad1[pos]
+                if 0.0 <= hit < lam - _TOL and hit > best_lam:
+                    best_lam, event = hit, ("enter", i, None)
+
+        if event is None:
+            # No more turning points: the minimum variance portfolio is at lambda = 0
+            weights[free_idx] = alpha
+            corners.append(weights.copy())
+            break
+
+        lam = best_lam
+        weights[free_idx] = alpha + lam * beta
+        kind, which, bound = event
+        if kind == "leave":
+            i = free_idx.pop(which)
+            inv = _drop_from_inverse(inv, which)
+            weights[i] = bound
+            free[i] = False
+        else:
+            inv = _add_to_inverse(inv, cov, free_idx, which)
+            free_idx.append(which)
+            free[which] = True
+        corners.append(weights.copy())
+
+    corners = np.array(corners)
+    keep = np.concatenate([[True], np.abs(np.diff(corners, axis=0)).max(axis=1) > _TOL])
+    return corners[keep]
+
+
+def frontier_points(corners, mu, cov, n_points=50, risk_free=0.02):
+    """
+    Evenly spaced frontier portfolios interpolated from corner portfolios.
+
+    Between adjacent corners weights are linear in the expected return, so
+    interpolating on return gives the exact frontier portfolio.
+
+    Args:
+        corners: np.array (m, n) from ``critical_line``
+        mu: Expected returns (n,)
+        cov: Covariance matrix (n, n)
+        n_points: Number of frontier points
+        risk_free: Risk-free rate for the Sharpe ratios
+
+    Returns:
+        returns, volatilities, sharpe_ratios: np.array (n_points,)
+        weights: np.array (n_points, n)
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    corner_returns = corners @ mu
+    # np.interp needs increasing abscissae: walk from the minimum variance corner up
+    xs = corner_returns[::-1]
+    targets = np.linspace(xs[0], xs[-1], int(n_points))
+    weights = np.column_stack([np.interp(targets, xs, corners[::-1, j]) for j in range(corners.shape[1])])
+    volatilities = np.sqrt(np.einsum("ij,jk,ik->i", weights, cov, weights))
+    returns = weights @ mu
+    sharpe = np.divide(returns - risk_free, volatilities, out=np.zeros_like(returns), where=volatilities > 0)
+    return returns, volatilities, sharpe, weights
+
+
+def max_sharpe_portfolio(corners, mu, cov, risk_free=0.02):
+    """
+    Maximum Sharpe ratio portfolio on the frontier described by ``corners``.
+
+    On the segment w(t) = w0 + t (w1 - w0) the excess return is a + b t and
+    the variance c + 2 d t + e t^2, so the Sharpe ratio is maximized at
+    t = (a d - b c) / (b d - a e), clipped to the segment.
+
+    Returns:
+        np.array (n,) of weights
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    best, best_sharpe = corners[0], -np.inf
+    for w0, w1 in zip(corners[:-1], corners[1:]):
+        step = w1 - w0
+        a, b = w0 @ mu - risk_free, step @ mu
+        c, d, e = w0 @ cov @ w0, w0 @ cov @ step, step @ cov @ step
+        candidates = [0.0, 1.0]
+        if abs(b * d - a * e) > 1e-18:
+            candidates.append(min(1.0, max(0.0, (a * d - b * c) / (b * d - a * e))))
+        for t in candidates:
+            w = w0 + t * step
+            sharpe = (w @ mu - risk_free) / np.sqrt(w @ cov @ w)
+            if sharpe > best_sharpe:
+                best, best_sharpe = w, sharpe
+    return best
+
+
+class FrontierCache:
+    """
+    LRU cache of corner portfolios.
+
+    Entries are keyed by (mu/cov fingerprint, asset set, bounds), so a data
+    refresh produces new keys and every frontier request over unchanged
+    data reuses one critical line pass.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = int(max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(mu, cov, lower, upper):
+        assets = hashlib.sha1("|".join(str(a) for a in mu.index).encode()).hexdigest()
+        return (array_fingerprint(mu, cov), assets, array_fingerprint(lower, upper))
+
+    def corners(self, mu, cov, lower=0.0, upper=1.0):
+        """
+        Corner portfolios for a universe, running ``critical_line`` on a miss.
+
+        Args:
+            mu: pd.Series of expected returns
+            cov: pd.DataFrame covariance matrix
+            lower, upper: Weight bounds, see ``critical_line``
+
+        Returns:
+            np.array (m, n), read-only
+        """
+        key = self.make_key(mu, cov, lower, upper)
+        with self._lock:
+            corners = self._entries.get(key)
+            if corners is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return corners
+            self.misses += 1
+
+        corners = critical_line(mu.values, cov.values, lower, upper)
+        corners.flags.writeable = False
+        with self._lock:
+            self._entries[key] = corners
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return corners
+
+    def clear(self):
+        """Drop every cached frontier."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Entry count and hit/miss counters."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+FRONTIER_CACHE = FrontierCache(FRONTIER_CACHE_MAX_ENTRIES)
+
+
+def efficient_frontier(mu, cov, n_points=50, risk_free=0.02, lower=0.0, upper=1.0):
+    """
+    Long-only efficient frontier with its key portfolios.
+
+    Args:
+        mu: pd.Series of expected returns
+        cov: pd.DataFrame covariance matrix
+        n_points: Number of frontier points
+        risk_free: Risk-free rate
+        lower, upper: Weight bounds
+
+    Returns:
+        dict with 'points' (return, volatility, sharpe_ratio, weights per
+        point), 'corners', 'min_volatility' and 'max_sharpe'; weights are
+        dicts keyed by ticker
+    """
+    assets = list(mu.index)
+    corners = FRONTIER_CACHE.corners(mu, cov, lower, upper)
+    mu_values, cov_values = mu.values, cov.values
+
+    def portfolio(w):
+        ret = float(w @ mu_values)
+        vol = float(np.sqrt(w @ cov_values @ w))
+        return {
+            'return': ret,
+            'volatility': vol,
+            'sharpe_ratio': (ret - risk_free) / vol if vol > 0 else 0.0,
+            'weights': {a: float(x) for a, x in zip(assets, w)},
+        }
+
+    returns, vols, sharpe, weights = frontier_points(corners, mu_values, cov_values, n_points, risk_free)
+    points = [
+        {'return': float(r), 'volatility': float(v), 'sharpe_ratio': float(s),
+         'weights': {a: float(x) for a, x in zip(assets, w)}}
+        for r, v, s, w in zip(returns, vols, sharpe, weights)
+    ]
+    return {
+        'points': points,
+        'corners': [portfolio(w) for w in corners],
+        'min_volatility': portfolio(corners[-1]),
+        'max_sharpe': portfolio(max_sharpe_portfolio(corners, mu_values, cov_values, risk_free)),
+    }
@@ -4,86 +4,123 @@ from datetime import datetime, timedelta
 import numpy as np
 from scipy.optimize import minimize
 from  ..utils.portfolio_utils import calculate_portfolio_beta
+from ..utils.simulation_utils import (
+    portfolio_daily_moments, build_value_paths, simulate_paths_streaming, simulate_returns_dense,
+    draw_asset_scenarios, scenario_batch_sizes, estimate_with_stderr, DEFAULT_CHUNK_SIZE,
+    bootstrap_asset_scenarios, check_return_model, DEFAULT_BLOCK_LENGTH
+)
+from ..utils.drawdown_utils import drawdown_analytics, summarize_drawdown_stats
+from ..utils.analytic_utils import (
+    ANALYTIC_MODE, normal_portfolio_risk, compounded_lognormal, lognormal_quantiles, lognormal_tail_mean
+)
+
+# Percentile bands drawn in the Monte Carlo chart
+PATH_PERCENTILES = [5, 25, 50, 75, 95]
 
-# def calculate_efficient_frontier(mu, cov, points=20, risk_free=0.02):
-#     """
-#     Calculate efficient frontier points
-    
-#     Args:
-#         mu: Expected returns
-#         cov: Covariance matrix
-#         points: Number of points on the frontier
-#         risk_free: Risk-free rate
-        
-#     Returns:
-#         returns: List of returns
-#         volatilities: List of volatilities
-#         sharpe_ratios: List of Sharpe ratios
-#     """
-#     from scipy.optimize import minimize
-    
-#     n = len(mu)
-    
-#     def portfolio_volatility(weights):
-#         return np.sqrt(weights @ cov.values @ weights)
-    
-#     def portfolio_return(weights):
-#         return np.dot(weights, mu)
-    
-#     def negative_sharpe(weights):
-#         return -(portfolio_return(weights) - risk_free) / portfolio_volatility(weights)
-    
-#     # Constraints
-#     constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-#     bounds = tuple((0, 1) for _ in range(n))
-    
-#     # Find minimum volatility portfolio
-#     min_vol_result = minimize(
-#         portfolio_volatility,
-#         np.ones(n) / n,
-#         bounds=bounds,
-#         constraints=constraints
-#     )
-#     min_vol_weights = min_vol_result['x']
-#     min_vol_return = portfolio_return(min_vol_weights)
-#     min_vol_volatility = portfolio_volatility(min_vol_weights)
-    
-#     # Find maximum Sharpe ratio portfolio
-#     max_sharpe_result = minimize(
-#         negative_sharpe,
-#         np.ones(n) / n,
-#         bounds=bounds,
-#         constraints=constraints
-#     )
-#     max_sharpe_weights = max_sharpe_result['x']
-#     max_sharpe_return = portfolio_return(max_sharpe_weights)
-#     max_sharpe_volatility = portfolio_volatility(max_sharpe_weights)
-    
-#     # Generate efficient frontier
-#     target_returns = np.linspace(min_vol_return, max(mu) * 0.9, points)
-#     efficient_volatilities = []
-#     efficient_weights = []
-    
-#     for target_return in target_returns:
-#         constraints = (
-#             {'type': 'eq', 'fun': lambda x: np.sum(x) - 1},
-#             {'type': 'eq', 'fun': lambda x: portfolio_return(x) - target_return}
-#         )
-#         result = minimize(
-#             portfolio_volatility,
-#             np.ones(n) / n,
-#             bounds=bounds,
-#             constraints=constraints
-#         )
-#         efficient_volatilities.append(result['fun'])
-#         efficient_weights.append(result['x'])
-    
-#     # Calculate Sharpe ratios
-#     sharpe_ratios = [(r - risk_free) / v for r, v in zip(target_returns, efficient_volatilities)]
-    
-#     return target_returns.tolist(), efficient_volatilities, sharpe_ratios, efficient_weights
 
-def get_weights_from_selection_quantum(selection_vec, mu, cov, tickers, user_risk=1.0, min_weight=0.01):
+def sharpe_vol_objective(mu, cov, target_vol, penalty=0.1):
+    """
+    Negative Sharpe ratio plus a soft penalty on deviation from target_vol,
+    with its closed-form gradient.
+
+    f(w) = -(w'mu) / vol + penalty * ((vol - target_vol) / target_vol)**2,
+    vol = sqrt(w' cov w). The product cov @ w is computed once per point and
+    shared by ``fun`` and ``jac``, which SLSQP calls at the same iterates.
+
+    Args:
+        mu: np.array of expected returns
+        cov: np.array covariance matrix
+        target_vol: Volatility the penalty pulls towards
+        penalty: Weight of the volatility penalty
+
+    Returns:
+        (fun, jac): Callables of w
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    cache = {'w': None}
+
+    def terms(w):
+        if cache['w'] is None or not np.array_equal(cache['w'], w):
+            cov_w = cov @ w
+            cache.update(w=np.array(w, dtype=float), cov_w=cov_w, ret=float(w @ mu),
+                         vol=float(np.sqrt(w @ cov_w)))
+        return cache['cov_w'], cache['ret'], cache['vol']
+
+    def fun(w):
+        _, ret, vol = terms(w)
+        return -ret / vol + penalty * ((vol - target_vol) / target_vol) ** 2
+
+    def jac(w):
+        cov_w, ret, vol = terms(w)
+        dvol = cov_w / vol
+        return -mu / vol + (ret / vol ** 2) * dvol + 2 * penalty * (vol - target_vol) / target_vol ** 2 * dvol
+
+    return fun, jac
+
+
+def volatility_range(cov):
+    """
+    Volatility bounds that user_risk interpolates between.
+
+    Args:
+        cov: np.array covariance matrix of the selected assets
+
+    Returns:
+        (min_vol, max_vol): global minimum variance volatility and the
+        largest single-asset volatility
+    """
+    ones = np.ones(len(cov))
+    inv_cov = np.linalg.pinv(cov)
+    gmv_weights = inv_cov @ ones / (ones @ inv_cov @ ones)   # global minimum variance
+    min_vol = np.sqrt(gmv_weights @ cov @ gmv_weights)
+    max_vol = np.sqrt(np.max(np.diag(cov)))
+    return min_vol, max_vol
+
+
+def _optimize_quantum_weights(mu, cov, vol_range, user_risk, min_weight, x0):
+    """
+    SLSQP solve of the Sharpe-with-volatility-penalty weights.
+
+    Args:
+        mu: np.array of selected expected returns
+        cov: np.array selected covariance matrix
+        vol_range: (min_vol, max_vol) from ``volatility_range``
+        user_risk: float in [0,1]
+        min_weight: Minimum allocation per asset
+        x0: Starting weights
+
+    Returns:
+        OptimizeResult, dict of optimizer stats
+    """
+    n = len(mu)
+
+    # Minimum weight for each asset to avoid zero allocation
+    bounds = [(min_weight, 1) for _ in range(n)]
+
+    # Constraint: sum of weights = 1, with its constant Jacobian
+    ones = np.ones(n)
+    cons = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: ones}]
+
+    # Soft target volatility based on user_risk
+    min_vol, max_vol = vol_range
+    target_vol = min_vol + user_risk * (max_vol - min_vol)
+
+    # Objective: maximize Sharpe ratio with penalty for deviation from target_vol
+    objective, gradient = sharpe_vol_objective(mu, cov, target_vol)
+
+    res = minimize(objective, x0, jac=gradient, method='SLSQP', bounds=bounds, constraints=cons)
+    stats = {
+        'success': bool(res.success),
+        'iterations': int(res.nit),
+        'function_evals': int(res.nfev),
+        'gradient_evals': int(res.njev),
+    }
+    return res, stats
+
+
+def get_weights_from_selection_quantum(selection_vec, mu, cov, tickers, user_risk=1.0, min_weight=0.01,
+                                       return_stats=False):
     """
     Optimize weights so that all selected assets get non-zero weights, Sharpe ratio is maximized,
     and portfolio volatility scales smoothly with user_risk.
@@ -95,54 +132,88 @@ def get_weights_from_selection_quantum(selection_vec, mu, cov, tickers, user_ris
         tickers : list of asset names
         user_risk : float in [0,1], 0 = lowest risk, 1 = highest risk
         min_weight : float, minimum allocation per asset
+        return_stats : bool, also return the optimizer statistics
 
     Returns:
         np.array : optimized portfolio weights
         pd.Series : selected expected returns
         pd.DataFrame : selected covariance matrix
+        dict : (only with return_stats) SLSQP 'success', 'iterations',
+            'function_evals' and 'gradient_evals'
     """
 
     selection = np.array([1 if float(x) > 0 else 0 for x in selection_vec])
     idx = np.where(selection == 1)[0].tolist()
     if len(idx) == 0:
-        return None, None, None
+        return (None, None, None, None) if return_stats else (None, None, None)
 
     selected_mu = mu.iloc[idx]
-    selected_cov = cov.iloc[idx, idx].values
+    selected_cov_df = cov.iloc[idx, idx]
+    selected_cov = selected_cov_df.values
     n = len(idx)
 
-    # Minimum weight for each asset to avoid zero allocation
-    bounds = [(min_weight, 1) for _ in range(n)]
-
-    # Constraint: sum of weights = 1
-    cons = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1}]
-
     # Starting point: equal weights
     x0 = np.ones(n) / n
+    res, stats = _optimize_quantum_weights(
+        selected_mu.values, selected_cov, volatility_range(selected_cov), user_risk, min_weight, x0
+    )
 
-    # Soft target volatility based on user_risk
-    ones = np.ones(n)
-    inv_cov = np.linalg.pinv(selected_cov)
-    gmv_weights = inv_cov @ ones / (ones @ inv_cov @ ones)   # global minimum variance
-    min_vol = np.sqrt(gmv_weights @ selected_cov @ gmv_weights)
-    max_vol = np.sqrt(np.max(np.diag(selected_cov)))
-    target_vol = min_vol + user_risk * (max_vol - min_vol)
+    if not res.success:
+        print("Optimization failed:", res.message)
+        return (None, None, None, stats) if return_stats else (None, None, None)
 
-    # Objective: maximize Sharpe ratio with penalty for deviation from target_vol
-    def objective(w):
-        port_return = w @ selected_mu.values
-        port_vol = np.sqrt(w @ selected_cov @ w)
-        sharpe = port_return / port_vol
-        vol_penalty = ((port_vol - target_vol) / target_vol)**2  # soft penalty
-        return -sharpe + 0.1 * vol_penalty  # minimize negative Sharpe + penalty
+    if return_stats:
+        return res.x, selected_mu, selected_cov_df, stats
+    return res.x, selected_mu, selected_cov_df
 
-    res = minimize(objective, x0, bounds=bounds, constraints=cons)
 
-    if not res.success:
-        print("Optimization failed:", res.message)
-        return None, None, None
+def get_weights_batch_quantum(items, mu, cov, min_weight=0.01):
+    """
+    ``get_weights_from_selection_quantum`` for many (selection, user_risk) pairs.
+
+    Pairs are grouped by selection. Each group slices mu/cov and computes
+    the volatility range once, then solves its risk levels in increasing
+    order, starting each solve from the previous level's weights.
+
+    Args:
+        items : iterable of (selection_vec, user_risk)
+        mu : pd.Series, expected returns of assets
+        cov : pd.DataFrame, covariance matrix
+        min_weight : float, minimum allocation per asset
 
-    return res.x, selected_mu, cov.iloc[idx, idx]
+    Returns:
+        list of dicts in input order, each with 'user_risk',
+        'selected_assets', 'weights' (dict keyed by ticker, None if the
+        solve failed) and 'optimizer_stats'
+    """
+    items = list(items)
+    groups = {}
+    for pos, (selection_vec, user_risk) in enumerate(items):
+        idx = tuple(i for i, x in enumerate(selection_vec) if float(x) > 0)
+        groups.setdefault(idx, []).append((float(user_risk), pos))
+
+    results = [None] * len(items)
+    for idx, risks in groups.items():
+        assets = [mu.index[i] for i in idx]
+        if not idx:
+            for user_risk, pos in risks:
+                results[pos] = {'user_risk': user_risk, 'selected_assets': [], 'weights': None,
+                                'optimizer_stats': None}
+            continue
+
+        selected_mu = mu.values[list(idx)]
+        selected_cov = cov.values[np.ix_(idx, idx)]
+        vol_range = volatility_range(selected_cov)
+        x0 = np.ones(len(idx)) / len(idx)
+        for user_risk, pos in sorted(risks):
+            res, stats = _optimize_quantum_weights(selected_mu, selected_cov, vol_range, user_risk, min_weight, x0)
+            weights = None
+            if res.success:
+                x0 = res.x
+                weights = {a: float(w) for a, w in zip(assets, res.x)}
+            results[pos] = {'user_risk': user_risk, 'selected_assets': assets, 'weights': weights,
+                            'optimizer_stats': stats}
+    return results
 
 def get_weights_from_selection(selection_vec, mu, cov, tickers, user_risk=1.0):
     """Convert QAOA selection vector into fractional weights."""
@@ -219,7 +290,15 @@ def compute_sortino_ratio(weights, returns, tickers, risk_free=0.02):
 # 4. Monte Carlo Simulation
 # ======================================================
 
-def monte_carlo_portfolio(mu, cov, weights, horizon_days=30, n_sims=5000, alpha=0.05, seed=123):
+def tail_mean(samples, percentile):
+    """Mean of the samples at or below the given percentile (expected shortfall)."""
+    threshold = np.percentile(samples, percentile)
+    tail = samples[samples <= threshold]
+    return float(np.mean(tail)) if len(tail) > 0 else float(threshold)
+
+def monte_carlo_portfolio(mu, cov, weights, horizon_days=30, n_sims=5000, alpha=0.05, seed=123, n_workers=None,
+                          scenarios=None, sampling="mc", return_stderr=False, model="gaussian", history=None,
+                          block_length=DEFAULT_BLOCK_LENGTH):
     """
     Monte Carlo simulation for VaR and CVaR
     
@@ -231,6 +310,20 @@ def monte_carlo_portfolio(mu, cov, weights, horizon_days=30, n_sims=5000, alpha=
         n_sims: Number of simulations
         alpha: Confidence level for VaR/CVaR
         seed: Random seed
+        n_workers: Worker processes for drawing scenarios (None runs in-process);
+            the result for a given seed does not depend on it
+        scenarios: Optional pd.DataFrame of cached asset-level horizon returns
+            (see scenario_cache.get_scenarios) drawn with the same horizon,
+            n_sims, seed and sampling; its columns must include mu's index
+        sampling: "mc", "antithetic", "sobol" or "control" (plain draws with the
+            equal-weighted scenario return, of known mean, as control variate), or
+            "analytic" for the exact normal closed form without any draws
+            (sim_port_rets is then empty and standard errors are zero)
+        return_stderr: Also return batch-means standard errors
+        model: "gaussian", or "bootstrap" to resample compounded horizon returns
+            from history in contiguous blocks (plain sampling only)
+        history: pd.DataFrame of historical daily asset returns (bootstrap model)
+        block_length: Bootstrap block length in trading days
         
     Returns:
         mean_sim: Mean simulated return
@@ -238,21 +331,62 @@ def monte_carlo_portfolio(mu, cov, weights, horizon_days=30, n_sims=5000, alpha=
         var_ret: Value at Risk (return)
         cvar_ret: Conditional Value at Risk (return)
         sim_port_rets: Simulated portfolio returns
+        stderr (only with return_stderr): dict of standard errors for mean, var, cvar
     """
-    np.random.seed(seed)
+    # Cached scenarios already carry the history they were resampled from
+    check_return_model(model, sampling, history if scenarios is None else scenarios)
+    if sampling == ANALYTIC_MODE:
+        mean_sim, std_sim, var_ret, cvar_ret = normal_portfolio_risk(mu, cov, weights, horizon_days, alpha)
+        if return_stderr:
+            stderr = {"mean": 0.0, "var": 0.0, "cvar": 0.0}
+            return mean_sim, std_sim, var_ret, cvar_ret, [], stderr
+        return mean_sim, std_sim, var_ret, cvar_ret, []
+
     h = max(1, int(horizon_days))
     mu_h = mu * (h / 252.0)
-    cov_h = cov * (h / 252.0)
 
-    sims = np.random.multivariate_normal(mean=mu_h, cov=cov_h, size=n_sims)
-    sim_port_rets = sims.dot(weights)
-
-    mean_sim = float(np.mean(sim_port_rets))
+    if scenarios is not None:
+        if len(scenarios) != n_sims:
+            raise ValueError("Cached scenarios do not match n_sims")
+        # Scatter the weights over the cached universe: one matrix-vector product
+        columns = scenarios.columns.get_indexer(mu.index)
+        if (columns < 0).any():
+            missing = [a for a, c in zip(mu.index, columns) if c < 0]
+            raise ValueError(f"Cached scenarios do not cover assets: {missing}")
+        weights_full = np.zeros(scenarios.shape[1])
+        weights_full[columns] = weights
+        sim_port_rets = scenarios.values @ weights_full
+        asset_rets = scenarios.values[:, columns]
+    elif model == "bootstrap":
+        asset_rets = bootstrap_asset_scenarios(
+            history[list(mu.index)].values, h, n_sims, seed=seed, n_workers=n_workers, block_length=block_length
+        )
+        sim_port_rets = asset_rets.dot(weights)
+    else:
+        cov_h = cov * (h / 252.0)
+
+        asset_rets = draw_asset_scenarios(mu_h, cov_h, n_sims, seed=seed, n_workers=n_workers, sampling=sampling)
+        sim_port_rets = asset_rets.dot(weights)
+
+    # Point estimates with batch-means standard errors. The control variate is
+    # the equal-weighted return of the same scenarios: linear in the underlying
+    # normals, with known mean mean(mu_h), and not tied to the weights evaluated
+    sizes = scenario_batch_sizes(n_sims, sampling=sampling)
+    control = asset_rets.mean(axis=1) if sampling == "control" else None
+    control_mean = float(np.mean(np.asarray(mu_h, dtype=float)))
+    mean_sim, mean_se = estimate_with_stderr(sim_port_rets, sizes, np.mean, control, control_mean)
     std_sim = float(np.std(sim_port_rets))
-    var_ret = float(np.percentile(sim_port_rets, 100 * alpha))
-    cvar_ret = float(np.mean(sim_port_rets[sim_port_rets <= var_ret])) if np.any(sim_port_rets <= var_ret) else var_ret
+    var_ret, var_se = estimate_with_stderr(
+        sim_port_rets, sizes, lambda x: np.percentile(x, 100 * alpha), control, control_mean
+    )
+    cvar_ret, cvar_se = estimate_with_stderr(
+        sim_port_rets, sizes, lambda x: tail_mean(x, 100 * alpha), control, control_mean
+    )
 
     # Convert sim_port_rets to a Python list for JSON serialization
+    if return_stderr:
+        stderr = {"mean": mean_se, "var": var_se, "cvar": cvar_se}
+        return mean_sim, std_sim, var_ret, cvar_ret, sim_port_rets.tolist(), stderr
     return mean_sim, std_sim, var_ret, cvar_ret, sim_port_rets.tolist()
 
 def compute_blended_stats(weights_risky, mu, cov, user_risk, risk_free):
@@ -289,19 +423,26 @@ def unified_portfolio_metrics(
     alpha=0.05,
     seed=123,
     quantum=False,
+    scenarios=None,
+    sampling="mc",
+    model="gaussian",
 ):
     """
     Unified function where the entire portfolio is invested in selected assets.
     Takes both selection_vec and selected_assets directly (no recomputation).
     No cash allocation: maximizes expected return given selected stocks.
+    scenarios: optional cached asset-level scenarios for the Monte Carlo step.
+    sampling: Monte Carlo sampling mode, see monte_carlo_portfolio.
+    model: "gaussian" or "bootstrap" (block-bootstraps the daily `returns`).
     """
 
     # --------------------------------------------------
     # Step 1. Get risky portfolio weights
     # --------------------------------------------------
+    optimizer_stats = None
     if selection_vec is not None and selected_assets is not None and quantum:
-        weights_risky, mu, cov = get_weights_from_selection_quantum(
-            selection_vec, mu, cov, tickers, user_risk
+        weights_risky, mu, cov, optimizer_stats = get_weights_from_selection_quantum(
+            selection_vec, mu, cov, tickers, user_risk, return_stats=True
         )
         tickers_selected = selected_assets
     elif selection_vec is not None and selected_assets is not None and not quantum:
@@ -336,8 +477,9 @@ def unified_portfolio_metrics(
     # --------------------------------------------------
     # Step 4. Monte Carlo simulation
     # --------------------------------------------------
-    mean_sim, std_sim, var_ret, cvar_ret, sim_rets = monte_carlo_portfolio(
-        mu, cov, weights_risky, horizon_days, n_sims, alpha, seed
+    mean_sim, std_sim, var_ret, cvar_ret, sim_rets, stderr = monte_carlo_portfolio(
+        mu, cov, weights_risky, horizon_days, n_sims, alpha, seed, scenarios=scenarios,
+        sampling=sampling, return_stderr=True, model=model, history=returns
     )
 
     # --------------------------------------------------
@@ -357,7 +499,10 @@ def unified_portfolio_metrics(
         "CVaR_return": cvar_ret,
         "VaR_loss": -var_ret,
         "CVaR_loss": -cvar_ret,
+        "VaR_stderr": stderr["var"],
+        "CVaR_stderr": stderr["cvar"],
         "sim_returns": sim_rets,
+        "optimizer_stats": optimizer_stats,
     }
 
     return results
@@ -371,7 +516,10 @@ def classical_model(
     horizon_days=252,
     n_sims=5000,
     alpha=0.05,
-    seed=123
+    seed=123,
+    scenarios=None,
+    sampling="mc",
+    model="gaussian"
     ):
 
     tickers_selected = metrics["selected_assets"]
@@ -386,8 +534,9 @@ def classical_model(
     # --------------------------------------------------
     # Step 4. Monte Carlo simulation
     # --------------------------------------------------
-    mean_sim, std_sim, var_ret, cvar_ret, sim_rets = monte_carlo_portfolio(
-        mu, cov, weights_risky, horizon_days, n_sims, alpha, seed
+    mean_sim, std_sim, var_ret, cvar_ret, sim_rets, stderr = monte_carlo_portfolio(
+        mu, cov, weights_risky, horizon_days, n_sims, alpha, seed, scenarios=scenarios,
+        sampling=sampling, return_stderr=True, model=model, history=returns
     )
     results = {
         "selected_assets": tickers_selected,
@@ -403,12 +552,15 @@ def classical_model(
         "CVaR_return": cvar_ret,
         "VaR_loss": -var_ret,
         "CVaR_loss": -cvar_ret,
+        "VaR_stderr": stderr["var"],
+        "CVaR_stderr": stderr["cvar"],
         "sim_returns": sim_rets,
     }
 
     return results
 
-def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_amount, investment_horizon, risk_free=0.02):
+def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_amount, investment_horizon, risk_free=0.02,
+                      alpha=0.05):
     """
     Project portfolio value over a specified horizon with risk range and key metrics.
 
@@ -419,9 +571,11 @@ def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_
         investment_amount : float, total amount to invest
         investment_horizon : int, investment horizon in years
         risk_free : float, risk-free rate (optional, for Sharpe/Sortino calculation)
+        alpha : float, tail probability for the projected value VaR/CVaR
 
     Returns:
-        dict with projected value, range, expected return, volatility, ROI, ROE, CAGR, and per-asset projection
+        dict with projected value, range, expected return, volatility, ROI, ROE, CAGR, per-asset projection,
+        and closed-form (log-normal) value percentiles, VaR and CVaR at the horizon
     """
     # Align mu and cov to selected assets
     selected_mu = mu[weights_fractional.index]
@@ -429,7 +583,7 @@ def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_
 
     portfolio_beta = calculate_portfolio_beta(weights_fractional, list(selected_mu.index));
     # Portfolio metrics
-    expected_annual_return, _, _ = compute_blended_stats(weights_fractional, selected_mu, selected_cov,user_risk, risk_free)
+    expected_annual_return, blended_vol, _ = compute_blended_stats(weights_fractional, selected_mu, selected_cov,user_risk, risk_free)
     expected_return = float(np.dot(weights_fractional.values, selected_mu))
     portfolio_variance = float(weights_fractional.values @ selected_cov.values @ weights_fractional.values)
     portfolio_risk = np.sqrt(portfolio_variance)
@@ -449,6 +603,12 @@ def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_
     roe = roi  # proxy for portfolio-level ROE
     cagr = (projected_value / investment_amount) ** (1 / investment_horizon) - 1
 
+    # Log-normal distribution of the horizon value, compounding annual returns
+    log_m, log_s = compounded_lognormal(investment_amount, expected_annual_return, blended_vol, investment_horizon)
+    value_percentiles = lognormal_quantiles(log_m, log_s, PATH_PERCENTILES)
+    value_at_risk = investment_amount - float(lognormal_quantiles(log_m, log_s, [100 * alpha])[100 * alpha])
+    conditional_var = investment_amount - lognormal_tail_mean(log_m, log_s, alpha)
+
     metrics = {
         "total_investment": float(investment_amount),
         "investment_horizon": int(investment_horizon),
@@ -462,12 +622,17 @@ def project_portfolio(weights_fractional, mu, cov_matrix, user_risk, investment_
         "ROI": float(roi),
         "ROE": float(roe),
         "CAGR": float(cagr),
+        "value_percentiles": {str(p): float(v) for p, v in value_percentiles.items()},
+        "VaR": float(value_at_risk),
+        "CVaR": float(conditional_var),
     }
 
     return metrics
 
 def monte_carlo_simulation(weights, returns, cov_matrix, initial_investment,
-                          time_horizon=252, num_simulations=1000, percentiles=[5, 25, 50, 75, 95]):
+                          time_horizon=252, num_simulations=1000, percentiles=[5, 25, 50, 75, 95],
+                          seed=None, chunk_size=None, n_workers=None, sampling="mc", path_stats=True,
+                          model="gaussian", history=None, block_length=DEFAULT_BLOCK_LENGTH):
     """
     Perform Monte Carlo simulation for portfolio performance with enhanced risk metrics.
 
@@ -479,148 +644,234 @@ def monte_carlo_simulation(weights, returns, cov_matrix, initial_investment,
         time_horizon (int): Time horizon in days
         num_simulations (int): Number of simulations to run
         percentiles (list): Percentiles to calculate for the final portfolio value
+        seed (int): Random seed (None for a fresh draw)
+        chunk_size (int): Stream the simulation in chunks of this many paths so
+            memory stays O(time_horizon * chunk_size); percentile paths are then
+            estimated with a quantile sketch. None simulates all paths at once.
+            For a fixed seed the streamed result does not depend on it.
+        n_workers (int): Spread chunks over this many worker processes. Implies
+            streaming; for a fixed seed the result does not depend on it.
+        sampling (str): "mc", "antithetic", "sobol" or "control" (control variate
+            on each path's summed daily returns, whose mean is known). Standard
+            errors of the VaR/CVaR estimates are reported under
+            'standard_error'. "analytic" computes the
+            final-value percentiles, VaR/CVaR and percentile bands in closed form
+            (log-normal); paths are then only simulated for path_stats.
+        path_stats (bool): In analytic mode, still simulate paths for the
+            drawdown blocks and sample paths. When False those blocks are None
+            and no simulation runs.
+        model (str): "gaussian", or "bootstrap" to resample historical daily
+            portfolio returns in contiguous blocks (plain sampling only)
+        history (np.array): (days, assets) historical daily returns aligned
+            with weights, required by the bootstrap model
+        block_length (int): Bootstrap block length in trading days
 
     Returns:
         dict: Simulation results with enhanced risk metrics
     """
-    # Calculate daily mean and covariance
-    daily_returns = returns / 252  # Convert annual returns to daily
-    daily_cov = cov_matrix / 252  # Convert annual covariance to daily
+    # Daily portfolio mean and volatility
+    daily_mu, daily_vol = portfolio_daily_moments(weights, returns, cov_matrix)
+
+    portfolio_history = None
+    if model != "gaussian":
+        check_return_model(model, sampling, history)
+        # Constant weights: one contiguous historical portfolio return series
+        portfolio_history = np.ascontiguousarray(np.asarray(history, dtype=float) @ np.asarray(weights, dtype=float))
+        daily_mu, daily_vol = float(portfolio_history.mean()), float(portfolio_history.std())
+
+    if sampling == ANALYTIC_MODE:
+        results = _analytic_simulation_results(daily_mu, daily_vol, initial_investment, time_horizon, percentiles)
+        if path_stats:
+            # Drawdowns are path-dependent and have no closed form
+            simulated = monte_carlo_simulation(
+                weights, returns, cov_matrix, initial_investment, time_horizon, num_simulations,
+                percentiles, seed=seed, chunk_size=chunk_size, n_workers=n_workers
+            )
+            for key in ('max_drawdown', 'recovery_time', 'underwater_periods'):
+                results[key] = simulated[key]
+            results['visualization']['paths'] = simulated['visualization']['paths']
+            results['num_simulations'] = simulated['num_simulations']
+        return results
+
+    if n_workers is not None and chunk_size is None:
+        chunk_size = DEFAULT_CHUNK_SIZE
+
+    if chunk_size is not None and (num_simulations > chunk_size or n_workers is not None):
+        streamed = simulate_paths_streaming(
+            daily_mu, daily_vol, time_horizon, num_simulations,
+            initial_investment, chunk_size=chunk_size, seed=seed, n_workers=n_workers,
+            sampling=sampling, history=portfolio_history, block_length=block_length
+        )
+        final_values = streamed['final_values']
+        sizes = streamed['batch_sizes']
+        drawdown_stats = summarize_drawdown_stats(
+            streamed['max_drawdowns'], streamed['recovery_times'], streamed['underwater_periods']
+        )
+        percentile_paths = streamed['sketch'].quantiles(PATH_PERCENTILES)
+        sample_paths = streamed['sample_paths']
+        return_sums = streamed['return_sums']
+    else:
+        # Draw every path's daily returns at once; day 0 is the initial investment
+        daily_returns_results, sizes, rng = simulate_returns_dense(
+            daily_mu, daily_vol, time_horizon - 1, num_simulations, seed, sampling,
+            portfolio_history, block_length
+        )
+        simulation_results = build_value_paths(daily_returns_results, initial_investment)
+        final_values = simulation_results[-1, :]
+        return_sums = daily_returns_results.sum(axis=0)
 
-    # Initialize array to store simulation results
-    simulation_results = np.zeros((time_horizon, num_simulations))
-    daily_returns_results = np.zeros((time_horizon-1, num_simulations))
+        # Max drawdown, recovery times and underwater periods across all simulations
+        drawdown_stats = drawdown_analytics(simulation_results)
 
-    # Initial portfolio value
-    portfolio_value = initial_investment
+        percentile_paths = {
+            p: np.percentile(simulation_results, p, axis=1) for p in PATH_PERCENTILES
+        }
 
-    # Run simulations
-    for i in range(num_simulations):
-        # Initialize array to store daily portfolio values for this simulation
-        daily_portfolio_values = np.zeros(time_horizon)
-        daily_portfolio_values[0] = portfolio_value
+        # Sample of the simulation paths (for visualization)
+        sample_indices = rng.choice(num_simulations, min(10, num_simulations), replace=False)
+        sample_paths = simulation_results[:, sample_indices]
 
-        # Generate random returns for each day
-        random_returns = np.random.multivariate_normal(daily_returns, daily_cov, time_horizon)
-        portfolio_daily_returns = np.sum(random_returns * weights, axis=1)
+    # Control variate: each path's summed daily returns, an affine map of its
+    # underlying normals with known mean, correlated with but distinct from
+    # the final value being estimated
+    control = return_sums if sampling == "control" else None
+    control_mean = (time_horizon - 1) * daily_mu
 
-        # Calculate portfolio value for each day
-        for t in range(1, time_horizon):
-            daily_portfolio_values[t] = daily_portfolio_values[t-1] * (1 + portfolio_daily_returns[t])
-            # Store daily returns for later calculations
-            if t > 0:
-                daily_returns_results[t-1, i] = (daily_portfolio_values[t] / daily_portfolio_values[t-1]) - 1
+    return _monte_carlo_results(
+        final_values, drawdown_stats, percentile_paths, sample_paths,
+        initial_investment, time_horizon, num_simulations, percentiles,
+        sizes, sampling, control, control_mean
+    )
+
+def _analytic_simulation_results(daily_mu, daily_vol, initial_investment, time_horizon, percentiles):
+    """
+    Closed-form monte_carlo_simulation result for a constant-weight portfolio.
+
+    The value after t days is approximated by a log-normal matching the exact
+    mean and variance of initial * prod(1 + r_i). Path-dependent blocks
+    (drawdowns, sample paths) are left empty.
 
-        # Store this simulation's results
-        simulation_results[:, i] = daily_portfolio_values
+    Returns:
+        dict: Same keys as monte_carlo_simulation
+    """
+    t = np.arange(time_horizon)
+    log_m, log_s = compounded_lognormal(initial_investment, daily_mu, daily_vol, t)
+    m, s = float(log_m[-1]), float(log_s[-1])
+    years = time_horizon / 252
 
+    var_results = {}
+    cvar_results = {}
+    for level in [0.95, 0.99]:
+        key = str(int(level * 100))
+        tail = 1 - level
+        var_results[key] = float(initial_investment - lognormal_quantiles(m, s, [100 * tail])[100 * tail])
+        cvar_results[key] = float(initial_investment - lognormal_tail_mean(m, s, tail))
+
+    # (V / V0) ** (1 / years) - 1 is again log-normal
+    ann_m, ann_s = (m - np.log(initial_investment)) / years, s / years
+
+    return {
+        'percentiles': {
+            str(p): float(v) for p, v in lognormal_quantiles(m, s, percentiles).items()
+        },
+        'max_drawdown': None,
+        'recovery_time': None,
+        'underwater_periods': None,
+        'final_value': {
+            'mean': float(np.exp(m + 0.5 * s ** 2)),
+            'median': float(np.exp(m)),
+            'min': None,
+            'max': None,
+            'std': float(np.exp(m + 0.5 * s ** 2) * np.sqrt(np.expm1(s ** 2)))
+        },
+        'annualized_return': {
+            'mean': float(np.exp(ann_m + 0.5 * ann_s ** 2) - 1),
+            'median': float(np.exp(ann_m) - 1),
+            'min': None,
+            'max': None
+        },
+        'var': var_results,
+        'cvar': cvar_results,
+        'sampling': ANALYTIC_MODE,
+        'standard_error': {
+            'final_value_mean': 0.0,
+            'var': {key: 0.0 for key in var_results},
+            'cvar': {key: 0.0 for key in cvar_results}
+        },
+        'initial_investment': float(initial_investment),
+        'time_horizon_days': int(time_horizon),
+        'num_simulations': 0,
+        'visualization': {
+            'time_points': list(range(time_horizon)),
+            'paths': [],
+            'percentile_paths': {
+                str(p): path.tolist() for p, path in lognormal_quantiles(log_m, log_s, PATH_PERCENTILES).items()
+            }
+        }
+    }
+
+def _monte_carlo_results(final_values, drawdown_stats, percentile_paths, sample_paths,
+                         initial_investment, time_horizon, num_simulations, percentiles,
+                         sizes, sampling="mc", control=None, control_mean=None):
+    """
+    Assemble the monte_carlo_simulation result dict from reduced simulation output.
+
+    Args:
+        final_values (np.array): Final portfolio value of every path
+        drawdown_stats (dict): Output of drawdown_utils.summarize_drawdown_stats
+        percentile_paths (dict): {percentile: per-day portfolio value}
+        sample_paths (np.array): (time, samples) paths kept for visualization
+        initial_investment, time_horizon, num_simulations, percentiles: as in monte_carlo_simulation
+        sizes (np.array): Independent batch sizes along final_values
+        sampling (str): Sampling mode used for the draws
+        control (np.array): Optional control variate aligned with final_values
+        control_mean (float): Known expectation of the control
+
+    Returns:
+        dict: Simulation results
+    """
     # Calculate percentiles of final portfolio value
-    final_values = simulation_results[-1, :]
     percentile_values = np.percentile(final_values, percentiles)
 
-    # Calculate max drawdown across all simulations
-    max_drawdowns = []
-    recovery_times = []
-    underwater_periods = []
-
-    for i in range(num_simulations):
-        # Calculate drawdown for this simulation
-        simulation = simulation_results[:, i]
-        drawdowns = np.zeros(len(simulation))
-        peak = simulation[0]
-        in_drawdown = False
-        drawdown_start = 0
-        current_underwater = 0
-        underwater_periods_sim = []
-
-        for t, value in enumerate(simulation):
-            if value > peak:
-                # New peak
-                peak = value
-                if in_drawdown:
-                    # End of drawdown period
-                    recovery_time = t - drawdown_start
-                    recovery_times.append(recovery_time)
-                    in_drawdown = False
-                    underwater_periods_sim.append(current_underwater)
-                    current_underwater = 0
-            else:
-                # In drawdown
-                drawdown = (peak - value) / peak
-                drawdowns[t] = drawdown
-
-                if not in_drawdown and drawdown > 0.05:  # Start tracking significant drawdowns (>5%)
-                    in_drawdown = True
-                    drawdown_start = t
-
-                if in_drawdown:
-                    current_underwater += 1
-
-        # If still in drawdown at end of simulation
-        if in_drawdown and current_underwater > 0:
-            underwater_periods_sim.append(current_underwater)
-            # No recovery time calculated as it didn't recover
-
-        max_drawdowns.append(np.max(drawdowns))
-        if underwater_periods_sim:
-            underwater_periods.extend(underwater_periods_sim)
-
-    # Calculate daily returns statistics
-    daily_returns_mean = np.mean(daily_returns_results, axis=1)
-    daily_volatility = np.std(daily_returns_results, axis=1)
-
     # Calculate VaR and CVaR at different confidence levels
     var_levels = [0.95, 0.99]
     var_results = {}
     cvar_results = {}
+    var_errors = {}
+    cvar_errors = {}
 
     for level in var_levels:
+        key = str(int(level * 100))
+        tail = 100 * (1 - level)
+
         # Calculate VaR for final values
-        var_threshold = np.percentile(final_values, 100 * (1 - level))
-        var_results[str(int(level * 100))] = float(initial_investment - var_threshold)
+        var_threshold, var_errors[key] = estimate_with_stderr(
+            final_values, sizes, lambda x: np.percentile(x, tail), control, control_mean
+        )
+        var_results[key] = float(initial_investment - var_threshold)
 
         # Calculate CVaR (Expected Shortfall)
-        tail_values = final_values[final_values <= var_threshold]
-        if len(tail_values) > 0:
-            cvar = np.mean(tail_values)
-            cvar_results[str(int(level * 100))] = float(initial_investment - cvar)
-        else:
-            cvar_results[str(int(level * 100))] = float(var_results[str(int(level * 100))])
+        cvar, cvar_errors[key] = estimate_with_stderr(
+            final_values, sizes, lambda x: tail_mean(x, tail), control, control_mean
+        )
+        cvar_results[key] = float(initial_investment - cvar)
+
+    mean_final, mean_error = estimate_with_stderr(final_values, sizes, np.mean, control, control_mean)
 
     # Calculate annualized return and volatility
-    annualized_returns = []
-    for i in range(num_simulations):
-        final_value = simulation_results[-1, i]
-        years = time_horizon / 252  # Convert days to years
-        annualized_return = ((final_value / initial_investment) ** (1 / years)) - 1
-        annualized_returns.append(annualized_return)
+    years = time_horizon / 252  # Convert days to years
+    annualized_returns = ((final_values / initial_investment) ** (1 / years)) - 1
 
     # Prepare results
     results = {
         'percentiles': {
             str(p): float(v) for p, v in zip(percentiles, percentile_values)
         },
-        'max_drawdown': {
-            'mean': float(np.mean(max_drawdowns)),
-            'median': float(np.median(max_drawdowns)),
-            'max': float(np.max(max_drawdowns)),
-            'min': float(np.min(max_drawdowns)),
-            'percentiles': {
-                str(p): float(np.percentile(max_drawdowns, p)) for p in [5, 25, 50, 75, 95]
-            }
-        },
-        'recovery_time': {
-            'mean': float(np.mean(recovery_times)) if recovery_times else None,
-            'median': float(np.median(recovery_times)) if recovery_times else None,
-            'max': float(np.max(recovery_times)) if recovery_times else None
-        },
-        'underwater_periods': {
-            'mean': float(np.mean(underwater_periods)) if underwater_periods else None,
-            'median': float(np.median(underwater_periods)) if underwater_periods else None,
-            'max': float(np.max(underwater_periods)) if underwater_periods else None
-        },
+        'max_drawdown': drawdown_stats['max_drawdown'],
+        'recovery_time': drawdown_stats['recovery_time'],
+        'underwater_periods': drawdown_stats['underwater_periods'],
         'final_value': {
-            'mean': float(np.mean(final_values)),
+            'mean': mean_final,
             'median': float(np.median(final_values)),
             'min': float(np.min(final_values)),
             'max': float(np.max(final_values)),
@@ -634,15 +885,17 @@ def monte_carlo_simulation(weights, returns, cov_matrix, initial_investment,
         },
         'var': var_results,
         'cvar': cvar_results,
+        'sampling': sampling,
+        'standard_error': {
+            'final_value_mean': mean_error,
+            'var': var_errors,
+            'cvar': cvar_errors
+        },
         'initial_investment': float(initial_investment),
         'time_horizon_days': int(time_horizon),
         'num_simulations': int(num_simulations)
     }
 
-    # Sample of the simulation paths (for visualization)
-    sample_indices = np.random.choice(num_simulations, min(10, num_simulations), replace=False)
-    sample_paths = simulation_results[:, sample_indices]
-
     # Create time points for x-axis (days)
     time_points = list(range(time_horizon))
 
@@ -651,7 +904,7 @@ def monte_carlo_simulation(weights, returns, cov_matrix, initial_investment,
         'time_points': time_points,
         'paths': sample_paths.tolist(),
         'percentile_paths': {
-            str(p): np.percentile(simulation_results, p, axis=1).tolist() for p in [5, 25, 50, 75, 95]
+            str(p): np.asarray(path).tolist() for p, path in percentile_paths.items()
         }
     }
 
@@ -0,0 +1,174 @@
+import base64
+
+import numpy as np
+
+# Response formats for simulated return samples
+SIM_RETURN_FORMATS = ("raw", "histogram")
+
+# Encodings for visualization arrays
+ARRAY_ENCODINGS = ("json", "float32")
+
+
+def histogram_payload(samples, bins=50):
+    """
+    Histogram of a sample, as sent instead of the raw draws.
+
+    Args:
+        samples: Sequence of floats
+        bins: Number of equal-width bins
+
+    Returns:
+        dict with 'bin_edges' (bins + 1), 'counts' (bins), 'n', 'min', 'max'
+    """
+    samples = np.asarray(samples, dtype=float)
+    if samples.size == 0:
+        return {'bin_edges': [], 'counts': [], 'n': 0, 'min': None, 'max': None}
+    counts, edges = np.histogram(samples, bins=int(bins))
+    return {
+        'bin_edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'n': int(samples.size),
+        'min': float(samples.min()),
+        'max': float(samples.max())
+    }
+
+
+def lttb_indices(x, series, n_out):
+    """
+    Largest-Triangle-Three-Buckets point selection shared by several series.
+
+    The first and last points are always kept. Every bucket in between keeps
+    the point that forms the largest triangle with the previously kept point
+    and the average of the next bucket, with areas summed over all series so
+    that every series is sampled at the same x positions.
+
+    Args:
+        x: np.array (n,) of increasing x values
+        series: np.array (n,) or (n, n_series)
+        n_out: Number of points to keep (at least 3)
+
+    Returns:
+        np.array of sorted indices into x
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(series, dtype=float)
+    if y.ndim == 1:
+        y = y[:, None]
+    n = x.shape[0]
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        # Average point of the next bucket (the last point for the final bucket)
+        if b + 2 < len(edges):
+            nxt = slice(edges[b + 1], edges[b + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean(axis=0)
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:stop] - y[prev])
+            - (x[prev] - x[start:stop, None]) * (avg_y - y[prev])
+        ).sum(axis=1)
+        prev = start + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+def encode_array(values):
+    """
+    Pack an array as little-endian float32 in base64.
+
+    Args:
+        values: Array-like of numbers
+
+    Returns:
+        dict with 'dtype', 'shape' and base64 'data'
+    """
+    arr = np.ascontiguousarray(np.asarray(values, dtype='<f4'))
+    return {
+        'dtype': 'float32',
+        'shape': list(arr.shape),
+        'data': base64.b64encode(arr.tobytes()).decode('ascii')
+    }
+
+
+def decode_array(payload):
+    """Inverse of ``encode_array``."""
+    raw = base64.b64decode(payload['data'])
+    return np.frombuffer(raw, dtype='<f4').reshape(payload['shape'])
+
+
+def compact_visualization(visualization, max_points=None, encoding="json"):
+    """
+    Downsample and optionally binary-encode Monte Carlo visualization data.
+
+    Percentile bands and sample paths are downsampled together with
+    ``lttb_indices`` so every series keeps the same time points.
+
+    Args:
+        visualization: dict with 'time_points', 'paths' (time x samples) and
+            'percentile_paths' ({percentile: per-day values})
+        max_points: Keep at most this many time points, at least 3 (None keeps all)
+        encoding: "json" for plain lists, "float32" for ``encode_array`` blobs
+
+    Returns:
+        dict with the same keys
+    """
+    if encoding not in ARRAY_ENCODINGS:
+        raise ValueError(f"Unknown encoding: {encoding}. Expected one of {ARRAY_ENCODINGS}")
+    if max_points is None and encoding == "json":
+        return visualization
+
+    time_points = np.asarray(visualization['time_points'])
+    paths = np.asarray(visualization['paths'], dtype=float)
+    bands = {p: np.asarray(v, dtype=float) for p, v in visualization['percentile_paths'].items()}
+
+    paths_aligned = paths.ndim == 2 and paths.shape[0] == len(time_points)
+    if max_points is not None and int(max_points) < len(time_points):
+        columns = list(bands.values()) + ([paths] if paths_aligned else [])
+        stacked = np.column_stack(columns) if columns else np.zeros((len(time_points), 1))
+        keep = lttb_indices(time_points, stacked, max(int(max_points), 3))
+        time_points = time_points[keep]
+        bands = {p: v[keep] for p, v in bands.items()}
+        if paths_aligned:
+            paths = paths[keep]
+
+    if encoding == "float32":
+        return {
+            'time_points': time_points.tolist(),
+            'paths': encode_array(paths),
+            'percentile_paths': {p: encode_array(v) for p, v in bands.items()},
+            'encoding': encoding
+        }
+    return {
+        'time_points': time_points.tolist(),
+        'paths': paths.tolist(),
+        'percentile_paths': {p: v.tolist() for p, v in bands.items()}
+    }
+
+
+def compact_sim_returns(metrics, sim_returns="raw", bins=50):
+    """
+    Replace the raw ``sim_returns`` list of a metrics dict with a histogram.
+
+    Args:
+        metrics: dict from unified_portfolio_metrics / classical_model
+        sim_returns: "raw" keeps the samples, "histogram" bins them
+        bins: Number of histogram bins
+
+    Returns:
+        The same dict, modified in place
+    """
+    if sim_returns not in SIM_RETURN_FORMATS:
+        raise ValueError(f"Unknown sim_returns format: {sim_returns}. Expected one of {SIM_RETURN_FORMATS}")
+    if sim_returns == "histogram" and 'sim_returns' in metrics:
+        metrics['sim_returns'] = histogram_payload(metrics['sim_returns'], bins)
+    return metrics
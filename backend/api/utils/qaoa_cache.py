@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# JSON file holding optimized QAOA angles across restarts
+QAOA_CACHE_FILE = os.environ.get('QAOA_CACHE_FILE', 'qaoa_angles.json')
+
+# Number of user_risk buckets in [0, 1] sharing cached angles
+RISK_BUCKETS = 10
+
+
+def risk_bucket(user_risk, n_buckets=RISK_BUCKETS):
+    """Bucket index of a user_risk value in [0, 1]."""
+    return int(min(n_buckets - 1, max(0, np.floor(float(user_risk) * n_buckets))))
+
+
+def split_point(point, reps):
+    """
+    Split a QAOA parameter vector into (gammas, betas).
+
+    qiskit's QAOA ansatz orders its parameters by name, so the vector is
+    [beta_1..beta_p, gamma_1..gamma_p].
+    """
+    point = np.asarray(point, dtype=float)
+    return point[reps:], point[:reps]
+
+
+def join_point(gammas, betas):
+    """Inverse of ``split_point``."""
+    return np.concatenate([np.asarray(betas, dtype=float), np.asarray(gammas, dtype=float)])
+
+
+def interpolate_angles(values):
+    """
+    INTERP initialization for depth p+1 from optimized depth-p angles
+    (Zhou et al., "Quantum Approximate Optimization Algorithm:
+    Performance, Mechanism, and Implementation on Near-Term Devices").
+
+        new[i] = (i - 1)/p * old[i - 1] + (p - i + 1)/p * old[i],  i = 1..p+1
+
+    with old[0] = old[p+1] = 0.
+
+    Args:
+        values: np.array (p,) of gammas or betas
+
+    Returns:
+        np.array (p + 1,)
+    """
+    values = np.asarray(values, dtype=float)
+    p = len(values)
+    padded = np.concatenate([[0.0], values, [0.0]])
+    i = np.arange(1, p + 2)
+    return (i - 1) / p * padded[i - 1] + (p - i + 1) / p * padded[i]
+
+
+class QaoaAngleCache:
+    """
+    Persistent cache of optimized QAOA angles.
+
+    Entries are keyed by (n, k, reps, risk bucket, mixer). A lookup returns the
+    exact entry if present, otherwise the nearest entry with the same reps,
+    otherwise an INTERP-extended entry from reps - 1. Writes go to a JSON
+    file via an atomic rename, so concurrent readers never see a partial file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(n, k, reps, bucket, mixer="x"):
+        key = f"{int(n)}|{int(k)}|{int(reps)}|{int(bucket)}"
+        return key if mixer == "x" else f"{key}|{mixer}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _read_file(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def _merge(entries, key, entry):
+        """Keep whichever of the current and the new entry has the lower energy."""
+        current = entries.get(key)
+        if current is None or entry['energy'] < current.get('energy', np.inf):
+            entries[key] = entry
+
+    def _nearest(self, entries, n, k, reps, bucket, mixer="x"):
+        best, best_dist = None, None
+        for key, entry in entries.items():
+            fields = key.split("|")
+            en, ek, ereps, ebucket = (int(v) for v in fields[:4])
+            emixer = fields[4] if len(fields) > 4 else "x"
+            if ereps != reps or emixer != mixer:
+                continue
+            dist = abs(en - n) + abs(ek - k) + 0.5 * abs(ebucket - bucket)
+            if best_dist is None or dist < best_dist:
+                best, best_dist = entry, dist
+        return best
+
+    def initial_point(self, n, k, reps, user_risk, mixer="x"):
+        """
+        Warm-start parameters for a QAOA solve.
+
+        Args:
+            n: Number of qubits (assets)
+            k: Number of assets to select
+            reps: QAOA depth
+            user_risk: Risk tolerance in [0, 1]
+            mixer: "x" for the penalty formulation, "xy" for the Hamming-weight-preserving one
+
+        Returns:
+            (np.array of 2 * reps parameters, source) where source is "exact",
+            "nearest" or "interp", or (None, None) on a miss
+        """
+        bucket = risk_bucket(user_risk)
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(self.make_key(n, k, reps, bucket, mixer))
+            if entry is not None:
+                return join_point(entry['gammas'], entry['betas']), "exact"
+            entry = self._nearest(entries, n, k, reps, bucket, mixer)
+            if entry is not None:
+                return join_point(entry['gammas'], entry['betas']), "nearest"
+            if reps > 1:
+                entry = entries.get(self.make_key(n, k, reps - 1, bucket, mixer)) \
+                    or self._nearest(entries, n, k, reps - 1, bucket, mixer)
+                if entry is not None:
+                    return join_point(
+                        interpolate_angles(entry['gammas']), interpolate_angles(entry['betas'])
+                    ), "interp"
+        return None, None
+
+    def store(self, n, k, reps, user_risk, point, energy, mixer="x"):
+        """
+        Record optimized angles, keeping the lower-energy entry per key.
+
+        The file is re-read and merged before the atomic replace, so entries
+        written by other processes since the last load are not lost.
+
+        Args:
+            n, k, reps, user_risk, mixer: as in ``initial_point``
+            point: Optimal parameter vector from QAOA
+            energy: Optimal QAOA objective value
+        """
+        gammas, betas = split_point(point, reps)
+        key = self.make_key(n, k, reps, risk_bucket(user_risk), mixer)
+        entry = {
+            'gammas': gammas.tolist(),
+            'betas': betas.tolist(),
+            'energy': float(energy),
+            'updated': time.time(),
+        }
+        with self._lock:
+            entries = self._load()
+            for disk_key, disk_entry in self._read_file().items():
+                self._merge(entries, disk_key, disk_entry)
+            self._merge(entries, key, entry)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+
+    def clear(self):
+        """Drop every cached entry and remove the file."""
+        with self._lock:
+            self._entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+QAOA_ANGLE_CACHE = QaoaAngleCache(QAOA_CACHE_FILE)
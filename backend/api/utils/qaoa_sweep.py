@@ -0,0 +1,207 @@
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter, ParameterVector
+from qiskit_algorithms.optimizers import COBYLA
+
+from .qaoa_cache import QAOA_ANGLE_CACHE, join_point
+from .quantum_utils import (
+    QAOA_BACKEND, QAOA_SHOTS, QAOA_THREADS, QAOA_WARM_MIN_ITER, QAOA_WARM_RHOBEG,
+    build_qubo_matrices, make_qaoa_sampler, qubo_risk_weight
+)
+from .result_cache import RESULT_CACHE, quantize_risk
+
+# Largest universe swept with QAOA (energy tables hold 2**n entries)
+SWEEP_MAX_QUBITS = 20
+
+# States per block when tabulating energies
+_ENERGY_BLOCK = 1 << 15
+
+
+def risk_coefficients(mu, cov, user_risk, k):
+    """
+    Weights of the return, variance and cardinality terms in the QUBO that
+    ``build_qubo_matrices`` builds for ``user_risk``.
+
+    The energy is a * (-mu @ x) + b * (x' cov x) + c * (sum(x) - k)**2.
+
+    Args:
+        mu: pd.Series of expected returns
+        cov: pd.DataFrame covariance matrix
+        user_risk: Risk tolerance in [0, 1]
+        k: Number of assets to select
+
+    Returns:
+        (a, b, c)
+    """
+    lam = qubo_risk_weight(user_risk)
+    avg_vol = np.sqrt(np.mean(np.diag(np.asarray(cov, dtype=float))))
+    penalty = build_qubo_matrices(mu, cov, user_risk, k).penalty
+    return lam / avg_vol, lam * lam, penalty
+
+
+def risk_sweep_ansatz(mu, cov, k, reps):
+    """
+    QAOA circuit whose cost layer is parameterized by the term weights.
+
+    Binding (a, b, c) from ``risk_coefficients`` together with the angles
+    gives the QAOA circuit for any user_risk, so a sweep builds and
+    transpiles a single circuit.
+
+    Args:
+        mu: pd.Series of expected returns
+        cov: pd.DataFrame covariance matrix
+        k: Number of assets to select
+        reps: QAOA depth
+
+    Returns:
+        circuit: QuantumCircuit with measurements
+        weights: (a, b, c) Parameters
+        betas, gammas: ParameterVectors of length reps
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    cov = 0.5 * (cov + cov.T)
+    n = len(mu)
+
+    # Ising form with x = (1 - z) / 2 of each term, constants dropped
+    h_mu = 0.5 * mu
+    h_cov = -0.5 * cov.sum(axis=1)
+    h_pen = 0.5 * (2 * k - n)
+    j_cov = 0.5 * cov
+
+    a, b, c = Parameter("a"), Parameter("b"), Parameter("c")
+    betas = ParameterVector("beta", reps)
+    gammas = ParameterVector("gamma", reps)
+
+    circuit = QuantumCircuit(n)
+    circuit.h(range(n))
+    for layer in range(reps):
+        gamma = gammas[layer]
+        for i in range(n):
+            circuit.rz(2 * gamma * (a * h_mu[i] + b * h_cov[i] + c * h_pen), i)
+        for i in range(n):
+            for j in range(i + 1, n):
+                circuit.rzz(2 * gamma * (b * j_cov[i, j] + c * 0.5), i, j)
+        circuit.rx(2 * betas[layer], range(n))
+    circuit.measure_all()
+    return circuit, (a, b, c), betas, gammas
+
+
+def energy_components(mu, cov, k):
+    """
+    Return, variance and cardinality terms for every basis state.
+
+    Bit i of a state index is asset i, matching the Sampler's measurement keys.
+
+    Returns:
+        np.array (3, 2**n)
+    """
+    mu = np.asarray(mu, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    n = len(mu)
+    bits = np.arange(n)
+    out = np.empty((3, 1 << n))
+    for start in range(0, 1 << n, _ENERGY_BLOCK):
+        states = np.arange(start, min(start + _ENERGY_BLOCK, 1 << n))
+        x = ((states[:, None] >> bits) & 1).astype(float)
+        out[0, states] = -x @ mu
+        out[1, states] = np.einsum("ij,ij->i", x @ cov, x)
+        out[2, states] = (x.sum(axis=1) - k) ** 2
+    return out
+
+
+def _ramp_point(reps, energies):
+    """Linear-ramp angles with gamma scaled to the spread of the energies."""
+    ramp = (np.arange(reps) + 0.5) / reps
+    scale = max(float(np.std(energies)), 1e-12)
+    return join_point(0.75 * ramp / scale, 0.75 * (1.0 - ramp))
+
+
+def sweep_risk_grid(mu, cov, k, risk_grid, reps=2, maxiter=150, backend=QAOA_BACKEND, shots=QAOA_SHOTS,
+                    threads=QAOA_THREADS, seed=None, use_cache=True):
+    """
+    Solve the QAOA asset selection for a grid of user_risk values.
+
+    Grid points are rounded like ``build_and_solve_qubo`` rounds them and
+    solved in increasing order on one parameterized circuit. Each point
+    starts COBYLA from the angles of the previously solved point, with the
+    warm-start trust region and iteration budget of ``solve_qubo_qaoa``; the
+    first point starts from the angle cache or a linear ramp. With
+    ``use_cache``, points already in the result cache are not re-solved and
+    new selections are stored there, so a later ``build_and_solve_qubo``
+    call at any swept risk is a lookup.
+
+    Args:
+        mu: pd.Series of expected returns
+        cov: pd.DataFrame covariance matrix
+        k: Number of assets to select
+        risk_grid: Iterable of user_risk values in [0, 1]
+        reps: QAOA depth
+        maxiter: COBYLA iterations for a cold start
+        backend, shots, threads, seed: Simulator settings, see ``make_qaoa_sampler``
+        use_cache: Read and write the result and angle caches
+
+    Returns:
+        list of dicts with 'user_risk', 'selection_vec', 'selected_assets',
+        'energy', 'source' ("cache" or "qaoa") and 'evaluations'
+    """
+    n = len(mu)
+    if n > SWEEP_MAX_QUBITS:
+        raise ValueError(f"Risk sweep supports at most {SWEEP_MAX_QUBITS} assets, got {n}")
+    assets = list(mu.index)
+    grid = sorted({quantize_risk(r) for r in risk_grid})
+
+    circuit, weight_params, beta_params, gamma_params = risk_sweep_ansatz(mu, cov, k, reps)
+    params = list(circuit.parameters)
+    sampler = make_qaoa_sampler(backend, shots, threads, seed)
+    components = energy_components(mu, cov, k)
+
+    def distribution(weights, point):
+        values = dict(zip(weight_params, weights))
+        values.update(zip(beta_params, point[:reps]))
+        values.update(zip(gamma_params, point[reps:]))
+        quasi = sampler.run([circuit], [[values[p] for p in params]]).result().quasi_dists[0]
+        return np.fromiter(quasi.keys(), dtype=np.int64), np.fromiter(quasi.values(), dtype=float)
+
+    results, prev_point = [], None
+    for user_risk in grid:
+        key = RESULT_CACHE.make_key(mu, cov, k, user_risk, "qaoa")
+        cached = RESULT_CACHE.get(key) if use_cache else None
+        if cached is not None and np.sum(cached[0]) == k:
+            selection_vec, selected_assets = cached
+            results.append({'user_risk': user_risk, 'selection_vec': selection_vec,
+                            'selected_assets': selected_assets, 'energy': None,
+                            'source': "cache", 'evaluations': 0})
+            continue
+
+        weights = risk_coefficients(mu, cov, user_risk, k)
+        energies = np.asarray(weights) @ components
+
+        initial_point, rhobeg, budget = prev_point, QAOA_WARM_RHOBEG, max(QAOA_WARM_MIN_ITER, maxiter // 3)
+        if initial_point is None and use_cache:
+            initial_point, _ = QAOA_ANGLE_CACHE.initial_point(n, k, reps, user_risk)
+        if initial_point is None:
+            initial_point, rhobeg, budget = _ramp_point(reps, energies), 1.0, maxiter
+
+        def expectation(point):
+            states, probs = distribution(weights, point)
+            return float(probs @ energies[states])
+
+        opt = COBYLA(maxiter=budget, rhobeg=rhobeg).minimize(expectation, np.asarray(initial_point, dtype=float))
+        prev_point = np.asarray(opt.x, dtype=float)
+
+        # Lowest-energy measured state, as QAOA's best_measurement
+        states, _ = distribution(weights, prev_point)
+        best = int(states[np.argmin(energies[states])])
+        selection_vec = (best >> np.arange(n)) & 1
+        selected_assets = [assets[i] for i in np.flatnonzero(selection_vec)]
+
+        if use_cache:
+            # build_and_solve_qubo only caches feasible selections; do the same here
+            if selection_vec.sum() == k:
+                RESULT_CACHE.store(key, selection_vec, selected_assets)
+            QAOA_ANGLE_CACHE.store(n, k, reps, user_risk, prev_point, opt.fun)
+        results.append({'user_risk': user_risk, 'selection_vec': selection_vec,
+                        'selected_assets': selected_assets, 'energy': float(energies[best]),
+                        'source': "qaoa", 'evaluations': int(opt.nfev)})
+    return results
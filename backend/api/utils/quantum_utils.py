@@ -1,12 +1,239 @@
+import os
+import time
+import warnings
+from math import comb
+
 import numpy as np
 import pandas as pd
+from scipy import sparse
 
+from qiskit import QuantumCircuit
+from qiskit.circuit import Parameter
+from qiskit.circuit.library import RYGate, XXPlusYYGate
 from qiskit_optimization import QuadraticProgram
 from qiskit_optimization.converters import QuadraticProgramToQubo
-from qiskit_optimization.algorithms import MinimumEigenOptimizer
 from qiskit.primitives import Sampler
+from qiskit_aer.primitives import Sampler as AerSampler
 from qiskit_algorithms import QAOA
-from qiskit_algorithms.optimizers import COBYLA
+from qiskit_algorithms.optimizers import COBYLA, OptimizerResult
+
+from .qaoa_cache import QAOA_ANGLE_CACHE
+from .result_cache import RESULT_CACHE, quantize_risk
+
+# Penalty used by qiskit-optimization when a constraint has non-integer coefficients
+DEFAULT_QUBO_PENALTY = 1e5
+
+# Circuit simulator for QAOA: "aer" (multithreaded statevector) or "reference"
+QAOA_BACKENDS = ("aer", "reference")
+QAOA_BACKEND = os.environ.get('QAOA_BACKEND', 'aer')
+
+# Measurement shots per circuit evaluation (0 = exact probabilities)
+QAOA_SHOTS = int(os.environ.get('QAOA_SHOTS', 0)) or None
+
+# Aer simulator threads (0 = all cores)
+QAOA_THREADS = int(os.environ.get('QAOA_THREADS', 0))
+
+# QAOA mixers: "x" searches all bitstrings under the cardinality penalty,
+# "xy" keeps a Dicke state inside the k-asset subspace without a penalty
+QAOA_MIXERS = ("x", "xy")
+
+# COBYLA trust region and minimum iteration budget for warm-started QAOA
+QAOA_WARM_RHOBEG = 0.2
+QAOA_WARM_MIN_ITER = 30
+
+# Default time budget for build_and_solve_qubo in seconds (0 = none); only
+# QAOA can stop early, the classical solvers always run to completion
+QUBO_DEADLINE = float(os.environ.get('QUBO_DEADLINE', 0)) or None
+
+# Heuristic used when the requested solver fails or finds no feasible selection
+FALLBACK_SOLVER = "annealing"
+
+# Largest C(n, k) the exact enumeration solver will walk
+EXACT_MAX_SUBSETS = 20_000_000
+
+
+class QuboMatrices:
+    """
+    Cardinality-constrained portfolio QUBO in matrix form.
+
+    The energy of a binary vector x is
+
+        x @ linear + x @ quadratic @ x + penalty * (sum(x) - k)**2 + offset
+
+    The cardinality penalty is kept as a scalar instead of being folded into
+    ``quadratic``: it is a rank-one term, so solvers can evaluate it in O(n)
+    and ``quadratic`` stays as sparse as the covariance it came from.
+    """
+
+    def __init__(self, assets, linear, quadratic, k, penalty, offset=0.0, user_risk=None):
+        """
+        Args:
+            assets: list of asset names, one per variable
+            linear: np.array (n,) objective linear coefficients
+            quadratic: np.array or scipy.sparse matrix (n, n) objective quadratic coefficients
+            k: Number of assets to select
+            penalty: Weight of the (sum(x) - k)**2 cardinality penalty
+            offset: Objective constant
+            user_risk: Risk tolerance the problem was built for, if any
+        """
+        self.assets = list(assets)
+        self.linear = np.asarray(linear, dtype=float)
+        self.quadratic = quadratic
+        self.k = k
+        self.penalty = float(penalty)
+        self.offset = float(offset)
+        self.user_risk = user_risk
+
+    @property
+    def n(self):
+        return self.linear.shape[0]
+
+    def objective(self, x):
+        """
+        Objective value without the cardinality penalty.
+
+        Args:
+            x: np.array (n,) or (m, n) of binary vectors
+
+        Returns:
+            float or np.array (m,)
+        """
+        x = np.asarray(x, dtype=float)
+        quad = np.asarray(self.quadratic @ x.T).T
+        return (quad * x).sum(axis=-1) + x @ self.linear + self.offset
+
+    def energy(self, x):
+        """
+        Full QUBO energy, penalty included.
+
+        Args:
+            x: np.array (n,) or (m, n) of binary vectors
+
+        Returns:
+            float or np.array (m,)
+        """
+        x = np.asarray(x, dtype=float)
+        return self.objective(x) + self.penalty * (x.sum(axis=-1) - self.k) ** 2
+
+    def symmetric_quadratic(self):
+        """Dense symmetric (Q + Q.T) / 2, which gives the same energies as Q."""
+        quadratic = self.quadratic.toarray() if sparse.issparse(self.quadratic) else np.asarray(self.quadratic, dtype=float)
+        return 0.5 * (quadratic + quadratic.T)
+
+    def selection(self, x):
+        """Binary vector and selected asset names for a solution x."""
+        selection_vec = np.asarray(x).astype(int)
+        return selection_vec, [self.assets[i] for i in np.flatnonzero(selection_vec)]
+
+    def expanded(self):
+        """
+        Linear, quadratic and constant terms with the penalty expanded,
+        i.e. the plain QUBO ``x @ Q @ x + c @ x + offset``.
+
+        Returns:
+            linear: np.array (n,)
+            quadratic: dense np.array (n, n)
+            offset: float
+        """
+        quadratic = self.quadratic.toarray() if sparse.issparse(self.quadratic) else np.array(self.quadratic, dtype=float)
+        quadratic += self.penalty
+        linear = self.linear - 2.0 * self.penalty * self.k
+        return linear, quadratic, self.offset + self.penalty * self.k ** 2
+
+    def to_quadratic_program(self):
+        """
+        Unconstrained QuadraticProgram equivalent to ``QuadraticProgramToQubo``
+        applied to the constrained problem.
+
+        Returns:
+            QuadraticProgram
+        """
+        qp = QuadraticProgram()
+        for t in self.assets:
+            qp.binary_var(name=t)
+        linear, quadratic, offset = self.expanded()
+        qp.minimize(constant=offset, linear=linear, quadratic=quadratic)
+        return qp
+
+
+def qubo_risk_weight(user_risk):
+    """Adaptive lambda scaling: lower user_risk → higher penalty on variance."""
+    lam_min, lam_max = 0.1, 10
+    return lam_min + (1 - user_risk)**2 * (lam_max - lam_min)
+
+
+def auto_qubo_penalty(linear, quadratic, k):
+    """
+    Cardinality penalty chosen the way qiskit-optimization's
+    ``LinearEqualityToPenalty`` does: one plus the spread of the linear and
+    quadratic objective terms over binary inputs, or a fixed default when
+    the constraint is not integral.
+
+    Args:
+        linear: np.array (n,)
+        quadratic: np.array or scipy.sparse matrix (n, n)
+        k: Number of assets to select
+
+    Returns:
+        float
+    """
+    if not float(k).is_integer():
+        return DEFAULT_QUBO_PENALTY
+    # Spread of sum(q_ij x_i x_j) over binaries, with q_ij and q_ji combined
+    if sparse.issparse(quadratic):
+        combined = sparse.triu(quadratic + quadratic.T, k=1)
+        quad_spread = np.abs(combined.data).sum() + np.abs(quadratic.diagonal()).sum()
+    else:
+        quadratic = np.asarray(quadratic, dtype=float)
+        if np.array_equal(quadratic, quadratic.T):
+            # |q_ij + q_ji| = 2|q_ij| for i < j, so the spread is just sum |q|
+            quad_spread = np.abs(quadratic).sum()
+        else:
+            quad_spread = np.abs(np.triu(quadratic + quadratic.T, k=1)).sum() + np.abs(np.diag(quadratic)).sum()
+    return 1.0 + np.abs(linear).sum() + quad_spread
+
+
+def build_qubo_matrices(mu, cov_matrix, user_risk, k, assets=None, penalty=None, sparse_output=False):
+    """
+    Build the portfolio-selection QUBO as numpy (or scipy.sparse) matrices.
+
+    Same objective as ``build_qubo``: reward return and penalize variance,
+    with exactly k assets enforced by a quadratic penalty.
+
+    Args:
+        mu : pd.Series or np.array of expected returns
+        cov_matrix : pd.DataFrame, np.array or scipy.sparse covariance matrix
+        user_risk : float in [0,1], higher → more risk tolerance
+        k : int, number of assets to pick
+        assets : list of asset names (defaults to mu's index, or integers)
+        penalty : cardinality penalty weight (None picks it automatically)
+        sparse_output : return the quadratic term as a scipy.sparse CSR matrix
+
+    Returns:
+        QuboMatrices
+    """
+    if assets is None:
+        assets = list(mu.index) if hasattr(mu, "index") else list(range(len(mu)))
+    mu = np.asarray(mu, dtype=float)
+    if sparse.issparse(cov_matrix):
+        cov = sparse.csr_matrix(cov_matrix, dtype=float)
+        diag = cov.diagonal()
+    else:
+        cov = np.asarray(cov_matrix, dtype=float)
+        diag = np.diag(cov)
+
+    lam = qubo_risk_weight(user_risk)
+    # Scale the return term by lambda/avg_vol to normalize return vs risk
+    avg_vol = np.sqrt(np.mean(diag))
+    linear = -mu * (lam / avg_vol)
+    quadratic = cov * (lam * lam)
+    if sparse_output and not sparse.issparse(quadratic):
+        quadratic = sparse.csr_matrix(quadratic)
+
+    if penalty is None:
+        penalty = auto_qubo_penalty(linear, quadratic, k)
+    return QuboMatrices(assets, linear, quadratic, k, penalty, user_risk=user_risk)
+
 
 def build_qubo(mu, cov_matrix, user_risk, k, assets):
     """
@@ -18,88 +245,690 @@ def build_qubo(mu, cov_matrix, user_risk, k, assets):
         user_risk : float in [0,1], higher → more risk tolerance
         k : int, number of assets to pick
         assets : list of asset names
-        reps : QAOA repetitions
-        maxiter : classical optimizer max iterations
 
     Returns:
-        selection_vec : binary vector indicating selected assets
-        selected_assets : list of selected asset names
+        QuadraticProgram: unconstrained QUBO with the k-asset constraint as a penalty
     """
-    n = len(assets)
-    qp = QuadraticProgram()
+    return build_qubo_matrices(mu, cov_matrix, user_risk, k, assets).to_quadratic_program()
 
-    # Create binary variables for each asset
-    for t in assets:
-        qp.binary_var(name=t)
+def make_qaoa_sampler(backend=QAOA_BACKEND, shots=QAOA_SHOTS, threads=QAOA_THREADS, seed=None):
+    """
+    Sampler primitive that QAOA evaluates its circuits on.
+
+    Args:
+        backend: "aer" for the Aer statevector simulator with gate fusion,
+            "reference" for qiskit's single-threaded reference Sampler
+        shots: Shots per circuit, or None/0 for exact probabilities
+        threads: Aer OpenMP threads (0 = all cores), ignored by "reference"
+        seed: Shot-sampling seed, ignored when shots is None
+
+    Returns:
+        BaseSamplerV1
+    """
+    if backend not in QAOA_BACKENDS:
+        raise ValueError(f"Unknown QAOA backend: {backend}. Expected one of {QAOA_BACKENDS}")
+    shots = int(shots) if shots else None
+    run_options = {'shots': shots}
+    if shots is not None and seed is not None:
+        run_options['seed'] = seed
+
+    if backend == "reference":
+        return Sampler(options=run_options)
+
+    backend_options = {
+        'method': 'statevector',
+        'max_parallel_threads': int(threads),
+        'fusion_enable': True,
+    }
+    # qiskit-algorithms only accepts V1 primitives, which Aer marks as deprecated
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return AerSampler(backend_options=backend_options, run_options=run_options)
 
-    # Adaptive lambda scaling: lower user_risk → higher penalty on variance
-    lam_min, lam_max = 0.1, 10
-    lam = lam_min + (1 - user_risk)**2 * (lam_max - lam_min)
-    # Linear term: reward for return
-    linear = {assets[i]: -mu.iloc[i] for i in range(n)}
-
-    # Quadratic term: penalize variance
-    quadratic = {(assets[i], assets[j]): lam * cov_matrix.iloc[i, j] for i in range(n) for j in range(n)}
-
-    # Scale linear term by lambda/avg_vol to normalize return vs risk
-    avg_vol = np.sqrt(np.mean(np.diag(cov_matrix)))
-    linear_scaled = {asset: val * (lam / avg_vol) for asset, val in linear.items()}
-    quadratic_scaled = {key: val * lam for key, val in quadratic.items()}
-
-    qp.minimize(linear=linear_scaled, quadratic=quadratic_scaled)
-
-    # Constraint: select exactly k assets
-    qp.linear_constraint(
-        linear={t: 1 for t in assets},
-        sense="==",
-        rhs=k,
-        name="pick_k_assets"
-    )
 
-    # Convert to QUBO
-    qubo = QuadraticProgramToQubo().convert(qp)
+class _DeadlineExpired(Exception):
+    pass
+
+
+def deadline_cobyla(maxiter, rhobeg, deadline_at):
+    """
+    COBYLA as a minimizer callable that stops at a deadline.
+
+    Once ``time.monotonic()`` passes ``deadline_at`` the next objective
+    call aborts the search and the best point evaluated so far is returned,
+    so QAOA still samples it and reports the best measurement seen over all
+    evaluations. At least one evaluation always runs.
+
+    Args:
+        maxiter: COBYLA iteration budget
+        rhobeg: Initial trust region radius
+        deadline_at: ``time.monotonic()`` value to stop at
+
+    Returns:
+        callable ``minimize(fun, x0, jac=None, bounds=None) -> OptimizerResult``
+    """
+    def minimize(fun, x0, jac=None, bounds=None):
+        best = OptimizerResult()
+        best.x, best.fun, best.nfev = np.asarray(x0, dtype=float), np.inf, 0
 
-    return qubo
+        def timed(x):
+            if best.nfev > 0 and time.monotonic() >= deadline_at:
+                raise _DeadlineExpired
+            value = fun(x)
+            best.nfev += 1
+            if value < best.fun:
+                best.x, best.fun = np.array(x, dtype=float), float(value)
+            return value
 
-def solve_qubo_with_qaoa(qubo, assets, reps=2, maxiter=200):
-    optimizer = COBYLA(maxiter=maxiter)
+        try:
+            return COBYLA(maxiter=maxiter, rhobeg=rhobeg).minimize(timed, x0, bounds=bounds)
+        except _DeadlineExpired:
+            return best
+    return minimize
 
-    # Sampler does not take a seed
-    sampler = Sampler()  # exact expectation-based
 
-    # Initialize QAOA
-    qaoa = QAOA(sampler=sampler, reps=reps, optimizer=optimizer)
+def _split_cyclic_shift(circuit, n, k):
+    """Split & Cyclic Shift unitary SCS_{n,k} on the first n qubits (Bärtschi & Eidenbenz)."""
+    circuit.cx(n - 2, n - 1)
+    circuit.cry(2 * np.arccos(np.sqrt(1 / n)), n - 1, n - 2)
+    circuit.cx(n - 2, n - 1)
+    for l in range(2, k + 1):
+        circuit.cx(n - 1 - l, n - 1)
+        circuit.append(RYGate(2 * np.arccos(np.sqrt(l / n))).control(2), [n - 1, n - l, n - 1 - l])
+        circuit.cx(n - 1 - l, n - 1)
 
-    # Solve with MinimumEigenOptimizer
-    solver = MinimumEigenOptimizer(qaoa)
-    result = solver.solve(qubo)
 
-    selection_vec = np.array([int(result[x.name]) for x in qubo.variables])
+def dicke_state(n, k):
+    """
+    Circuit preparing the Dicke state |D(n, k)>, the uniform superposition
+    of all n-qubit basis states with exactly k ones, with O(n k) gates
+    ("Deterministic Preparation of Dicke States", Bärtschi & Eidenbenz, 2019).
+
+    Args:
+        n: Number of qubits
+        k: Hamming weight
+
+    Returns:
+        QuantumCircuit
+    """
+    circuit = QuantumCircuit(n)
+    if k <= 0:
+        return circuit
+    circuit.x(range(n - k, n))
+    for m in range(n, k, -1):
+        _split_cyclic_shift(circuit, m, k)
+    for m in range(k, 1, -1):
+        _split_cyclic_shift(circuit, m, m - 1)
+    return circuit
+
+
+def xy_ring_mixer(n):
+    """
+    XY mixer exp(-i beta sum (XX + YY) / 2) over the ring of neighbouring
+    qubits, applied edge by edge. Every factor preserves the Hamming weight.
+
+    Args:
+        n: Number of qubits
+
+    Returns:
+        QuantumCircuit with a single parameter beta
+    """
+    beta = Parameter("beta")
+    circuit = QuantumCircuit(n)
+    edges = [(i, i + 1) for i in range(n - 1)] + ([(n - 1, 0)] if n > 2 else [])
+    for i, j in edges:
+        circuit.append(XXPlusYYGate(2 * beta), [i, j])
+    return circuit
+
+
+def _best_with_weight(qubo, quasi_dist, k):
+    """Lowest-objective state of weight k with nonzero probability, as a binary vector."""
+    states = np.array([s for s, p in quasi_dist.items() if p > 0], dtype=np.int64)
+    x = (states[:, None] >> np.arange(qubo.get_num_vars())) & 1
+    x = x[x.sum(axis=1) == k]
+    if len(x) == 0:
+        raise ValueError(f"No measured state selects exactly {k} assets")
+    linear = qubo.objective.linear.to_array()
+    quadratic = qubo.objective.quadratic.to_array()
+    energies = x @ linear + np.einsum("ij,ij->i", x @ quadratic, x)
+    return x[np.argmin(energies)]
+
+
+def solve_qubo_with_qaoa(qubo, assets, reps=2, maxiter=200, initial_point=None, rhobeg=1.0, return_result=False,
+                         backend=QAOA_BACKEND, shots=QAOA_SHOTS, threads=QAOA_THREADS, seed=None, deadline_at=None,
+                         hamming_weight=None):
+    if deadline_at is None:
+        optimizer = COBYLA(maxiter=maxiter, rhobeg=rhobeg)
+    else:
+        optimizer = deadline_cobyla(maxiter, rhobeg, deadline_at)
+    sampler = make_qaoa_sampler(backend, shots, threads, seed)
+
+    # Initialize QAOA; with a Hamming weight the search stays among k-asset states
+    if hamming_weight is None:
+        qaoa = QAOA(sampler=sampler, reps=reps, optimizer=optimizer, initial_point=initial_point)
+    else:
+        n = qubo.get_num_vars()
+        qaoa = QAOA(sampler=sampler, reps=reps, optimizer=optimizer, initial_point=initial_point,
+                    initial_state=dicke_state(n, hamming_weight), mixer=xy_ring_mixer(n))
+
+    # The lowest-energy measured bitstring is the solution. MinimumEigenOptimizer
+    # would re-score every sampled bitstring through QuadraticProgram.objective,
+    # which costs more than the whole optimization loop on exact probabilities.
+    converter = QuadraticProgramToQubo()
+    operator, _ = converter.convert(qubo).to_ising()
+    result = qaoa.compute_minimum_eigenvalue(operator)
+
+    if hamming_weight is None:
+        # Bitstrings are little-endian: qubit 0 is the last character
+        bitstring = result.best_measurement['bitstring']
+        x = converter.interpret(np.array([int(b) for b in reversed(bitstring)]))
+    else:
+        # Without a penalty the best measurement may be a numerically-zero
+        # state of the wrong weight, so pick from the final k-asset states
+        x = _best_with_weight(qubo, result.eigenstate, hamming_weight)
+    selection_vec = np.asarray(x).astype(int)
     selected_assets = [assets[i] for i, v in enumerate(selection_vec) if v > 0]
 
+    if return_result:
+        return selection_vec, selected_assets, result
+    return selection_vec, selected_assets
+
+def solve_qubo_qaoa(qubo, reps=2, maxiter=150, use_cache=True, backend=QAOA_BACKEND, shots=QAOA_SHOTS,
+                    threads=QAOA_THREADS, seed=None, deadline=None, mixer="x", **_):
+    """
+    QAOA backend for the solver registry.
+
+    With ``use_cache``, COBYLA starts from cached angles of a similar
+    problem (see qaoa_cache) with a smaller trust region and a third of the
+    iteration budget, and the optimized angles are written back.
+
+    With ``mixer="xy"`` the cardinality penalty is dropped: QAOA starts in
+    the Dicke state over k-asset selections and mixes with an XY ring,
+    which never leaves that subspace.
+
+    Args:
+        qubo: QuboMatrices
+        reps: QAOA repetitions
+        maxiter: COBYLA iterations for a cold start
+        use_cache: Warm-start from and update the angle cache
+        backend, shots, threads, seed: Simulator settings, see ``make_qaoa_sampler``
+        deadline: Seconds after which COBYLA stops with its best point so far (None = no limit)
+        mixer: "x" (penalty formulation) or "xy" (Hamming-weight-preserving)
+
+    Returns:
+        selection_vec, selected_assets
+    """
+    if mixer not in QAOA_MIXERS:
+        raise ValueError(f"Unknown QAOA mixer: {mixer}. Expected one of {QAOA_MIXERS}")
+    if mixer == "xy":
+        trivial = _trivial_selection(qubo)
+        if trivial is not None:
+            return trivial
+        program = QuboMatrices(qubo.assets, qubo.linear, qubo.quadratic, qubo.k, 0.0).to_quadratic_program()
+        hamming_weight = int(qubo.k)
+    else:
+        program, hamming_weight = qubo.to_quadratic_program(), None
+
+    deadline_at = None if deadline is None else time.monotonic() + float(deadline)
+    user_risk = qubo.user_risk if qubo.user_risk is not None else 0.5
+    initial_point, rhobeg = None, 1.0
+    if use_cache:
+        initial_point, source = QAOA_ANGLE_CACHE.initial_point(qubo.n, qubo.k, reps, user_risk, mixer)
+        if initial_point is not None:
+            rhobeg = QAOA_WARM_RHOBEG
+            maxiter = max(QAOA_WARM_MIN_ITER, maxiter // 3)
+
+    selection_vec, selected_assets, result = solve_qubo_with_qaoa(
+        program, qubo.assets, reps=reps, maxiter=maxiter,
+        initial_point=initial_point, rhobeg=rhobeg, return_result=True,
+        backend=backend, shots=shots, threads=threads, seed=seed, deadline_at=deadline_at,
+        hamming_weight=hamming_weight
+    )
+    # Angles from a search cut short by the deadline would replace better ones
+    if use_cache and (deadline_at is None or time.monotonic() < deadline_at):
+        QAOA_ANGLE_CACHE.store(qubo.n, qubo.k, reps, user_risk, result.optimal_point, result.optimal_value, mixer)
     return selection_vec, selected_assets
 
-def build_and_solve_qubo(mu, cov, tickers, k, risk_tolerance):
+
+def _trivial_selection(qubo):
+    """Solution when k leaves no choice (k <= 0 or k >= n), else None."""
+    k = int(qubo.k)
+    if k <= 0:
+        return qubo.selection(np.zeros(qubo.n))
+    if k >= qubo.n:
+        return qubo.selection(np.ones(qubo.n))
+    return None
+
+
+def _random_subsets(rng, n_replicas, n, k):
+    """(n_replicas, n) boolean rows with exactly k True entries each."""
+    order = np.argsort(rng.random((n_replicas, n)), axis=1)
+    x = np.zeros((n_replicas, n), dtype=bool)
+    np.put_along_axis(x, order[:, :k], True, axis=1)
+    return x
+
+
+def _swap_descent(q, diag, fields, x, inside, outside, energy, max_iter=1000):
+    """
+    Steepest-descent swap moves on every replica until none improves.
+
+    Args are per-replica arrays as kept by ``solve_qubo_annealing``; they
+    are updated in place.
+    """
+    rows = np.arange(x.shape[0])
+    for _ in range(max_iter):
+        delta = (
+            (-fields[rows[:, None], inside] + diag[inside])[:, :, None]
+            + (fields[rows[:, None], outside] + diag[outside])[:, None, :]
+            - 2.0 * q[inside[:, :, None], outside[:, None, :]]
+        )
+        flat = delta.reshape(len(rows), -1)
+        best = np.argmin(flat, axis=1)
+        improving = np.flatnonzero(flat[rows, best] < -1e-12)
+        if improving.size == 0:
+            break
+        a, b = np.unravel_index(best[improving], delta.shape[1:])
+        i, j = inside[improving, a], outside[improving, b]
+        fields[improving] += 2.0 * (q[j] - q[i])
+        x[improving, i] = False
+        x[improving, j] = True
+        inside[improving, a] = j
+        outside[improving, b] = i
+        energy[improving] += flat[improving, best[improving]]
+
+
+def solve_qubo_annealing(qubo, n_replicas=32, n_sweeps=None, seed=123, t_ratio=1e-3, **_):
+    """
+    Simulated annealing over many replicas at once.
+
+    Every replica starts from a random k-subset and only proposes swaps
+    (one selected asset out, one unselected asset in), so the cardinality
+    constraint holds throughout and the penalty never enters. Local fields
+    F = linear + 2 Q x are kept per replica so each proposal costs O(1) and
+    each accepted swap O(n), all vectorized across replicas. The final
+    states are polished with steepest-descent swaps.
+
+    Args:
+        qubo: QuboMatrices
+        n_replicas: Number of independent chains
+        n_sweeps: Proposals per replica, in units of n (None picks a default)
+        seed: Random seed
+        t_ratio: Final over initial temperature of the geometric schedule
+
+    Returns:
+        selection_vec, selected_assets
+    """
+    trivial = _trivial_selection(qubo)
+    if trivial is not None:
+        return trivial
+
+    rng = np.random.default_rng(seed)
+    n, k = qubo.n, int(qubo.k)
+    q = qubo.symmetric_quadratic()
+    diag = np.diag(q)
+    x = _random_subsets(rng, n_replicas, n, k)
+    # Positions of selected and unselected assets per replica
+    order = np.argsort(~x, axis=1, kind="stable")
+    inside, outside = order[:, :k].copy(), order[:, k:].copy()
+    fields = qubo.linear + 2.0 * (x @ q)
+    energy = qubo.objective(x)
+    rows = np.arange(n_replicas)
+
+    def swap_delta(i, j):
+        return (-fields[rows, i] + diag[i]) + (fields[rows, j] - 2.0 * q[i, j] + diag[j])
+
+    # Initial temperature from the spread of random swap moves
+    a = rng.integers(0, k, n_replicas)
+    b = rng.integers(0, n - k, n_replicas)
+    t_start = max(float(np.std(swap_delta(inside[rows, a], outside[rows, b]))), 1e-12)
+    n_steps = int((n_sweeps or max(4, 2000 // n)) * n)
+    temperatures = t_start * t_ratio ** (np.arange(n_steps) / max(n_steps - 1, 1))
+
+    slots_in = rng.integers(0, k, (n_steps, n_replicas))
+    slots_out = rng.integers(0, n - k, (n_steps, n_replicas))
+    log_u = np.log(rng.random((n_steps, n_replicas)))
+    for step in range(n_steps):
+        a, b = slots_in[step], slots_out[step]
+        i, j = inside[rows, a], outside[rows, b]
+        delta = swap_delta(i, j)
+        accept = np.flatnonzero(-delta / temperatures[step] >= log_u[step])
+        if accept.size == 0:
+            continue
+        ia, ja = i[accept], j[accept]
+        fields[accept] += 2.0 * (q[ja] - q[ia])
+        x[accept, ia] = False
+        x[accept, ja] = True
+        inside[accept, a[accept]] = ja
+        outside[accept, b[accept]] = ia
+        energy[accept] += delta[accept]
+
+    _swap_descent(q, diag, fields, x, inside, outside, energy)
+    return qubo.selection(x[np.argmin(energy)])
+
+
+def solve_qubo_tabu(qubo, n_iterations=None, tenure=None, n_restarts=4, seed=123, **_):
+    """
+    Tabu search over k-subsets with best-improvement swap moves.
+
+    Each iteration scores every (out, in) swap at once from the local
+    fields, takes the best move that is not tabu (or that beats the best
+    energy found so far), and forbids moving the two swapped assets back
+    for ``tenure`` iterations.
+
+    Args:
+        qubo: QuboMatrices
+        n_iterations: Iterations per restart (None picks a default)
+        tenure: Tabu tenure in iterations (None picks a default)
+        n_restarts: Independent random starting subsets
+        seed: Random seed
+
+    Returns:
+        selection_vec, selected_assets
+    """
+    trivial = _trivial_selection(qubo)
+    if trivial is not None:
+        return trivial
+
+    rng = np.random.default_rng(seed)
+    n, k = qubo.n, int(qubo.k)
+    q = qubo.symmetric_quadratic()
+    diag = np.diag(q)
+    n_iterations = n_iterations or max(200, 2 * n)
+    tenure = tenure or max(2, min(k, n - k) // 2)
+
+    best_x, best_energy = None, np.inf
+    for x in _random_subsets(rng, n_restarts, n, k):
+        fields = qubo.linear + 2.0 * (q @ x)
+        energy = float(qubo.objective(x))
+        tabu_until = np.zeros(n, dtype=int)
+        run_best, stale = energy, 0
+        if energy < best_energy:
+            best_x, best_energy = x.copy(), energy
+        for it in range(n_iterations):
+            inside, outside = np.flatnonzero(x), np.flatnonzero(~x)
+            delta = (
+                (-fields[inside] + diag[inside])[:, None]
+                + (fields[outside] + diag[outside])[None, :]
+                - 2.0 * q[np.ix_(inside, outside)]
+            )
+            allowed = (tabu_until[inside] <= it)[:, None] & (tabu_until[outside] <= it)[None, :]
+            # Aspiration: a tabu move is fine if it yields a new global best
+            allowed |= energy + delta < best_energy - 1e-12
+            if not allowed.any():
+                continue
+            delta = np.where(allowed, delta, np.inf)
+            a, b = np.unravel_index(np.argmin(delta), delta.shape)
+            i, j = inside[a], outside[b]
+            fields += 2.0 * (q[j] - q[i])
+            x[i], x[j] = False, True
+            energy += float(delta[a, b])
+            tabu_until[[i, j]] = it + 1 + tenure
+            if energy < best_energy - 1e-12:
+                best_x, best_energy = x.copy(), energy
+            if energy < run_best - 1e-12:
+                run_best, stale = energy, 0
+            else:
+                stale += 1
+                if stale > max(100, n // 2):
+                    break
+
+    return qubo.selection(best_x)
+
+
+def revolving_door_swaps(n, k):
+    """
+    All k-subsets of range(n) in revolving-door order (Knuth, TAOCP 7.2.1.3,
+    Algorithm R), encoded as the single swap between consecutive subsets.
+
+    Uses the recursive definition R(n, k) = R(n-1, k) followed by
+    R(n-1, k-1) reversed with n-1 added, built with array concatenation.
+
+    Args:
+        n: Universe size
+        k: Subset size
+
+    Returns:
+        first: np.array (k,) of the first subset
+        outs, ins: np.array (C(n, k) - 1,) of the element leaving and the
+            element entering at each step
+    """
+    empty = np.zeros(0, dtype=np.int16)
+    cache = {}
+
+    def build(m, j):
+        if (m, j) in cache:
+            return cache[(m, j)]
+        if j == 0 or j == m:
+            subset = tuple(range(j))
+            result = (empty, empty, subset, subset)
+        else:
+            outs_a, ins_a, first_a, last_a = build(m - 1, j)
+            outs_b, ins_b, first_b, last_b = build(m - 1, j - 1)
+            # Step from the end of the first half to the end of R(m-1, j-1) + {m-1}
+            start_b = set(last_b) | {m - 1}
+            (leave,), (enter,) = set(last_a) - start_b, start_b - set(last_a)
+            result = (
+                np.concatenate([outs_a, np.array([leave], dtype=np.int16), ins_b[::-1]]),
+                np.concatenate([ins_a, np.array([enter], dtype=np.int16), outs_b[::-1]]),
+                first_a,
+                first_b + (m - 1,),
+            )
+        cache[(m, j)] = result
+        return result
+
+    outs, ins, first, _ = build(n, k)
+    return np.array(first, dtype=int), outs, ins
+
+
+def exact_qubo_minimum(qubo, n_blocks=None):
+    """
+    Exact minimum over all k-subsets by revolving-door enumeration.
+
+    Consecutive subsets differ by one swap, so each energy follows from
+    the previous one in O(1) from the local fields F = linear + 2 Q x, and
+    updating F costs O(n). The swap sequence is cut into blocks whose
+    starting subsets are recovered from toggle counts; all blocks then
+    advance in lockstep so each step is one vectorized update, and only
+    the best position is turned back into a subset at the end.
+
+    Args:
+        qubo: QuboMatrices
+        n_blocks: Number of lockstep blocks (None picks a default)
+
+    Returns:
+        x: np.array (n,) of the optimal selection
+        energy: float, its QUBO objective (the penalty is zero)
+    """
+    n, k = qubo.n, int(qubo.k)
+    if k <= 0 or k >= n:
+        x = np.full(n, k >= n, dtype=bool) if k > 0 else np.zeros(n, dtype=bool)
+        return x.astype(int), float(qubo.energy(x))
+    if comb(n, k) > EXACT_MAX_SUBSETS:
+        raise ValueError(f"C({n}, {k}) = {comb(n, k)} subsets exceeds EXACT_MAX_SUBSETS")
+
+    q = qubo.symmetric_quadratic()
+    first, outs, ins = revolving_door_swaps(n, k)
+    outs, ins = outs.astype(np.intp), ins.astype(np.intp)
+    n_swaps = len(outs)
+    n_blocks = max(1, min(n_blocks or 4096, n_swaps // 64 or 1))
+    # Equal-length, possibly overlapping blocks keep every step a full-width update
+    length = -(-n_swaps // n_blocks)
+    starts = np.linspace(0, n_swaps - length, n_blocks).astype(int)
+
+    def state_at(positions):
+        """Subsets after the given numbers of swaps, from toggle parities."""
+        toggles = np.zeros((len(positions), n), dtype=np.int64)
+        for r, p in enumerate(positions):
+            toggles[r] = np.bincount(outs[:p], minlength=n) + np.bincount(ins[:p], minlength=n)
+        x = np.zeros((len(positions), n), dtype=bool)
+        x[:, first] = True
+        return x ^ (toggles % 2).astype(bool)
+
+    # Block start subsets: cumulative toggle counts at the block starts
+    segment = np.searchsorted(starts, np.arange(n_swaps), side="right") - 1
+    toggles = (
+        np.bincount(segment * n + outs, minlength=n_blocks * n)
+        + np.bincount(segment * n + ins, minlength=n_blocks * n)
+    ).reshape(n_blocks, n)
+    x = np.zeros((n_blocks, n), dtype=bool)
+    x[:, first] = True
+    x ^= ((np.cumsum(toggles, axis=0) - toggles) % 2).astype(bool)
+
+    energy = qubo.objective(x)
+    fields = qubo.linear + 2.0 * (x @ q)
+    # Swap-only part of each energy change, and the field change per (out, in) pair
+    swap_cost = np.diag(q)[outs] + np.diag(q)[ins] - 2.0 * q[outs, ins]
+    field_step = 2.0 * (q[None, :, :] - q[:, None, :]) if n <= 64 else None
+    rows = np.arange(n_blocks)
+    best_energy, best_step = energy.copy(), np.zeros(n_blocks, dtype=int)
+    for step in range(length):
+        t = starts + step
+        i, j = outs[t], ins[t]
+        energy += fields[rows, j] - fields[rows, i] + swap_cost[t]
+        fields += field_step[i, j] if field_step is not None else 2.0 * (q[j] - q[i])
+        improved = energy < best_energy
+        best_energy[improved] = energy[improved]
+        best_step[improved] = step + 1
+
+    b = int(np.argmin(best_energy))
+    x_best = state_at([starts[b] + best_step[b]])[0]
+    return x_best.astype(int), float(best_energy[b])
+
+
+def solve_qubo_exact(qubo, **_):
+    """
+    Exact enumeration backend for the solver registry, see ``exact_qubo_minimum``.
+
+    Returns:
+        selection_vec, selected_assets
+    """
+    x, _ = exact_qubo_minimum(qubo)
+    return qubo.selection(x)
+
+
+def qubo_optimality_gap(qubo, selection_vec):
+    """
+    Compare a solution (e.g. from QAOA) against the exact optimum.
+
+    Args:
+        qubo: QuboMatrices
+        selection_vec: Binary selection to check
+
+    Returns:
+        dict with 'energy', 'optimal_energy', 'gap', 'feasible', 'optimal'
+        and the optimal 'optimal_selection'
+    """
+    selection_vec = np.asarray(selection_vec, dtype=float)
+    x, optimal_energy = exact_qubo_minimum(qubo)
+    energy = float(qubo.energy(selection_vec))
+    gap = energy - optimal_energy
+    return {
+        'energy': energy,
+        'optimal_energy': optimal_energy,
+        'gap': gap,
+        'feasible': bool(selection_vec.sum() == qubo.k),
+        'optimal': bool(gap <= 1e-9 * max(1.0, abs(optimal_energy))),
+        'optimal_selection': [qubo.assets[i] for i in np.flatnonzero(x)],
+    }
+
+
+# Classical and quantum QUBO backends, all taking a QuboMatrices and
+# returning (selection_vec, selected_assets)
+def solve_qubo_qaoa_xy(qubo, **kwargs):
+    """QAOA in the k-asset subspace (Dicke state, XY ring mixer), see ``solve_qubo_qaoa``."""
+    return solve_qubo_qaoa(qubo, mixer="xy", **kwargs)
+
+
+QUBO_SOLVERS = {
+    "qaoa": solve_qubo_qaoa,
+    "qaoa-xy": solve_qubo_qaoa_xy,
+    "annealing": solve_qubo_annealing,
+    "tabu": solve_qubo_tabu,
+    "exact": solve_qubo_exact,
+}
+
+
+def solve_qubo(qubo, solver="qaoa", **kwargs):
+    """
+    Solve a QuboMatrices problem with a backend from QUBO_SOLVERS.
+
+    Args:
+        qubo: QuboMatrices
+        solver: Backend name
+        kwargs: Backend-specific options
+
+    Returns:
+        selection_vec, selected_assets
+    """
+    if solver not in QUBO_SOLVERS:
+        raise ValueError(f"Unknown QUBO solver: {solver}. Expected one of {sorted(QUBO_SOLVERS)}")
+    return QUBO_SOLVERS[solver](qubo, **kwargs)
+
+
+def build_and_solve_qubo(mu, cov, tickers, k, risk_tolerance, solver="qaoa", use_cache=True, deadline=QUBO_DEADLINE,
+                         return_info=False):
     """
     Perform quantum portfolio optimization
     
+    The requested solver gets ``deadline`` seconds (QAOA stops with the best
+    measurement seen so far). The deadline is not passed to the classical
+    solvers: tabu, annealing (also the fallback) and exact run to completion,
+    which the first two do in milliseconds and exact within EXACT_MAX_SUBSETS.
+    If the requested solver raises or returns a selection that does not hold
+    exactly k assets, the FALLBACK_SOLVER heuristic answers instead.
+    Only complete, feasible answers of the requested solver are cached.
+
     Args:
         mu: Expected returns
         cov: Covariance matrix
         tickers: List of tickers
-        risk_tolerance: Risk tolerance parameter (0-1)
+        risk_tolerance: Risk tolerance parameter (0-1), rounded to result_cache.RISK_STEP
         k: Number of assets to select
+        solver: QUBO backend, one of QUBO_SOLVERS
+        use_cache: Serve and record the selection through the result cache
+        deadline: Time budget in seconds (None = no limit)
+        return_info: Also return a dict with 'solver_path' ("cache", the solver
+            name, or "fallback:<heuristic>"), 'deadline_hit' and 'elapsed_s'
         
     Returns:
         weights: Optimized portfolio weights
         selected_tickers: Selected tickers
     """
+    start = time.monotonic()
+    # Quantize so that every request served from one cache entry solves the same QUBO
+    risk_tolerance = quantize_risk(risk_tolerance)
+
+    def finish(selected_vec, selected_assets, path):
+        elapsed = time.monotonic() - start
+        if not return_info:
+            return selected_vec, selected_assets
+        info = {
+            'solver_path': path,
+            'deadline_hit': deadline is not None and elapsed >= deadline,
+            'elapsed_s': elapsed,
+        }
+        return selected_vec, selected_assets, info
+
+    key = RESULT_CACHE.make_key(mu, cov, k, risk_tolerance, solver) if use_cache else None
+    if key is not None:
+        cached = RESULT_CACHE.get(key)
+        # A selection of the wrong size must go through the fallback, not be served as a hit
+        if cached is not None and np.sum(cached[0]) == k:
+            return finish(*cached, "cache")
+
+    # Build QUBO
+    qubo = build_qubo_matrices(mu, cov, risk_tolerance, k, tickers)
     try:
-        # Build QUBO
-        qubo = build_qubo(mu, cov, risk_tolerance, k, tickers)
-        # Solve with QAOA
-        selected_vec, selected_assets = solve_qubo_with_qaoa(qubo, tickers, reps=2, maxiter=150)
-        
-        return selected_vec, selected_assets
+        # Solve with the requested backend (QAOA by default)
+        selected_vec, selected_assets = solve_qubo(qubo, solver, deadline=deadline)
     except Exception as e:
         print(f"Error in quantum optimization: {e}")
+    else:
+        if np.sum(selected_vec) == k:
+            if key is not None and not (deadline is not None and time.monotonic() - start >= deadline):
+                RESULT_CACHE.store(key, selected_vec, selected_assets)
+            return finish(selected_vec, selected_assets, solver)
+        print(f"{solver} returned {int(np.sum(selected_vec))} assets instead of {k}")
+
+    selected_vec, selected_assets = solve_qubo(qubo, FALLBACK_SOLVER)
+    return finish(selected_vec, selected_assets, f"fallback:{FALLBACK_SOLVER}")
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .scenario_cache import array_fingerprint
+
+# JSON-lines file holding QUBO selections across restarts (empty = memory only)
+RESULT_CACHE_FILE = os.environ.get('RESULT_CACHE_FILE', 'qubo_results.jsonl')
+
+# In-memory LRU size and entries kept when the file is compacted
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 1024))
+RESULT_CACHE_MAX_DISK_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_DISK_ENTRIES', 20000))
+
+# Granularity of user_risk; requests within one step share a result
+RISK_STEP = 0.01
+
+
+def quantize_risk(user_risk, step=RISK_STEP):
+    """Round user_risk to the cache grid, clipped to [0, 1]."""
+    return round(min(1.0, max(0.0, round(float(user_risk) / step) * step)), 6)
+
+
+class QuboResultCache:
+    """
+    Two-tier cache of QUBO selections.
+
+    Entries are keyed by (mu/cov fingerprint, asset set, k, quantized
+    user_risk, solver). A bounded in-memory LRU answers repeated requests;
+    misses fall through to an append-only JSON-lines file that survives
+    restarts. A store appends one line instead of rewriting the file, and a
+    miss reads only the lines appended since the last read, so selections
+    stored by other processes are found too. Once the file holds twice
+    ``max_disk_entries`` lines it is compacted to the newest entries.
+
+    A new mu/cov fingerprint never matches old entries, so stale results
+    are simply not found; ``clear`` drops them outright after a data
+    refresh. mu includes the sentiment tilt, which is recomputed at start
+    from the current headlines: persisted entries hit after a restart
+    while the headlines are unchanged, and are ignored once they move.
+    """
+
+    def __init__(self, max_entries, path=None, max_disk_entries=RESULT_CACHE_MAX_DISK_ENTRIES):
+        self.max_entries = int(max_entries)
+        self.path = path or None
+        self.max_disk_entries = int(max_disk_entries)
+        self._memory = OrderedDict()
+        self._disk = {}
+        self._offset = 0
+        self._lines = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(mu, cov, k, user_risk, solver):
+        assets = hashlib.sha1("|".join(str(a) for a in mu.index).encode()).hexdigest()
+        return "/".join([
+            array_fingerprint(mu, cov),
+            assets,
+            str(int(k)),
+            f"{quantize_risk(user_risk):.6f}",
+            str(solver),
+        ])
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _record(self, key, value):
+        # Re-inserting moves the key to the end, so compaction keeps the newest
+        self._disk.pop(key, None)
+        self._disk[key] = value
+
+    def _sync(self):
+        """Read the lines appended to the file since the last read."""
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._offset:
+                    # Compacted or removed by another process: read it again
+                    self._disk, self._offset, self._lines = {}, 0, 0
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        # A line still being written by another process is left for later
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.splitlines():
+            self._lines += 1
+            try:
+                entry = json.loads(line)
+                key = entry['key']
+                value = (np.asarray(entry['selection'], dtype=int), list(entry['assets']))
+            except (ValueError, KeyError, TypeError):
+                continue
+            self._record(key, value)
+
+    def _compact(self):
+        """Rewrite the file with the newest ``max_disk_entries`` entries."""
+        while len(self._disk) > self.max_disk_entries:
+            self._disk.pop(next(iter(self._disk)))
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            for key, (selection_vec, selected_assets) in self._disk.items():
+                f.write(json.dumps({'key': key, 'selection': selection_vec.tolist(),
+                                    'assets': selected_assets}) + "\n")
+        os.replace(tmp, self.path)
+        self._offset = os.path.getsize(self.path)
+        self._lines = len(self._disk)
+
+    def get(self, key):
+        """
+        Cached (selection_vec, selected_assets) for a key, or None.
+
+        Args:
+            key: From ``make_key``
+
+        Returns:
+            (np.array, list) or None
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value[0].copy(), list(value[1])
+
+            self._sync()
+            value = self._disk.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._remember(key, value)
+            self.disk_hits += 1
+            return value[0].copy(), list(value[1])
+
+    def store(self, key, selection_vec, selected_assets):
+        """
+        Record a selection in both tiers.
+
+        Args:
+            key: From ``make_key``
+            selection_vec: Binary np.array over the universe
+            selected_assets: Selected tickers
+        """
+        value = (np.asarray(selection_vec, dtype=int).copy(), list(selected_assets))
+        with self._lock:
+            self._remember(key, value)
+            if self.path is None:
+                return
+            self._sync()
+            self._record(key, value)
+            line = json.dumps({'key': key, 'selection': value[0].tolist(), 'assets': value[1]}) + "\n"
+            # One small append per store; the line is read back by the next _sync
+            with open(self.path, "a") as f:
+                f.write(line)
+            if self._lines > 2 * self.max_disk_entries:
+                self._sync()
+                self._compact()
+
+    def clear(self):
+        """Drop every cached selection in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            self._disk, self._offset, self._lines = {}, 0, 0
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self):
+        """Entry counts and hit/miss counters."""
+        with self._lock:
+            return {
+                'entries': len(self._memory),
+                'disk_entries': len(self._disk),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+
+RESULT_CACHE = QuboResultCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_FILE, RESULT_CACHE_MAX_DISK_ENTRIES)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .simulation_utils import draw_asset_scenarios, bootstrap_asset_scenarios, check_return_model, DEFAULT_BLOCK_LENGTH
+
+# Memory cap for cached scenario matrices (MB)
+SCENARIO_CACHE_MAX_MB = float(os.environ.get('SCENARIO_CACHE_MAX_MB', 256))
+
+
+def array_fingerprint(*arrays):
+    """
+    Stable hash of the shapes and float64 contents of one or more arrays.
+
+    Args:
+        arrays: np.array / pd.Series / pd.DataFrame values
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.sha1()
+    for arr in arrays:
+        values = np.ascontiguousarray(np.asarray(arr, dtype=np.float64))
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class ScenarioCache:
+    """
+    LRU cache of correlated asset-level return scenarios.
+
+    Entries are keyed by (mu/cov fingerprint, asset set, horizon, n_sims,
+    seed, sampling mode, return model) and hold an (n_sims, n_assets) matrix of horizon
+    returns. Any portfolio over those assets evaluates its simulated returns
+    as a single matrix-vector product over the cached draws. Least recently
+    used entries are evicted once the total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(mu, cov, horizon_days, n_sims, seed, sampling="mc", model="gaussian", history=None,
+                 block_length=DEFAULT_BLOCK_LENGTH):
+        assets = tuple(str(a) for a in mu.index)
+        key = (array_fingerprint(mu, cov), assets, int(horizon_days), int(n_sims), seed, sampling)
+        if model == "bootstrap":
+            key += (model, array_fingerprint(history[list(mu.index)]), int(block_length))
+        return key
+
+    def get(self, mu, cov, horizon_days=252, n_sims=5000, seed=123, sampling="mc", model="gaussian",
+            history=None, block_length=DEFAULT_BLOCK_LENGTH):
+        """
+        Scenario matrix for the given universe, drawing it on a miss.
+
+        Args:
+            mu: pd.Series of annualized expected returns
+            cov: pd.DataFrame annualized covariance matrix
+            horizon_days: Horizon in trading days
+            n_sims: Number of scenarios
+            seed: Random seed
+            sampling: Sampling mode, see simulation_utils.SAMPLING_MODES
+            model: "gaussian" or "bootstrap"
+            history: pd.DataFrame of daily asset returns (bootstrap model)
+            block_length: Bootstrap block length in trading days
+
+        Returns:
+            pd.DataFrame (n_sims, assets) of horizon returns, read-only
+        """
+        check_return_model(model, sampling, history)
+        key = self.make_key(mu, cov, horizon_days, n_sims, seed, sampling, model, history, block_length)
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pd.DataFrame(values, columns=list(mu.index), copy=False)
+            self.misses += 1
+
+        h = max(1, int(horizon_days))
+        if model == "bootstrap":
+            values = bootstrap_asset_scenarios(
+                history[list(mu.index)].values, h, n_sims, seed=seed, block_length=block_length
+            )
+        else:
+            values = draw_asset_scenarios(
+                mu.values * (h / 252.0), cov.values * (h / 252.0), n_sims, seed=seed, sampling=sampling
+            )
+        values.setflags(write=False)
+        self._store(key, values)
+        return pd.DataFrame(values, columns=list(mu.index), copy=False)
+
+    def _store(self, key, values):
+        if values.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = values
+            self._bytes += values.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self):
+        """Drop every cached scenario matrix."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Entry count, bytes held and hit/miss counters."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+SCENARIO_CACHE = ScenarioCache(SCENARIO_CACHE_MAX_MB * 1024 * 1024)
+
+
+def get_scenarios(mu, cov, horizon_days=252, n_sims=5000, seed=123, sampling="mc", model="gaussian",
+                  history=None, block_length=DEFAULT_BLOCK_LENGTH):
+    """Shared-cache lookup, see ``ScenarioCache.get``."""
+    return SCENARIO_CACHE.get(mu, cov, horizon_days, n_sims, seed, sampling, model, history, block_length)
@@ -0,0 +1,646 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import norm, qmc
+
+from .drawdown_utils import path_drawdown_stats
+from .quantile_sketch import LogHistogramSketch
+
+TRADING_DAYS = 252
+
+# Paths per chunk when a run is streamed or spread over worker processes
+DEFAULT_CHUNK_SIZE = 256
+
+# Paths per independently seeded block of a streamed run. Chunks hold whole
+# blocks, so results depend on neither the chunk size nor the worker count.
+SEED_BLOCK_SIZE = 64
+
+# Scenarios per independently seeded block in monte_carlo_portfolio
+PORTFOLIO_BLOCK_SIZE = 2500
+
+# Sampling modes: plain Monte Carlo, antithetic pairs, scrambled Sobol
+# replicates, and plain draws with a control-variate correction on the sum
+# of each draw's underlying normals
+SAMPLING_MODES = ("mc", "antithetic", "sobol", "control")
+
+# Minimum number of independent batches used for standard errors
+MIN_BATCHES = 16
+
+# Return models: multivariate Gaussian, or circular block bootstrap of history
+RETURN_MODELS = ("gaussian", "bootstrap")
+
+# Default bootstrap block length in trading days (about a month)
+DEFAULT_BLOCK_LENGTH = 20
+
+_process_pool = None
+_process_pool_workers = None
+
+
+def portfolio_daily_moments(weights, returns, cov_matrix):
+    """
+    Daily mean and volatility of a fixed-weight portfolio.
+
+    Args:
+        weights: Portfolio weights
+        returns: Expected annual returns for each asset
+        cov_matrix: Annual covariance matrix of returns
+
+    Returns:
+        daily_mu: Mean daily portfolio return
+        daily_vol: Daily portfolio volatility
+    """
+    w = np.asarray(weights, dtype=float)
+    daily_mu = float(np.asarray(returns, dtype=float) @ w) / TRADING_DAYS
+    daily_var = float(w @ np.asarray(cov_matrix, dtype=float) @ w) / TRADING_DAYS
+    return daily_mu, float(np.sqrt(max(daily_var, 0.0)))
+
+
+def check_return_model(model, sampling="mc", history=None):
+    """
+    Validate a (return model, sampling mode) combination.
+
+    The block bootstrap resamples history as-is, so it needs the history and
+    only supports plain sampling (no closed-form control mean exists).
+    """
+    if model not in RETURN_MODELS:
+        raise ValueError(f"Unknown return model: {model}. Expected one of {RETURN_MODELS}")
+    if model == "bootstrap":
+        if history is None:
+            raise ValueError("Block bootstrap needs historical daily returns")
+        if sampling != "mc":
+            raise ValueError("Block bootstrap only supports 'mc' sampling")
+
+
+def standard_normal_draws(rng, n, d, sampling="mc"):
+    """
+    Standard normal draws for one independent batch.
+
+    Args:
+        rng: np.random.Generator
+        n: Number of points
+        d: Dimension of each point
+        sampling: One of SAMPLING_MODES. "antithetic" returns (z, -z) pairs
+            on consecutive rows; "sobol" returns one scrambled Sobol'
+            replicate mapped through the normal inverse CDF.
+
+    Returns:
+        np.array of shape (n, d)
+    """
+    if sampling in ("mc", "control"):
+        return rng.standard_normal((n, d))
+    if sampling == "antithetic":
+        half = rng.standard_normal((-(-n // 2), d))
+        z = np.empty((2 * half.shape[0], d))
+        z[0::2] = half
+        z[1::2] = -half
+        return z[:n]
+    if sampling == "sobol":
+        # Scrambled Sobol' points are only balanced in runs of 2^m, so n is
+        # covered by one independent replicate per binary digit of n
+        n = int(n)
+        u = np.concatenate([
+            qmc.Sobol(d, scramble=True, seed=rng).random_base2(m)
+            for m in reversed(range(n.bit_length())) if n >> m & 1
+        ]) if n > 0 else np.empty((0, d))
+        return norm.ppf(np.clip(u, 1e-12, 1 - 1e-12))
+    raise ValueError(f"Unknown sampling mode: {sampling}. Expected one of {SAMPLING_MODES}")
+
+
+def batch_sizes(n, min_batches=MIN_BATCHES, max_batch=None, sampling="mc"):
+    """
+    Split n samples into contiguous, near-equal independent batches.
+
+    For Sobol sampling every batch but the last holds the same power of two
+    points, and the last one also takes the remainder, so nearly all points
+    come from full 2^m replicates.
+
+    Args:
+        n: Number of samples
+        min_batches: Minimum number of batches (capped at n)
+        max_batch: Optional maximum batch size
+        sampling: One of SAMPLING_MODES
+
+    Returns:
+        np.array of batch sizes summing to n
+    """
+    if sampling == "sobol" and n >= min_batches:
+        m = int(np.log2(n // min_batches))
+        if max_batch is not None:
+            m = min(m, int(np.log2(max_batch)))
+        sizes = np.full(n >> m, 1 << m)
+        sizes[-1] += n - sizes.sum()
+        return sizes
+    n_batches = min_batches if max_batch is None else max(min_batches, -(-n // max_batch))
+    n_batches = max(1, min(n, n_batches))
+    return np.diff(np.linspace(0, n, n_batches + 1).astype(int))
+
+
+def estimate_with_stderr(samples, sizes, estimator, control=None, control_mean=None):
+    """
+    Point estimate with a batch-means standard error.
+
+    The estimator is evaluated on the full sample and on each independent
+    batch; the spread of the batch estimates gives the standard error. When
+    a control with known mean is supplied, the estimate is corrected by
+    ``beta * (mean(control) - control_mean)`` with beta fitted across batches.
+
+    Args:
+        samples: np.array of samples, batches contiguous
+        sizes: Batch sizes (see ``batch_sizes``)
+        estimator: Function mapping a sample array to a scalar
+        control: Optional control samples aligned with ``samples``
+        control_mean: Known expectation of the control
+
+    Returns:
+        estimate (float), standard error (float or None with < 2 batches)
+    """
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    estimate = float(estimator(samples))
+    per_batch = np.array([estimator(samples[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    if len(per_batch) < 2:
+        return estimate, None
+
+    if control is not None:
+        control_batches = np.array([np.mean(control[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+        spread = np.var(control_batches, ddof=1)
+        beta = np.cov(per_batch, control_batches, ddof=1)[0, 1] / spread if spread > 0 else 0.0
+        estimate -= beta * (np.mean(control) - control_mean)
+        per_batch = per_batch - beta * (control_batches - control_mean)
+
+    return estimate, float(np.std(per_batch, ddof=1) / np.sqrt(len(per_batch)))
+
+
+def covariance_factor(cov):
+    """
+    Matrix L with L @ L.T == cov, falling back to an eigen square root
+    when cov is only positive semi-definite.
+    """
+    cov = np.asarray(cov, dtype=float)
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        vals, vecs = np.linalg.eigh(cov)
+        return vecs * np.sqrt(np.clip(vals, 0.0, None))
+
+
+def simulate_portfolio_returns(rng, daily_mu, daily_vol, n_steps, n_paths, sampling="mc"):
+    """
+    Draw daily portfolio returns for a batch of paths in one call.
+
+    The correlated asset shocks only enter the portfolio through ``w @ r``, and
+    a linear combination of jointly normal returns is itself normal with mean
+    ``w @ mu`` and variance ``w @ cov @ w``. Drawing that scalar directly is
+    equivalent in distribution to drawing the full asset vector and projecting
+    it, at a fraction of the cost.
+
+    Args:
+        rng: np.random.Generator
+        daily_mu: Mean daily portfolio return
+        daily_vol: Daily portfolio volatility
+        n_steps: Number of simulated days per path
+        n_paths: Number of paths
+        sampling: One of SAMPLING_MODES; for antithetic and Sobol sampling
+            each path is one n_steps-dimensional point
+
+    Returns:
+        np.array of shape (n_steps, n_paths)
+    """
+    if sampling in ("mc", "control"):
+        shocks = rng.standard_normal((n_steps, n_paths))
+    else:
+        shocks = np.ascontiguousarray(standard_normal_draws(rng, n_paths, n_steps, sampling).T)
+    shocks *= daily_vol
+    shocks += daily_mu
+    return shocks
+
+
+def bootstrap_block_starts(rng, n_obs, n_days, n_paths, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Uniform block start indices for a circular block bootstrap, drawn in bulk.
+
+    Args:
+        rng: np.random.Generator
+        n_obs: Length of the historical sample
+        n_days: Number of days to cover per path
+        n_paths: Number of paths
+        block_length: Days per block
+
+    Returns:
+        np.array of shape (n_blocks, n_paths)
+    """
+    n_blocks = -(-n_days // block_length)
+    return rng.integers(0, n_obs, size=(n_blocks, n_paths))
+
+
+def circular_history(history, block_length):
+    """History with its first ``block_length - 1`` rows appended, so blocks may wrap."""
+    history = np.asarray(history, dtype=float)
+    return np.concatenate([history, history[:block_length - 1]])
+
+
+def bootstrap_portfolio_returns(rng, history, n_steps, n_paths, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Daily portfolio returns resampled from history in contiguous blocks.
+
+    Block starts are drawn for every path at once and the blocks are
+    gathered with one fancy-indexing pass over the contiguous history.
+
+    Args:
+        rng: np.random.Generator
+        history: np.array (n_obs,) of historical daily portfolio returns
+        n_steps: Number of simulated days per path
+        n_paths: Number of paths
+        block_length: Days per block
+
+    Returns:
+        np.array of shape (n_steps, n_paths)
+    """
+    history = np.asarray(history, dtype=float)
+    block_length = max(1, min(int(block_length), history.shape[0]))
+    starts = bootstrap_block_starts(rng, history.shape[0], n_steps, n_paths, block_length)
+    # (n_blocks, block_length, n_paths) -> consecutive days of consecutive blocks
+    idx = starts[:, None, :] + np.arange(block_length)[None, :, None]
+    idx = idx.reshape(-1, n_paths)[:n_steps]
+    return circular_history(history, block_length)[idx]
+
+
+def bootstrap_horizon_returns(rng, history, horizon_days, n_sims, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Compounded per-asset horizon returns from a circular block bootstrap.
+
+    A block's compounded return is a difference of cumulative log returns,
+    so only one prefix-sum lookup per block is needed, not one per day.
+
+    Args:
+        rng: np.random.Generator
+        history: np.array (n_obs, n_assets) of historical daily asset returns
+        horizon_days: Horizon in trading days
+        n_sims: Number of scenarios
+        block_length: Days per block
+
+    Returns:
+        np.array of shape (n_sims, n_assets)
+    """
+    history = np.asarray(history, dtype=float)
+    if history.ndim == 1:
+        history = history[:, None]
+    block_length = max(1, min(int(block_length), history.shape[0]))
+    starts = bootstrap_block_starts(rng, history.shape[0], horizon_days, n_sims, block_length)
+    lengths = np.full(starts.shape[0], block_length)
+    lengths[-1] = horizon_days - block_length * (starts.shape[0] - 1)
+
+    cumulative = np.zeros((history.shape[0] + block_length, history.shape[1]))
+    np.cumsum(np.log1p(circular_history(history, block_length)), axis=0, out=cumulative[1:])
+    log_growth = (cumulative[starts + lengths[:, None]] - cumulative[starts]).sum(axis=0)
+    return np.expm1(log_growth)
+
+
+def build_value_paths(daily_returns, initial_investment):
+    """
+    Compound daily returns into portfolio value paths.
+
+    Args:
+        daily_returns: np.array of shape (n_steps, n_paths)
+        initial_investment: Starting portfolio value
+
+    Returns:
+        np.array of shape (n_steps + 1, n_paths), first row is the initial value
+    """
+    n_steps, n_paths = daily_returns.shape
+    paths = np.empty((n_steps + 1, n_paths))
+    paths[0] = initial_investment
+    np.cumprod(1.0 + daily_returns, axis=0, out=paths[1:])
+    paths[1:] *= initial_investment
+    return paths
+
+
+def plan_chunks(num_simulations, chunk_size, seed=None, n_samples=10):
+    """
+    Split a simulation run into chunks of independently seeded path blocks.
+
+    Paths are seeded in blocks of SEED_BLOCK_SIZE, each with its own
+    SeedSequence child, and chunk_size is rounded up to whole blocks. A
+    block's draws therefore depend only on the seed and its position in the
+    run, not on the chunk size or on how chunks are scheduled.
+
+    Args:
+        num_simulations: Total number of paths
+        chunk_size: Maximum number of paths per chunk, rounded up to a
+            multiple of SEED_BLOCK_SIZE
+        seed: Root seed (None for fresh entropy)
+        n_samples: Number of paths kept whole for visualization
+
+    Returns:
+        list of (block_seeds, n_paths, sample_offsets) tuples
+    """
+    blocks_per_chunk = max(1, -(-int(chunk_size) // SEED_BLOCK_SIZE))
+    chunk_size = blocks_per_chunk * SEED_BLOCK_SIZE
+    n_blocks = -(-num_simulations // SEED_BLOCK_SIZE)
+    sample_seed, *block_seeds = np.random.SeedSequence(seed).spawn(n_blocks + 1)
+    sample_indices = np.sort(np.random.default_rng(sample_seed).choice(
+        num_simulations, min(n_samples, num_simulations), replace=False
+    ))
+
+    chunks = []
+    for c, start in enumerate(range(0, num_simulations, chunk_size)):
+        n_paths = min(chunk_size, num_simulations - start)
+        in_chunk = sample_indices[(sample_indices >= start) & (sample_indices < start + n_paths)]
+        seeds = block_seeds[c * blocks_per_chunk:(c + 1) * blocks_per_chunk]
+        chunks.append((seeds, n_paths, in_chunk - start))
+    return chunks
+
+
+def simulate_path_chunk(block_seeds, n_paths, sample_offsets, daily_mu, daily_vol,
+                        n_steps, initial_investment, sketch_grid, sampling="mc",
+                        history=None, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Simulate one chunk of paths and reduce it to mergeable accumulators.
+
+    Args:
+        block_seeds: SeedSequences of the chunk's SEED_BLOCK_SIZE path blocks
+        n_paths: Number of paths in the chunk
+        sample_offsets: Chunk-local indices of paths kept for visualization
+        daily_mu, daily_vol: Daily portfolio mean and volatility
+        n_steps: Number of timesteps including day 0
+        initial_investment: Starting portfolio value
+        sketch_grid: (lower, width, n_bins) of the shared quantile sketch
+        sampling: One of SAMPLING_MODES; each block is an independent batch
+        history: Optional historical daily portfolio returns; when given, paths
+            are block-bootstrapped from it instead of drawn from the Gaussian
+        block_length: Bootstrap block length in days
+
+    Returns:
+        dict of partial results, see ``merge_chunk_results``
+    """
+    sizes = np.diff(np.minimum(np.arange(len(block_seeds) + 1) * SEED_BLOCK_SIZE, n_paths))
+    daily_returns = np.empty((n_steps - 1, n_paths))
+    start = 0
+    for block_seed, size in zip(block_seeds, sizes):
+        rng = np.random.default_rng(block_seed)
+        if history is not None:
+            block = bootstrap_portfolio_returns(rng, history, n_steps - 1, size, block_length)
+        else:
+            block = simulate_portfolio_returns(rng, daily_mu, daily_vol, n_steps - 1, size, sampling)
+        daily_returns[:, start:start + size] = block
+        start += size
+    paths = build_value_paths(daily_returns, initial_investment)
+    sketch = LogHistogramSketch(*sketch_grid)
+    return_sums = daily_returns.sum(axis=0)
+    sketch.update(paths)
+    max_drawdowns, recovery_times, underwater_periods = path_drawdown_stats(paths)
+    return {
+        'final_values': paths[-1].copy(),
+        'max_drawdowns': max_drawdowns,
+        'recovery_times': recovery_times,
+        'underwater_periods': underwater_periods,
+        'return_sums': return_sums,
+        'sample_paths': paths[:, sample_offsets].copy(),
+        'batch_sizes': sizes,
+        'sketch': sketch,
+    }
+
+
+def merge_chunk_results(parts):
+    """
+    Combine partial chunk results, in chunk order, into one accumulator.
+
+    Args:
+        parts: iterable of dicts returned by ``simulate_path_chunk``
+
+    Returns:
+        dict with concatenated per-path arrays and a merged sketch
+    """
+    merged = None
+    for part in parts:
+        if merged is None:
+            merged = {key: [value] for key, value in part.items() if key != 'sketch'}
+            merged['sketch'] = part['sketch']
+            continue
+        for key, value in part.items():
+            if key == 'sketch':
+                merged['sketch'].merge(value)
+            else:
+                merged[key].append(value)
+
+    for key in ('final_values', 'max_drawdowns', 'recovery_times', 'underwater_periods', 'return_sums',
+                'batch_sizes'):
+        merged[key] = np.concatenate(merged[key])
+    merged['sample_paths'] = np.concatenate(merged['sample_paths'], axis=1)
+    return merged
+
+
+def simulate_chunk_group(chunks, daily_mu, daily_vol, n_steps, initial_investment, sketch_grid,
+                         sampling="mc", history=None, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Simulate a contiguous run of chunks and merge them locally.
+
+    This is the unit of work sent to a worker process, so only one merged
+    sketch per group crosses the process boundary.
+    """
+    return merge_chunk_results(
+        simulate_path_chunk(block_seeds, n_paths, offsets, daily_mu, daily_vol,
+                            n_steps, initial_investment, sketch_grid, sampling, history, block_length)
+        for block_seeds, n_paths, offsets in chunks
+    )
+
+
+def get_process_pool(n_workers):
+    """
+    Shared process pool, created on first use and rebuilt if the size changes.
+
+    Uses the spawn start method so workers never inherit the web server's
+    threads or locks.
+    """
+    global _process_pool, _process_pool_workers
+    if _process_pool is None or _process_pool_workers != n_workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _process_pool_workers = n_workers
+    return _process_pool
+
+
+def run_chunk_groups(func, groups, n_workers, *args):
+    """
+    Apply ``func(group, *args)`` to every group, in a process pool when
+    ``n_workers > 1``. Results come back in group order either way.
+    """
+    if n_workers is None or n_workers <= 1 or len(groups) <= 1:
+        return [func(group, *args) for group in groups]
+    pool = get_process_pool(n_workers)
+    return list(pool.map(func, groups, *[[arg] * len(groups) for arg in args]))
+
+
+def split_groups(items, n_workers):
+    """Split items into contiguous groups, a few per worker for load balancing."""
+    n_groups = min(len(items), max(1, (n_workers or 1) * 4))
+    bounds = np.linspace(0, len(items), n_groups + 1).astype(int)
+    return [items[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def simulate_paths_streaming(daily_mu, daily_vol, n_steps, num_simulations,
+                             initial_investment, chunk_size=DEFAULT_CHUNK_SIZE, seed=None,
+                             n_bins=256, n_workers=None, sampling="mc",
+                             history=None, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Simulate paths chunk by chunk, keeping only online accumulators.
+
+    Peak memory is O(n_steps * chunk_size) regardless of num_simulations:
+    final values and per-path drawdown stats are O(num_simulations), and
+    per-timestep percentile bands live in a fixed-size quantile sketch.
+
+    With ``n_workers > 1`` contiguous groups of chunks run in a process pool.
+    Path blocks are seeded individually and merged in order, and sketch
+    counts add exactly, so the result is identical for any number of workers
+    and any chunk size.
+    With ``history`` the paths are block-bootstrapped (see
+    ``bootstrap_portfolio_returns``); daily_mu/daily_vol then only size
+    the sketch grid.
+
+    Returns:
+        dict, see ``merge_chunk_results``
+    """
+    sketch = LogHistogramSketch.for_gaussian_paths(
+        initial_investment, daily_mu, daily_vol, n_steps, n_bins=n_bins
+    )
+    sketch_grid = (sketch.lower, sketch.width, sketch.n_bins)
+    chunks = plan_chunks(num_simulations, chunk_size, seed)
+
+    if n_workers is None or n_workers <= 1:
+        return simulate_chunk_group(
+            chunks, daily_mu, daily_vol, n_steps, initial_investment, sketch_grid, sampling,
+            history, block_length
+        )
+    parts = run_chunk_groups(
+        simulate_chunk_group, split_groups(chunks, n_workers), n_workers,
+        daily_mu, daily_vol, n_steps, initial_investment, sketch_grid, sampling, history, block_length
+    )
+    return merge_chunk_results(parts)
+
+
+def simulate_returns_dense(daily_mu, daily_vol, n_steps, n_paths, seed=None, sampling="mc",
+                           history=None, block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Draw all paths' daily returns in memory, split into independent batches.
+
+    Plain and control-variate sampling draw everything from one generator
+    (any contiguous split is a valid batch); antithetic and Sobol sampling
+    draw each batch from its own SeedSequence child. With ``history`` the
+    returns are block-bootstrapped from it with plain sampling.
+
+    Returns:
+        daily_returns: np.array of shape (n_steps, n_paths)
+        sizes: Batch sizes along the path axis
+        rng: Generator for any follow-up sampling
+    """
+    sizes = batch_sizes(n_paths, sampling=sampling)
+    if history is not None:
+        rng = np.random.default_rng(seed)
+        return bootstrap_portfolio_returns(rng, history, n_steps, n_paths, block_length), sizes, rng
+    if sampling in ("mc", "control"):
+        rng = np.random.default_rng(seed)
+        return simulate_portfolio_returns(rng, daily_mu, daily_vol, n_steps, n_paths), sizes, rng
+
+    rng_seed, *batch_seeds = np.random.SeedSequence(seed).spawn(len(sizes) + 1)
+    daily_returns = np.empty((n_steps, n_paths))
+    start = 0
+    for batch_seed, size in zip(batch_seeds, sizes):
+        daily_returns[:, start:start + size] = simulate_portfolio_returns(
+            np.random.default_rng(batch_seed), daily_mu, daily_vol, n_steps, size, sampling
+        )
+        start += size
+    return daily_returns, sizes, np.random.default_rng(rng_seed)
+
+
+def scenario_batch_sizes(n_sims, block_size=PORTFOLIO_BLOCK_SIZE, sampling="mc"):
+    """Independently seeded block sizes used by ``draw_asset_scenarios``."""
+    return batch_sizes(n_sims, max_batch=block_size, sampling=sampling)
+
+
+def draw_scenario_block(block, mean, factor, sampling="mc"):
+    """
+    Draw one group of multivariate-normal asset scenarios.
+
+    Args:
+        block: list of (block_seed, n_sims) pairs, one per independent batch
+        mean: np.array of asset means over the horizon
+        factor: Covariance factor L over the horizon (see ``covariance_factor``)
+        sampling: One of SAMPLING_MODES
+
+    Returns:
+        np.array of shape (sum of n_sims, n_assets)
+    """
+    return np.vstack([
+        mean + standard_normal_draws(np.random.default_rng(block_seed), n_sims, len(mean), sampling) @ factor.T
+        for block_seed, n_sims in block
+    ])
+
+
+def draw_asset_scenarios(mean, cov, n_sims, seed=None, n_workers=None, sampling="mc"):
+    """
+    Draw multivariate-normal asset scenarios in independently seeded blocks.
+
+    Each block (see ``scenario_batch_sizes``) has its own SeedSequence
+    child and doubles as a batch for standard errors, so for a fixed seed
+    the scenario matrix does not depend on ``n_workers``.
+
+    Args:
+        mean: Asset means over the horizon
+        cov: Asset covariance over the horizon
+        n_sims: Number of scenarios
+        seed: Root seed
+        n_workers: Number of worker processes (None or 1 runs in-process)
+        sampling: One of SAMPLING_MODES
+
+    Returns:
+        np.array of shape (n_sims, n_assets)
+    """
+    mean = np.asarray(mean, dtype=float)
+    factor = covariance_factor(cov)
+    sizes = scenario_batch_sizes(n_sims, sampling=sampling)
+    blocks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    parts = run_chunk_groups(
+        draw_scenario_block, split_groups(blocks, n_workers), n_workers, mean, factor, sampling
+    )
+    return np.vstack(parts)
+
+
+def bootstrap_scenario_block(block, history, horizon_days, block_length=DEFAULT_BLOCK_LENGTH):
+    """Bootstrap counterpart of ``draw_scenario_block``."""
+    return np.vstack([
+        bootstrap_horizon_returns(np.random.default_rng(block_seed), history, horizon_days, n_sims, block_length)
+        for block_seed, n_sims in block
+    ])
+
+
+def bootstrap_asset_scenarios(history, horizon_days, n_sims, seed=None, n_workers=None,
+                              block_length=DEFAULT_BLOCK_LENGTH):
+    """
+    Block-bootstrapped asset horizon returns in independently seeded blocks.
+
+    Same blocking and seeding as ``draw_asset_scenarios``. Scenarios are
+    compounded per asset, so ``scenarios @ w`` is the buy-and-hold portfolio
+    return over the horizon.
+
+    Args:
+        history: np.array (n_obs, n_assets) of historical daily asset returns
+        horizon_days: Horizon in trading days
+        n_sims: Number of scenarios
+        seed: Root seed
+        n_workers: Number of worker processes (None or 1 runs in-process)
+        block_length: Days per block
+
+    Returns:
+        np.array of shape (n_sims, n_assets)
+    """
+    history = np.ascontiguousarray(history, dtype=float)
+    sizes = scenario_batch_sizes(n_sims)
+    blocks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+    parts = run_chunk_groups(
+        bootstrap_scenario_block, split_groups(blocks, n_workers), n_workers,
+        history, max(1, int(horizon_days)), block_length
+    )
+    return np.vstack(parts)
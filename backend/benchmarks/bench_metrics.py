@@ -0,0 +1,167 @@
+"""
+Offline timing benchmarks for the numerical core of api/utils/metrics_utils.py.
+
+Synthetic daily returns are generated for every asset count, so nothing hits
+the network or the joblib store. Results can be written as JSON and compared
+against a stored baseline; the exit code is 1 when any case regressed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics --json results.json
+    python -m benchmarks.bench_metrics --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_metrics --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from api.utils import metrics_utils
+from api.utils.metrics_utils import (
+    monte_carlo_simulation, monte_carlo_portfolio, get_weights_from_selection_quantum,
+    project_portfolio, compute_sortino_ratio
+)
+
+
+def synthetic_returns(n_assets, n_days=2520, seed=0):
+    """Daily returns from a 3-factor model with idiosyncratic noise."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"A{i}" for i in range(n_assets)]
+    loadings = rng.normal(0.0, 0.008, size=(n_assets, 3))
+    factors = rng.standard_normal((n_days, 3))
+    noise = rng.standard_normal((n_days, n_assets)) * rng.uniform(0.005, 0.015, n_assets)
+    drift = rng.uniform(0.0, 0.0006, n_assets)
+    return pd.DataFrame(drift + factors @ loadings.T + noise, columns=tickers)
+
+
+def time_call(func, repeat):
+    """Median and best wall time of ``repeat`` calls, after one warm-up call."""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+
+def case_key(name, params):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in sorted(params.items())) + "]"
+
+
+def build_cases(asset_counts, horizons, sims_list):
+    """(name, params, callable) for every benchmarked function and size."""
+    cases = []
+    for n_assets in asset_counts:
+        returns = synthetic_returns(n_assets)
+        tickers = list(returns.columns)
+        mu = returns.mean() * 252
+        cov = returns.cov() * 252
+        weights = np.full(n_assets, 1.0 / n_assets)
+        selection = np.zeros(n_assets)
+        selection[: max(2, n_assets // 2)] = 1
+
+        cases.append(("get_weights_from_selection_quantum", {"assets": n_assets},
+                      lambda mu=mu, cov=cov, s=selection, t=tickers:
+                      get_weights_from_selection_quantum(s, mu, cov, t, user_risk=0.5)))
+        cases.append(("compute_sortino_ratio", {"assets": n_assets},
+                      lambda w=weights, r=returns, t=tickers: compute_sortino_ratio(w, r, t)))
+        cases.append(("project_portfolio", {"assets": n_assets},
+                      lambda w=pd.Series(weights, index=tickers), mu=mu, cov=cov:
+                      project_portfolio(w, mu, cov, 0.5, 10000, 5)))
+
+        for horizon in horizons:
+            for n_sims in sims_list:
+                params = {"assets": n_assets, "horizon": horizon, "sims": n_sims}
+                cases.append(("monte_carlo_simulation", params,
+                              lambda w=weights, mu=mu, cov=cov, h=horizon, n=n_sims:
+                              monte_carlo_simulation(w, mu.values, cov.values, 10000, h, n, seed=0)))
+                cases.append(("monte_carlo_portfolio", params,
+                              lambda w=weights, mu=mu, cov=cov, h=horizon, n=n_sims:
+                              monte_carlo_portfolio(mu, cov, w, h, n, seed=0)))
+    return cases
+
+
+def run(asset_counts, horizons, sims_list, repeat):
+    rows = []
+    # Portfolio beta is looked up on Yahoo Finance; keep the benchmark offline
+    with mock.patch.object(metrics_utils, "calculate_portfolio_beta", return_value=1.0):
+        for name, params, func in build_cases(asset_counts, horizons, sims_list):
+            median_s, min_s = time_call(func, repeat)
+            rows.append({"key": case_key(name, params), "name": name, "params": params,
+                         "median_s": median_s, "min_s": min_s})
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "results": rows,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Flag cases whose median time grew by more than ``tolerance`` (a fraction).
+
+    Returns:
+        list of dicts with key, baseline, current, ratio and regressed
+    """
+    previous = {row["key"]: row for row in baseline["results"]}
+    comparison = []
+    for row in report["results"]:
+        base = previous.get(row["key"])
+        if base is None:
+            continue
+        ratio = row["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        comparison.append({"key": row["key"], "baseline_s": base["median_s"], "current_s": row["median_s"],
+                           "ratio": ratio, "regressed": ratio > 1.0 + tolerance})
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--horizons", type=int, nargs="+", default=[252, 1260])
+    parser.add_argument("--sims", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--save-baseline", help="Write the report as a new baseline")
+    parser.add_argument("--baseline", help="Compare against this baseline report")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown as a fraction of the baseline median")
+    args = parser.parse_args()
+
+    report = run(args.assets, args.horizons, args.sims, args.repeat)
+
+    print(f"{'case':<72}{'median ms':>11}{'min ms':>10}")
+    for row in report["results"]:
+        print(f"{row['key']:<72}{1000 * row['median_s']:>11.2f}{1000 * row['min_s']:>10.2f}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+        print(f"\n{'case':<72}{'ratio':>8}")
+        for row in report["comparison"]:
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['key']:<72}{row['ratio']:>8.2f}{flag}")
+        status = int(any(row["regressed"] for row in report["comparison"]))
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
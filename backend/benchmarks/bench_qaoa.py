@@ -0,0 +1,113 @@
+"""
+Wall time and solution quality of QAOA on the available circuit simulators.
+
+Every configuration solves the same random cardinality-constrained QUBOs
+from the same initial angles. "legacy" is the previous code path: the
+reference Sampler driven through MinimumEigenOptimizer. Quality is the
+gap of the returned selection to the exact optimum.
+
+Usage (from backend/):
+    python -m benchmarks.bench_qaoa
+    python -m benchmarks.bench_qaoa --qubits 8 12 16 --shots 1024 --json out.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from qiskit_algorithms import QAOA
+from qiskit_algorithms.optimizers import COBYLA
+from qiskit_optimization.algorithms import MinimumEigenOptimizer
+
+from api.utils.quantum_utils import (
+    build_qubo_matrices, make_qaoa_sampler, qubo_optimality_gap, solve_qubo_with_qaoa
+)
+
+
+def make_problem(n_assets, seed=0, user_risk=0.5):
+    """Factor-model mu/cov turned into a QUBO selecting n_assets // 3 assets."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"A{i}" for i in range(n_assets)]
+    mu = pd.Series(rng.uniform(0.02, 0.3, n_assets), index=tickers)
+    factors = rng.normal(size=(n_assets, 3)) * 0.2
+    cov = pd.DataFrame(factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n_assets)),
+                       index=tickers, columns=tickers)
+    return build_qubo_matrices(mu, cov, user_risk, max(1, n_assets // 3), tickers)
+
+
+def solve_legacy(qp, assets, reps, maxiter, initial_point):
+    qaoa = QAOA(sampler=make_qaoa_sampler("reference", shots=None), reps=reps,
+                optimizer=COBYLA(maxiter=maxiter), initial_point=initial_point)
+    result = MinimumEigenOptimizer(qaoa).solve(qp)
+    return np.array([int(result[x.name]) for x in qp.variables])
+
+
+def configurations(shots, threads):
+    configs = [
+        ("legacy", None),
+        ("reference", dict(backend="reference", shots=None)),
+        ("aer", dict(backend="aer", shots=None, threads=threads)),
+    ]
+    for n_shots in shots:
+        configs.append((f"aer-{n_shots}", dict(backend="aer", shots=n_shots, threads=threads, seed=0)))
+    return configs
+
+
+def run(qubit_counts, n_problems, reps, maxiter, shots, threads, max_legacy):
+    initial_point = np.full(2 * reps, 0.1)
+    rows = []
+    for n in qubit_counts:
+        problems = [make_problem(n, seed) for seed in range(n_problems)]
+        for name, options in configurations(shots, threads):
+            if name == "legacy" and n > max_legacy:
+                continue
+            elapsed, gaps, optimal = 0.0, [], 0
+            for qubo in problems:
+                qp = qubo.to_quadratic_program()
+                start = time.perf_counter()
+                if options is None:
+                    x = solve_legacy(qp, qubo.assets, reps, maxiter, initial_point)
+                else:
+                    x, _ = solve_qubo_with_qaoa(qp, qubo.assets, reps=reps, maxiter=maxiter,
+                                                initial_point=initial_point, **options)
+                elapsed += time.perf_counter() - start
+                gap = qubo_optimality_gap(qubo, x)
+                gaps.append(gap["gap"])
+                optimal += int(gap["optimal"])
+            rows.append({
+                "qubits": n,
+                "config": name,
+                "seconds": elapsed / n_problems,
+                "mean_gap": float(np.mean(gaps)),
+                "optimal": optimal,
+                "problems": n_problems,
+            })
+            print(f"{n:>6}{name:>12}{rows[-1]['seconds']:>10.2f}{rows[-1]['mean_gap']:>12.4f}"
+                  f"{optimal:>6}/{n_problems}", flush=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[6, 8, 10, 12, 14])
+    parser.add_argument("--problems", type=int, default=3)
+    parser.add_argument("--reps", type=int, default=2)
+    parser.add_argument("--maxiter", type=int, default=60)
+    parser.add_argument("--shots", type=int, nargs="*", default=[1024],
+                        help="Shot counts to run Aer with besides exact probabilities")
+    parser.add_argument("--threads", type=int, default=0, help="Aer threads (0 = all cores)")
+    parser.add_argument("--max-legacy", type=int, default=12,
+                        help="Largest qubit count to run the legacy path on")
+    parser.add_argument("--json", help="Write the rows to this file")
+    args = parser.parse_args()
+
+    print(f"{'qubits':>6}{'config':>12}{'seconds':>10}{'mean gap':>12}{'optimal':>9}")
+    rows = run(args.qubits, args.problems, args.reps, args.maxiter, args.shots, args.threads, args.max_legacy)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Penalty (X mixer) vs. Hamming-weight-preserving (Dicke state, XY ring mixer) QAOA.
+
+Both formulations solve the same random cardinality-constrained QUBOs from
+the same random initial angles. Reported per qubit count and mode:
+COBYLA evaluations until convergence, wall time, the final state's
+probability mass on feasible (k-asset) selections and on the optimal
+selection, and how often the returned selection was optimal.
+
+Usage (from backend/):
+    python -m benchmarks.bench_qaoa_mixers
+    python -m benchmarks.bench_qaoa_mixers --qubits 6 8 10 12 --reps 2 --json out.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from api.utils.quantum_utils import QuboMatrices, exact_qubo_minimum, solve_qubo_with_qaoa
+from benchmarks.bench_qaoa import make_problem
+
+
+def program_for(qubo, mode):
+    """QuadraticProgram and Hamming weight for a formulation."""
+    if mode == "xy":
+        bare = QuboMatrices(qubo.assets, qubo.linear, qubo.quadratic, qubo.k, 0.0)
+        return bare.to_quadratic_program(), int(qubo.k)
+    return qubo.to_quadratic_program(), None
+
+
+def final_state_stats(quasi_dist, n, k, optimal_state):
+    states = np.fromiter(quasi_dist.keys(), dtype=np.int64)
+    probs = np.fromiter(quasi_dist.values(), dtype=float)
+    weights = ((states[:, None] >> np.arange(n)) & 1).sum(axis=1)
+    return float(probs[weights == k].sum()), float(probs[states == optimal_state].sum())
+
+
+def run(qubit_counts, n_problems, n_starts, reps, maxiter):
+    rows = []
+    for n in qubit_counts:
+        for mode in ("x", "xy"):
+            evals, seconds, p_feasible, p_optimal, optimal = [], [], [], [], 0
+            for seed in range(n_problems):
+                qubo = make_problem(n, seed)
+                best_x, _ = exact_qubo_minimum(qubo)
+                optimal_state = int(np.sum(best_x.astype(np.int64) << np.arange(n)))
+                program, weight = program_for(qubo, mode)
+                rng = np.random.default_rng(seed)
+                for _ in range(n_starts):
+                    initial_point = rng.uniform(0, np.pi, 2 * reps)
+                    start = time.perf_counter()
+                    x, _, result = solve_qubo_with_qaoa(
+                        program, qubo.assets, reps=reps, maxiter=maxiter, initial_point=initial_point,
+                        return_result=True, hamming_weight=weight
+                    )
+                    seconds.append(time.perf_counter() - start)
+                    evals.append(result.cost_function_evals)
+                    feasible, hit = final_state_stats(result.eigenstate, n, qubo.k, optimal_state)
+                    p_feasible.append(feasible)
+                    p_optimal.append(hit)
+                    optimal += int(np.array_equal(x, best_x))
+            runs = n_problems * n_starts
+            rows.append({
+                "qubits": n,
+                "mode": mode,
+                "evals": float(np.mean(evals)),
+                "seconds": float(np.mean(seconds)),
+                "p_feasible": float(np.mean(p_feasible)),
+                "p_optimal": float(np.mean(p_optimal)),
+                "optimal": optimal,
+                "runs": runs,
+            })
+            r = rows[-1]
+            print(f"{n:>6}{mode:>6}{r['evals']:>8.1f}{r['seconds']:>10.2f}{r['p_feasible']:>12.4f}"
+                  f"{r['p_optimal']:>12.4f}{optimal:>6}/{runs}", flush=True)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--qubits", type=int, nargs="+", default=[6, 8, 10])
+    parser.add_argument("--problems", type=int, default=3)
+    parser.add_argument("--starts", type=int, default=2, help="Random initial points per problem")
+    parser.add_argument("--reps", type=int, default=2)
+    parser.add_argument("--maxiter", type=int, default=150)
+    parser.add_argument("--json", help="Write the rows to this file")
+    args = parser.parse_args()
+
+    print(f"{'qubits':>6}{'mode':>6}{'evals':>8}{'seconds':>10}{'p_feasible':>12}{'p_optimal':>12}{'optimal':>9}")
+    rows = run(args.qubits, args.problems, args.starts, args.reps, args.maxiter)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Error vs. wall time of the Monte Carlo sampling modes for portfolio VaR/CVaR.
+
+Asset returns are Gaussian, so the portfolio horizon return is exactly
+N(w @ mu_h, w' cov_h w) and VaR/CVaR have closed forms to measure against.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sampling
+    python -m benchmarks.bench_sampling --sims 1000 5000 20000 --seeds 20 --json out.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from api.utils.metrics_utils import monte_carlo_portfolio
+from api.utils.simulation_utils import SAMPLING_MODES
+
+
+def make_universe(n_assets, seed=0):
+    """Random but well-conditioned annualized mu/cov and long-only weights."""
+    rng = np.random.default_rng(seed)
+    tickers = [f"A{i}" for i in range(n_assets)]
+    mu = pd.Series(rng.uniform(0.02, 0.15, n_assets), index=tickers)
+    factors = rng.normal(size=(n_assets, 3)) * 0.15
+    cov = factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n_assets))
+    weights = rng.dirichlet(np.ones(n_assets))
+    return mu, pd.DataFrame(cov, index=tickers, columns=tickers), weights
+
+
+def exact_var_cvar(mu, cov, weights, horizon_days, alpha):
+    h = horizon_days / 252.0
+    m = float(weights @ mu.values) * h
+    s = float(np.sqrt(weights @ cov.values @ weights * h))
+    z = norm.ppf(alpha)
+    return m + s * z, m - s * norm.pdf(z) / alpha
+
+
+def run(sims_list, n_seeds, n_assets, horizon_days, alpha):
+    mu, cov, weights = make_universe(n_assets)
+    exact_var, exact_cvar = exact_var_cvar(mu, cov, weights, horizon_days, alpha)
+    rows = []
+    for n_sims in sims_list:
+        for mode in SAMPLING_MODES:
+            var_err, cvar_err, var_se, cvar_se, elapsed = [], [], [], [], 0.0
+            for seed in range(n_seeds):
+                start = time.perf_counter()
+                _, _, var_ret, cvar_ret, _, stderr = monte_carlo_portfolio(
+                    mu, cov, weights, horizon_days, n_sims, alpha, seed=seed,
+                    sampling=mode, return_stderr=True
+                )
+                elapsed += time.perf_counter() - start
+                var_err.append(var_ret - exact_var)
+                cvar_err.append(cvar_ret - exact_cvar)
+                var_se.append(stderr["var"])
+                cvar_se.append(stderr["cvar"])
+            rows.append({
+                "mode": mode,
+                "n_sims": n_sims,
+                "var_rmse": float(np.sqrt(np.mean(np.square(var_err)))),
+                "var_reported_se": float(np.mean(var_se)),
+                "cvar_rmse": float(np.sqrt(np.mean(np.square(cvar_err)))),
+                "cvar_reported_se": float(np.mean(cvar_se)),
+                "ms_per_run": 1000.0 * elapsed / n_seeds,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sims", type=int, nargs="+", default=[1000, 2000, 5000, 20000])
+    parser.add_argument("--seeds", type=int, default=20)
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--json", help="Write the raw rows to this file")
+    args = parser.parse_args()
+
+    rows = run(args.sims, args.seeds, args.assets, args.horizon, args.alpha)
+
+    header = f"{'mode':<11}{'n_sims':>8}{'VaR RMSE':>11}{'VaR SE':>10}{'CVaR RMSE':>11}{'CVaR SE':>10}{'ms/run':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['mode']:<11}{r['n_sims']:>8}{r['var_rmse']:>11.5f}{r['var_reported_se']:>10.5f}"
+              f"{r['cvar_rmse']:>11.5f}{r['cvar_reported_se']:>10.5f}{r['ms_per_run']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from api.utils.metrics_utils import monte_carlo_simulation
+
+
+def test_closed_form_matches_monte_carlo():
+    weights = np.array([0.5, 0.3, 0.2])
+    mu = np.array([0.08, 0.12, 0.05])
+    cov = np.array([[0.04, 0.01, 0.0], [0.01, 0.09, 0.02], [0.0, 0.02, 0.03]])
+
+    def run(sampling, **kwargs):
+        return monte_carlo_simulation(weights, mu, cov, 10000, time_horizon=252, sampling=sampling,
+                                      path_stats=False, **kwargs)
+
+    analytic = run("analytic")
+    simulated = run("mc", num_simulations=40000, seed=5)
+
+    for p, value in analytic['percentiles'].items():
+        assert value == pytest.approx(simulated['percentiles'][p], rel=0.01)
+    for level in ('95', '99'):
+        assert analytic['var'][level] == pytest.approx(simulated['var'][level], rel=0.04)
+        assert analytic['cvar'][level] == pytest.approx(simulated['cvar'][level], rel=0.04)
+    assert analytic['final_value']['mean'] == pytest.approx(simulated['final_value']['mean'], rel=0.002)
+    assert analytic['final_value']['std'] == pytest.approx(simulated['final_value']['std'], rel=0.02)
+    for p, path in analytic['visualization']['percentile_paths'].items():
+        assert np.allclose(path, simulated['visualization']['percentile_paths'][p], rtol=0.01)
+
+
+def test_analytic_mode_skips_paths_unless_asked():
+    weights, mu, cov = np.array([1.0]), np.array([0.07]), np.array([[0.04]])
+    plain = monte_carlo_simulation(weights, mu, cov, 1000, time_horizon=30, sampling="analytic", path_stats=False)
+    assert plain['max_drawdown'] is None and plain['visualization']['paths'] == []
+    with_paths = monte_carlo_simulation(weights, mu, cov, 1000, time_horizon=30, num_simulations=200,
+                                        sampling="analytic", path_stats=True, seed=1)
+    assert with_paths['max_drawdown'] is not None and len(with_paths['visualization']['paths']) == 30
+    assert with_paths['var'] == plain['var']
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from api.utils.classical_portfolio import min_variance_target_qp, solve_mvo_min_var_target
+
+
+def random_problem(n, seed):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 3)) * 0.2
+    cov = factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n))
+    mu = rng.uniform(-0.05, 0.3, n)
+    return mu, cov
+
+
+def slsqp_min_variance(mu, cov, target=None):
+    n = len(mu)
+    constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1}]
+    if target is not None:
+        constraints.append({'type': 'ineq', 'fun': lambda w: mu @ w - target})
+    res = minimize(lambda w: w @ cov @ w, np.full(n, 1.0 / n), jac=lambda w: 2 * cov @ w, method="SLSQP",
+                   bounds=[(0, 1)] * n, constraints=constraints, options={'ftol': 1e-12, 'maxiter': 2000})
+    w = res.x
+    assert w.min() >= -1e-8 and abs(w.sum() - 1) < 1e-8
+    assert target is None or mu @ w >= target - 1e-8
+    return w
+
+
+@pytest.mark.parametrize("n", [2, 5, 20, 60])
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("quantile", [0.3, 0.7, 0.99])
+def test_matches_slsqp(n, seed, quantile):
+    mu, cov = random_problem(n, seed)
+    target = float(np.quantile(mu, quantile))
+    w = min_variance_target_qp(mu, cov, target)
+    reference = slsqp_min_variance(mu, cov, target)
+
+    assert w.min() >= 0.0
+    assert w.sum() == pytest.approx(1.0, abs=1e-10)
+    assert mu @ w >= target - 1e-9
+    assert w @ cov @ w <= reference @ cov @ reference * (1 + 1e-8)
+
+
+def test_unreachable_target():
+    mu, cov = random_problem(5, 0)
+    assert min_variance_target_qp(mu, cov, mu.max() + 0.01) is None
+
+
+def test_highest_return_target_is_best_asset():
+    mu, cov = random_problem(5, 1)
+    w = min_variance_target_qp(mu, cov, mu.max())
+    np.testing.assert_allclose(w, np.eye(5)[np.argmax(mu)], atol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_target_below_gmv_return(seed):
+    mu, cov = random_problem(8, seed)
+    gmv = slsqp_min_variance(mu, cov)
+    w = min_variance_target_qp(mu, cov, mu @ gmv - 0.05)
+    assert w @ cov @ w <= gmv @ cov @ gmv * (1 + 1e-8)
+    np.testing.assert_allclose(w, gmv, atol=1e-5)
+
+
+def test_wrapper_falls_back_to_equal_weights():
+    mu, cov = random_problem(4, 2)
+    np.testing.assert_allclose(solve_mvo_min_var_target(mu, cov, mu.max() + 1.0), np.full(4, 0.25))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_duplicated_asset_falls_back_to_a_valid_optimum(seed):
+    mu, cov = random_problem(6, seed)
+    # Asset 6 repeats asset 0, so the full covariance is singular
+    mu = np.append(mu, mu[0])
+    cov = np.block([[cov, cov[:, :1]], [cov[:1, :], cov[:1, :1]]])
+    target = float(np.quantile(mu, 0.6))
+    w = min_variance_target_qp(mu, cov, target)
+    reference = slsqp_min_variance(mu, cov, target)
+    assert np.isfinite(w).all() and w.min() >= 0.0
+    assert w.sum() == pytest.approx(1.0, abs=1e-10) and mu @ w >= target - 1e-8
+    assert w @ cov @ w <= reference @ cov @ reference * (1 + 1e-6)
+
+
+def test_low_rank_covariance_falls_back():
+    rng = np.random.default_rng(7)
+    factors = rng.normal(size=(10, 3)) * 0.2
+    mu, cov = rng.uniform(0.0, 0.2, 10), factors @ factors.T
+    target = float(np.quantile(mu, 0.5))
+    w = min_variance_target_qp(mu, cov, target)
+    assert np.isfinite(w).all() and w.min() >= 0.0 and mu @ w >= target - 1e-8
+    reference = slsqp_min_variance(mu, cov, target)
+    assert w @ cov @ w <= reference @ cov @ reference + 1e-10
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_target_at_equal_weight_return(seed):
+    mu, cov = random_problem(8, seed)
+    target = float(mu.mean())
+    w = min_variance_target_qp(mu, cov, target)
+    reference = slsqp_min_variance(mu, cov, target)
+    assert mu @ w >= target - 1e-9
+    assert w @ cov @ w <= reference @ cov @ reference * (1 + 1e-8)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.utils.covariance_utils import (
+    COVARIANCE_ESTIMATORS, CovarianceTracker, EwmaCovariance, LedoitWolfCovariance, make_estimator
+)
+
+
+def make_returns(n_rows=400, n_assets=6, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.0005, 0.015, (n_rows, n_assets)) + rng.normal(0, 0.01, (n_rows, 1))
+    return pd.DataFrame(values, columns=[f"A{i}" for i in range(n_assets)],
+                        index=pd.bdate_range("2020-01-01", periods=n_rows))
+
+
+def ledoit_wolf_reference(x):
+    """Batch Ledoit-Wolf towards a scaled identity, as in scikit-learn."""
+    t, n = x.shape
+    x = x - x.mean(axis=0)
+    emp = x.T @ x / t
+    scale = np.trace(emp) / n
+    x2 = x ** 2
+    beta = (np.sum(x2.T @ x2) / t - np.sum(emp ** 2)) / (n * t)
+    delta = np.sum((emp - scale * np.eye(n)) ** 2) / n
+    shrink = min(beta, delta) / delta
+    return ((1 - shrink) * emp + shrink * scale * np.eye(n)) * t / (t - 1)
+
+
+def test_sample_matches_pandas():
+    returns = make_returns()
+    cov = CovarianceTracker().covariance(returns, "sample")
+    np.testing.assert_allclose(cov, returns.cov().values, rtol=1e-12, atol=1e-18)
+
+
+def test_ledoit_wolf_matches_batch_formula():
+    x = np.random.default_rng(1).normal(size=(40, 30))
+    estimator = LedoitWolfCovariance(30)
+    estimator.update(x[:17])
+    estimator.update(x[17:])
+    np.testing.assert_allclose(estimator.covariance(), ledoit_wolf_reference(x), rtol=1e-10, atol=1e-14)
+
+
+def test_ewma_recursion():
+    x = make_returns(50, 3).values
+    estimator = EwmaCovariance(3, decay=0.9)
+    estimator.update(x)
+    mean, cov = x[0].copy(), np.zeros((3, 3))
+    for row in x[1:]:
+        d = row - mean
+        mean = mean + 0.1 * d
+        cov = 0.9 * (cov + 0.1 * np.outer(d, d))
+    np.testing.assert_allclose(estimator.covariance(), cov, rtol=1e-12)
+
+
+@pytest.mark.parametrize("name", sorted(COVARIANCE_ESTIMATORS))
+def test_refresh_with_new_row_updates_incrementally(name):
+    returns = make_returns()
+    tracker = CovarianceTracker()
+    tracker.covariance(returns.iloc[:-1], name)
+    before = tracker.stats()
+
+    cov = tracker.covariance(returns, name)
+    after = tracker.stats()
+    assert after['updates'] == before['updates'] + 1
+    assert after['refits'] == before['refits']
+
+    full = make_estimator(name, returns.shape[1])
+    full.update(returns.values)
+    np.testing.assert_allclose(cov, full.covariance(), rtol=1e-10, atol=1e-18)
+
+
+def test_revised_history_refits():
+    returns = make_returns()
+    tracker = CovarianceTracker()
+    tracker.covariance(returns, "sample")
+    revised = returns.copy()
+    revised.iloc[-1] += 1e-3
+    cov = tracker.covariance(revised, "sample")
+    assert tracker.stats()['refits'] == 2
+    np.testing.assert_allclose(cov, revised.cov().values, rtol=1e-12, atol=1e-18)
+
+
+def test_unknown_estimator():
+    with pytest.raises(ValueError):
+        CovarianceTracker().covariance(make_returns(), "shrinkage")
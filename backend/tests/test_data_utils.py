@@ -0,0 +1,47 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.utils.data_utils import calculate_historical_drawdowns
+from api.utils.drawdown_utils import historical_drawdowns
+
+
+def write_cache(path, closes):
+    data = {
+        ticker: {'info': {}, 'history': pd.DataFrame({'Open': close, 'Close': close})}
+        for ticker, close in closes.items()
+    }
+    joblib.dump(data, path)
+    return str(path)
+
+
+def price_history(seed, start, periods, freq="B"):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=freq, name="Date")
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0.0003, 0.02, periods)), index=index)
+
+
+def test_cached_history_matches_price_frame(tmp_path):
+    # Different calendars: a business-day equity and a seven-day crypto series
+    closes = {'AAA': price_history(0, "2020-01-01", 500), 'BTC': price_history(1, "2020-03-01", 600, "D")}
+    pkl_file = write_cache(tmp_path / "assets.pkl", closes)
+
+    result = calculate_historical_drawdowns(['AAA', 'BTC'], pkl_file, threshold=0.1)
+    assert result == historical_drawdowns(pd.DataFrame(closes), threshold=0.1)
+    for ticker, close in closes.items():
+        worst = (1 - close / close.cummax()).max()
+        assert result[ticker]['max_drawdown'] == pytest.approx(worst)
+        assert result[ticker]['current_drawdown'] == pytest.approx(1 - close.iloc[-1] / close.max())
+
+
+def test_only_requested_tickers_are_analysed(tmp_path):
+    closes = {ticker: price_history(seed, "2021-01-01", 300) for seed, ticker in enumerate("ABC")}
+    pkl_file = write_cache(tmp_path / "assets.pkl", closes)
+    assert list(calculate_historical_drawdowns(['C', 'A'], pkl_file)) == ['C', 'A']
+
+
+def test_missing_history_is_rejected(tmp_path):
+    pkl_file = write_cache(tmp_path / "assets.pkl", {'AAA': price_history(0, "2021-01-01", 50)})
+    with pytest.raises(ValueError, match="ZZZ"):
+        calculate_historical_drawdowns(['AAA', 'ZZZ'], pkl_file)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from api.utils.drawdown_utils import path_drawdown_stats
+
+
+def legacy_drawdowns(paths, threshold=0.05):
+    """The per-path loop monte_carlo_simulation used before drawdown_utils."""
+    max_drawdowns, recovery_times, underwater_periods = [], [], []
+    for i in range(paths.shape[1]):
+        simulation = paths[:, i]
+        drawdowns = np.zeros(len(simulation))
+        peak = simulation[0]
+        in_drawdown = False
+        drawdown_start = 0
+        current_underwater = 0
+        for t, value in enumerate(simulation):
+            if value > peak:
+                peak = value
+                if in_drawdown:
+                    recovery_times.append(t - drawdown_start)
+                    in_drawdown = False
+                    underwater_periods.append(current_underwater)
+                    current_underwater = 0
+            else:
+                drawdown = (peak - value) / peak
+                drawdowns[t] = drawdown
+                if not in_drawdown and drawdown > threshold:
+                    in_drawdown = True
+                    drawdown_start = t
+                if in_drawdown:
+                    current_underwater += 1
+        if in_drawdown and current_underwater > 0:
+            underwater_periods.append(current_underwater)
+        max_drawdowns.append(np.max(drawdowns))
+    return np.array(max_drawdowns), np.array(recovery_times), np.array(underwater_periods)
+
+
+def random_paths(n_steps, n_sims, seed, decimals=None):
+    rng = np.random.default_rng(seed)
+    paths = 100 * np.exp(np.cumsum(rng.normal(0.0, 0.03, (n_steps, n_sims)), axis=0))
+    return np.round(paths, decimals) if decimals is not None else paths
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("threshold", [0.0, 0.05, 0.2])
+def test_matches_legacy_loop(seed, threshold):
+    paths = random_paths(250, 40, seed)
+    expected = legacy_drawdowns(paths, threshold)
+    for got, want in zip(path_drawdown_stats(paths, threshold), expected):
+        np.testing.assert_allclose(np.sort(got), np.sort(want))
+
+
+def test_flat_peaks_are_not_new_highs():
+    # Returning exactly to the peak does not end an episode; only a strict new high does
+    paths = np.array([[100, 90, 100, 94, 100, 101, 101, 95, 101]], dtype=float).T
+    max_dd, recovery, underwater = path_drawdown_stats(paths, 0.05)
+    want_dd, want_recovery, want_underwater = legacy_drawdowns(paths, 0.05)
+    np.testing.assert_allclose(max_dd, want_dd)
+    np.testing.assert_array_equal(recovery, want_recovery)
+    np.testing.assert_array_equal(underwater, want_underwater)
+    np.testing.assert_array_equal(recovery, [4])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rounded_paths_with_repeated_values(seed):
+    paths = random_paths(300, 30, seed, decimals=0)
+    expected = legacy_drawdowns(paths)
+    for got, want in zip(path_drawdown_stats(paths), expected):
+        np.testing.assert_allclose(np.sort(got), np.sort(want))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import minimize
+
+from api.utils.classical_portfolio import min_variance_target_qp
+from api.utils.frontier_utils import FrontierCache, critical_line, frontier_points, max_sharpe_portfolio
+
+
+def random_problem(n, seed):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 3)) * 0.2
+    cov = factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n))
+    mu = rng.uniform(-0.05, 0.3, n)
+    return mu, cov
+
+
+def assert_matches_qp(mu, cov, n_points=25):
+    corners = critical_line(mu, cov)
+    returns, _, _, weights = frontier_points(corners, mu, cov, n_points)
+    for target, w in zip(returns, weights):
+        assert w.min() >= -1e-9
+        assert w.sum() == pytest.approx(1.0)
+        reference = min_variance_target_qp(mu, cov, target - 1e-12)
+        assert w @ cov @ w <= reference @ cov @ reference * (1 + 1e-7)
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 11, 30])
+@pytest.mark.parametrize("seed", range(3))
+def test_frontier_matches_active_set_qp(n, seed):
+    mu, cov = random_problem(n, seed)
+    assert_matches_qp(mu, cov)
+
+
+def test_tied_highest_returns():
+    mu = np.array([0.1, 0.1, 0.05])
+    cov = np.diag([0.04, 0.09, 0.01])
+    min_var = critical_line(mu, cov)[-1]
+    np.testing.assert_allclose(min_var, [9 / 49, 4 / 49, 36 / 49], atol=1e-10)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_ties_match_active_set_qp(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 9))
+    mu, cov = random_problem(n, seed)
+    mu[rng.choice(n, int(rng.integers(2, n + 1)), replace=False)] = mu.max()
+    if seed % 2:
+        mu[rng.choice(n, 2, replace=False)] = rng.uniform(0.0, 0.3)
+    assert_matches_qp(mu, cov, n_points=10)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_upper_bounds_match_slsqp(seed):
+    n, upper = 6, 0.3
+    mu, cov = random_problem(n, seed)
+    if seed % 2:
+        mu[:2] = mu.max()
+    corners = critical_line(mu, cov, 0.0, upper)
+    assert corners.max() <= upper + 1e-9
+    returns, _, _, weights = frontier_points(corners, mu, cov, 8)
+    for target, w in zip(returns, weights):
+        res = minimize(lambda z: z @ cov @ z, np.full(n, 1.0 / n), jac=lambda z: 2 * cov @ z, method="SLSQP",
+                       bounds=[(0, upper)] * n,
+                       constraints=[{'type': 'eq', 'fun': lambda z: z.sum() - 1},
+                                    {'type': 'eq', 'fun': lambda z: mu @ z - target}],
+                       options={'ftol': 1e-15, 'maxiter': 500})
+        assert w @ cov @ w <= res.fun * (1 + 1e-6) + 1e-12
+
+
+def test_max_sharpe_beats_dense_frontier():
+    mu, cov = random_problem(10, 0)
+    corners = critical_line(mu, cov)
+    w = max_sharpe_portfolio(corners, mu, cov, 0.02)
+    _, _, sharpe, _ = frontier_points(corners, mu, cov, 2000, 0.02)
+    assert (w @ mu - 0.02) / np.sqrt(w @ cov @ w) >= sharpe.max() - 1e-9
+
+
+def test_cache_reuses_corners():
+    mu, cov = random_problem(5, 0)
+    assets = [f"A{i}" for i in range(5)]
+    mu, cov = pd.Series(mu, index=assets), pd.DataFrame(cov, index=assets, columns=assets)
+    cache = FrontierCache(4)
+    first = cache.corners(mu, cov)
+    assert cache.corners(mu, cov) is first
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from api.services.job_service import JobQueueFull, JobService
+
+
+def wait_for(service, job_id, status, owner=None, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        job = service.get(job_id, owner=owner)
+        if job is not None and job['status'] == status:
+            return job
+        time.sleep(0.005)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def blocking_job(started, release, result=None):
+    def func(report):
+        report(0.5, "halfway")
+        started.set()
+        release.wait(5)
+        return result
+    return func
+
+
+def test_submit_reports_progress_and_result():
+    service = JobService(1, 4, 60)
+    started, release = threading.Event(), threading.Event()
+    job_id = service.submit("optimize", blocking_job(started, release, {'value': 42}), owner="alice")
+    assert started.wait(5)
+    job = service.get(job_id, owner="alice")
+    assert (job['status'], job['progress'], job['message']) == ("running", 0.5, "halfway")
+    release.set()
+    job = wait_for(service, job_id, "succeeded", owner="alice")
+    assert job['result'] == {'value': 42} and job['progress'] == 1.0
+    assert 'owner' not in job
+
+
+def test_failed_job_keeps_error():
+    service = JobService(1, 4, 60)
+
+    def func(report):
+        raise ValueError("bad input")
+
+    job = wait_for(service, service.submit("optimize", func), "failed")
+    assert job['error'] == "bad input"
+
+
+def test_cancel_only_queued_jobs():
+    service = JobService(1, 4, 60)
+    started, release = threading.Event(), threading.Event()
+    running = service.submit("optimize", blocking_job(started, release))
+    assert started.wait(5)
+    queued = service.submit("optimize", lambda report: None)
+    assert not service.cancel(running)
+    assert service.cancel(queued)
+    assert service.get(queued)['status'] == "cancelled"
+    release.set()
+    wait_for(service, running, "succeeded")
+
+
+def test_rejects_beyond_max_pending():
+    service = JobService(1, 2, 60)
+    started, release = threading.Event(), threading.Event()
+    service.submit("optimize", blocking_job(started, release))
+    service.submit("optimize", lambda report: None)
+    with pytest.raises(JobQueueFull):
+        service.submit("optimize", lambda report: None)
+    release.set()
+
+
+def test_finished_jobs_expire_after_ttl():
+    service = JobService(1, 4, 0.05)
+    job_id = service.submit("optimize", lambda report: "done")
+    wait_for(service, job_id, "succeeded")
+    time.sleep(0.1)
+    assert service.get(job_id) is None
+    assert sum(service.stats().values()) == 0
+
+
+def test_jobs_are_visible_to_their_owner_only():
+    service = JobService(1, 4, 60)
+    started, release = threading.Event(), threading.Event()
+    job_id = service.submit("optimize", blocking_job(started, release), owner="alice")
+    assert started.wait(5)
+    assert service.get(job_id, owner="bob") is None
+    assert service.get(job_id) is None
+    assert not service.cancel(job_id, owner="bob")
+    release.set()
+    wait_for(service, job_id, "succeeded", owner="alice")
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import approx_fprime, check_grad
+
+from api.utils.metrics_utils import (get_weights_batch_quantum, get_weights_from_selection_quantum, monte_carlo_portfolio,
+                                     sharpe_vol_objective)
+
+
+def random_universe(n, seed):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 2)) * 0.2
+    cov = factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n))
+    assets = [f"A{i}" for i in range(n)]
+    return pd.Series(rng.uniform(-0.05, 0.3, n), index=assets), pd.DataFrame(cov, index=assets, columns=assets)
+
+
+def test_batch_weights_match_single_selection():
+    mu, cov = random_universe(8, 0)
+    selection = np.array([1, 0, 1, 1, 0, 0, 1, 0])
+    for result in get_weights_batch_quantum([(selection, 0.3)], mu, cov):
+        single, _, _ = get_weights_from_selection_quantum(selection, mu, cov, list(mu.index), 0.3)
+        assert np.allclose(list(result['weights'].values()), single, atol=1e-12)
+
+
+def test_cached_scenarios_must_cover_every_asset():
+    mu, cov = random_universe(4, 1)
+    scenarios = pd.DataFrame(np.random.default_rng(0).normal(size=(100, 3)), columns=list(mu.index[:3]))
+    with pytest.raises(ValueError, match="A3"):
+        monte_carlo_portfolio(mu, cov, np.full(4, 0.25), n_sims=100, scenarios=scenarios)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("vol_ratio", [0.5, 1.0, 2.0])
+@pytest.mark.parametrize("penalty", [0.1, 10.0])
+def test_sharpe_vol_gradient_matches_finite_differences(seed, vol_ratio, penalty):
+    mu, cov = random_universe(6, seed)
+    rng = np.random.default_rng(100 + seed)
+    w = rng.dirichlet(np.ones(6))
+    vol = np.sqrt(w @ cov.values @ w)
+    # Target above, at and below the portfolio vol exercises both signs of the penalty term
+    fun, jac = sharpe_vol_objective(mu.values, cov.values, vol * vol_ratio, penalty)
+    scale = np.linalg.norm(jac(w))
+    assert check_grad(fun, jac, w, epsilon=1e-7) <= 1e-5 * max(scale, 1.0)
+    assert np.allclose(jac(w), approx_fprime(w, fun, 1e-7), rtol=1e-4, atol=1e-6)
+
+
+def test_sharpe_vol_cache_tracks_the_point():
+    mu, cov = random_universe(5, 0)
+    fun, jac = sharpe_vol_objective(mu.values, cov.values, 0.2)
+    w1, w2 = np.full(5, 0.2), np.array([0.4, 0.3, 0.1, 0.1, 0.1])
+    expected = jac(w2).copy()
+    fun(w1)
+    assert np.array_equal(jac(w2), expected)
+    w = w2.copy()
+    fun(w)
+    w[0] += 1e-3  # mutating the caller's array must not serve a stale cache entry
+    assert not np.array_equal(jac(w), expected)
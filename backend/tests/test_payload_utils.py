@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from api.utils.payload_utils import (compact_sim_returns, compact_visualization, decode_array, encode_array,
+                                     histogram_payload, lttb_indices)
+
+
+def visualization(n_days=300, n_paths=4, seed=0):
+    rng = np.random.default_rng(seed)
+    paths = 1000 * np.cumprod(1 + rng.normal(0.0005, 0.01, (n_days, n_paths)), axis=0)
+    return {
+        'time_points': list(range(n_days)),
+        'paths': paths.tolist(),
+        'percentile_paths': {str(p): np.percentile(paths, p, axis=1).tolist() for p in (5, 50, 95)},
+    }
+
+
+@pytest.mark.parametrize("shape", [(7,), (5, 3), (0,)])
+def test_encode_decode_round_trip(shape):
+    values = np.random.default_rng(1).normal(size=shape)
+    payload = encode_array(values)
+    assert payload['dtype'] == 'float32' and payload['shape'] == list(shape)
+    assert np.array_equal(decode_array(payload), values.astype(np.float32))
+
+
+def test_lttb_keeps_endpoints_and_count():
+    x = np.arange(500)
+    y = np.sin(x / 20.0) + np.random.default_rng(2).normal(0, 0.1, 500)
+    keep = lttb_indices(x, y, 40)
+    assert len(keep) == 40 and keep[0] == 0 and keep[-1] == 499
+    assert np.all(np.diff(keep) > 0)
+    assert np.array_equal(lttb_indices(x[:10], y[:10], 40), np.arange(10))
+    with pytest.raises(ValueError):
+        lttb_indices(x, y, 2)
+
+
+def test_compact_visualization_keeps_series_aligned():
+    vis = visualization()
+    out = compact_visualization(vis, max_points=50)
+    keep = np.asarray(out['time_points'])
+    assert len(keep) == 50 and keep[0] == 0 and keep[-1] == 299
+    assert np.array_equal(np.asarray(out['paths']), np.asarray(vis['paths'])[keep])
+    for p, band in out['percentile_paths'].items():
+        assert np.array_equal(band, np.asarray(vis['percentile_paths'][p])[keep])
+
+    encoded = compact_visualization(vis, max_points=50, encoding="float32")
+    assert encoded['time_points'] == out['time_points']
+    assert np.allclose(decode_array(encoded['paths']), out['paths'], rtol=1e-6)
+    for p, band in encoded['percentile_paths'].items():
+        assert np.allclose(decode_array(band), out['percentile_paths'][p], rtol=1e-6)
+
+
+def test_compact_visualization_passthrough_and_bad_encoding():
+    vis = visualization(20)
+    assert compact_visualization(vis) is vis
+    with pytest.raises(ValueError):
+        compact_visualization(vis, encoding="msgpack")
+
+
+def test_histogram_sim_returns():
+    samples = np.random.default_rng(3).normal(size=1000)
+    metrics = compact_sim_returns({'sim_returns': samples.tolist()}, "histogram", bins=20)
+    hist = metrics['sim_returns']
+    assert sum(hist['counts']) == 1000 and len(hist['bin_edges']) == 21
+    assert hist == histogram_payload(samples, 20)
+    with pytest.raises(ValueError):
+        compact_sim_returns({'sim_returns': []}, "csv")
@@ -0,0 +1,33 @@
+import json
+
+import numpy as np
+
+from api.utils.qaoa_cache import QaoaAngleCache
+
+
+def stored(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_store_keeps_lower_energy(tmp_path):
+    path = tmp_path / "angles.json"
+    cache = QaoaAngleCache(str(path))
+    cache.store(4, 2, 1, 0.5, [0.1, 0.2], -3.0)
+    cache.store(4, 2, 1, 0.5, [0.3, 0.4], -1.0)
+    point, source = cache.initial_point(4, 2, 1, 0.5)
+    assert source == "exact"
+    assert np.allclose(point, [0.1, 0.2])
+    cache.store(4, 2, 1, 0.5, [0.5, 0.6], -5.0)
+    assert stored(path)[cache.make_key(4, 2, 1, 5)]['energy'] == -5.0
+
+
+def test_store_merges_other_writers(tmp_path):
+    path = str(tmp_path / "angles.json")
+    first, second = QaoaAngleCache(path), QaoaAngleCache(path)
+    first.initial_point(4, 2, 1, 0.5)
+    second.initial_point(4, 2, 1, 0.5)
+    first.store(4, 2, 1, 0.1, [0.1, 0.2], -1.0)
+    second.store(5, 2, 1, 0.1, [0.3, 0.4], -2.0)
+    first.store(6, 2, 1, 0.1, [0.5, 0.6], -3.0)
+    assert set(stored(path)) == {QaoaAngleCache.make_key(m, 2, 1, 1) for m in (4, 5, 6)}
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from api.utils.metrics_utils import PATH_PERCENTILES, monte_carlo_simulation
+from api.utils.quantile_sketch import LogHistogramSketch
+
+# Mirrors MC_DENSE_CELLS / MC_CHUNK_SIZE in services.portfolio_service, which
+# cannot be imported without the sentiment model
+MC_DENSE_CELLS = 2_000_000
+MC_CHUNK_SIZE = 256
+
+
+def lognormal_paths(n_steps, n_paths, daily_mu=0.0004, daily_vol=0.012, seed=0):
+    rng = np.random.default_rng(seed)
+    paths = np.empty((n_steps, n_paths))
+    paths[0] = 1000.0
+    paths[1:] = 1000.0 * np.cumprod(1.0 + rng.normal(daily_mu, daily_vol, (n_steps - 1, n_paths)), axis=0)
+    return paths
+
+
+def assert_within_bound(sketch, paths):
+    # Rows whose values all fall inside the grid carry the documented bound
+    inside = ((np.log(paths.min(axis=1)) >= sketch.lower)
+              & (np.log(paths.max(axis=1)) < sketch.lower + sketch.n_bins * sketch.width))
+    assert inside.all()
+    bound = np.expm1(2 * sketch.width)
+    for p, approx in sketch.quantiles(PATH_PERCENTILES).items():
+        exact = np.percentile(paths, p, axis=1)
+        assert np.all(np.abs(approx / exact - 1) <= bound)
+
+
+def test_quantiles_stay_within_relative_error():
+    paths = lognormal_paths(252, 5000)
+    sketch = LogHistogramSketch.for_gaussian_paths(1000.0, 0.0004, 0.012, 252)
+    sketch.update(paths)
+    assert_within_bound(sketch, paths)
+
+
+def test_merged_sketch_equals_single_pass():
+    paths = lognormal_paths(120, 3000, seed=1)
+    whole = LogHistogramSketch.for_gaussian_paths(1000.0, 0.0004, 0.012, 120)
+    whole.update(paths)
+    parts = [LogHistogramSketch.for_gaussian_paths(1000.0, 0.0004, 0.012, 120) for _ in range(3)]
+    for part, chunk in zip(parts, np.array_split(paths, 3, axis=1)):
+        part.update(chunk)
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+    assert np.array_equal(merged.counts, whole.counts) and merged.total == whole.total
+    assert_within_bound(merged, paths)
+
+
+def test_merge_rejects_other_grids():
+    a = LogHistogramSketch.for_gaussian_paths(1000.0, 0.0004, 0.012, 10)
+    b = LogHistogramSketch.for_gaussian_paths(1000.0, 0.0004, 0.02, 10)
+    with pytest.raises(ValueError):
+        a.merge(b)
+
+
+@pytest.mark.parametrize("num_simulations", [MC_DENSE_CELLS // 252, MC_DENSE_CELLS // 252 + 1])
+def test_streamed_and_dense_runs_agree_at_the_cell_limit(num_simulations):
+    weights, mu = np.array([0.6, 0.4]), np.array([0.08, 0.1])
+    cov = np.array([[0.04, 0.01], [0.01, 0.06]])
+
+    def run(chunk_size):
+        return monte_carlo_simulation(weights, mu, cov, 10000, time_horizon=252, num_simulations=num_simulations,
+                                      seed=3, chunk_size=chunk_size)
+
+    dense, streamed = run(None), run(MC_CHUNK_SIZE)
+    for p in dense['percentiles']:
+        assert streamed['percentiles'][p] == pytest.approx(dense['percentiles'][p], rel=0.02)
+    for level in ('95', '99'):
+        assert streamed['var'][level] == pytest.approx(dense['var'][level], rel=0.1)
+    for p, path in dense['visualization']['percentile_paths'].items():
+        assert np.allclose(streamed['visualization']['percentile_paths'][p], path, rtol=0.02)
+    assert streamed['final_value']['mean'] == pytest.approx(dense['final_value']['mean'], rel=0.01)
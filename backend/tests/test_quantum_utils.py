@@ -0,0 +1,260 @@
+import time
+from itertools import combinations
+from math import comb
+
+import numpy as np
+import pandas as pd
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+from qiskit_optimization import QuadraticProgram
+from qiskit_optimization.converters import QuadraticProgramToQubo
+
+from api.utils import quantum_utils
+from api.utils.quantum_utils import (build_and_solve_qubo, build_qubo, build_qubo_matrices, exact_qubo_minimum,
+                                     revolving_door_swaps)
+from api.utils.result_cache import RESULT_CACHE
+
+
+def random_universe(n, seed):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n, 2)) * 0.2
+    cov = factors @ factors.T + np.diag(rng.uniform(0.01, 0.05, n))
+    assets = [f"A{i}" for i in range(n)]
+    return pd.Series(rng.uniform(-0.05, 0.3, n), index=assets), pd.DataFrame(cov, index=assets, columns=assets)
+
+
+def all_bitstrings(n):
+    return ((np.arange(1 << n)[:, None] >> np.arange(n)) & 1).astype(float)
+
+
+def legacy_build_qubo(mu, cov_matrix, user_risk, k, assets):
+    """build_qubo as it was before the matrix form: QuadraticProgram + QuadraticProgramToQubo."""
+    n = len(assets)
+    qp = QuadraticProgram()
+    for t in assets:
+        qp.binary_var(name=t)
+    lam_min, lam_max = 0.1, 10
+    lam = lam_min + (1 - user_risk) ** 2 * (lam_max - lam_min)
+    linear = {assets[i]: -mu.iloc[i] for i in range(n)}
+    quadratic = {(assets[i], assets[j]): lam * cov_matrix.iloc[i, j] for i in range(n) for j in range(n)}
+    avg_vol = np.sqrt(np.mean(np.diag(cov_matrix)))
+    qp.minimize(linear={a: v * (lam / avg_vol) for a, v in linear.items()},
+                quadratic={key: val * lam for key, val in quadratic.items()})
+    qp.linear_constraint(linear={t: 1 for t in assets}, sense="==", rhs=k, name="pick_k_assets")
+    return QuadraticProgramToQubo().convert(qp)
+
+
+@pytest.mark.parametrize("n", range(1, 9))
+def test_revolving_door_visits_every_subset_once(n):
+    for k in range(n + 1):
+        first, outs, ins = revolving_door_swaps(n, k)
+        current = set(first.tolist())
+        seen = {frozenset(current)}
+        for out, enter in zip(outs.tolist(), ins.tolist()):
+            assert out in current and enter not in current
+            current = (current - {out}) | {enter}
+            seen.add(frozenset(current))
+        assert len(outs) == max(comb(n, k) - 1, 0)
+        assert seen == {frozenset(c) for c in combinations(range(n), k)}
+
+
+@pytest.mark.parametrize("n", range(1, 10))
+@pytest.mark.parametrize("seed", range(2))
+def test_exact_minimum_matches_brute_force(n, seed):
+    mu, cov = random_universe(n, seed)
+    for k in range(n + 1):
+        qubo = build_qubo_matrices(mu, cov, 0.4, k)
+        x, energy = exact_qubo_minimum(qubo, n_blocks=3)
+        subsets = np.zeros((comb(n, k), n))
+        for row, c in enumerate(combinations(range(n), k)):
+            subsets[row, list(c)] = 1
+        energies = qubo.energy(subsets)
+        assert x.sum() == k
+        assert energy == pytest.approx(energies.min(), abs=1e-9)
+        assert qubo.energy(x) == pytest.approx(energies.min(), abs=1e-9)
+
+
+def test_exact_minimum_rejects_large_problems(monkeypatch):
+    mu, cov = random_universe(10, 0)
+    monkeypatch.setattr(quantum_utils, "EXACT_MAX_SUBSETS", comb(10, 5) - 1)
+    with pytest.raises(ValueError, match="EXACT_MAX_SUBSETS"):
+        exact_qubo_minimum(build_qubo_matrices(mu, cov, 0.5, 5))
+    x, _ = exact_qubo_minimum(build_qubo_matrices(mu, cov, 0.5, 2))
+    assert x.sum() == 2
+
+
+@pytest.mark.parametrize("user_risk", [0.0, 0.35, 1.0])
+@pytest.mark.parametrize("k", [1, 3])
+def test_build_qubo_matches_legacy_converter(user_risk, k):
+    mu, cov = random_universe(6, 1)
+    assets = list(mu.index)
+    legacy = legacy_build_qubo(mu, cov, user_risk, k, assets)
+    current = build_qubo(mu, cov, user_risk, k, assets)
+    matrices = build_qubo_matrices(mu, cov, user_risk, k, assets)
+    for x in all_bitstrings(6):
+        expected = legacy.objective.evaluate(x)
+        assert current.objective.evaluate(x) == pytest.approx(expected, rel=1e-10, abs=1e-10)
+        assert matrices.energy(x) == pytest.approx(expected, rel=1e-10, abs=1e-10)
+
+
+@pytest.fixture
+def result_cache(monkeypatch, tmp_path):
+    """The shared result cache, persisting to a temporary file."""
+    monkeypatch.setattr(RESULT_CACHE, "path", str(tmp_path / "qubo_results.jsonl"))
+    RESULT_CACHE.clear()
+    yield RESULT_CACHE
+    RESULT_CACHE.clear()
+
+
+def test_infeasible_cache_entry_is_not_served(result_cache):
+    mu, cov = random_universe(6, 0)
+    key = result_cache.make_key(mu, cov, 3, 0.5, "exact")
+    result_cache.store(key, np.array([1, 0, 0, 0, 0, 0]), ["A0"])
+    vec, assets, info = build_and_solve_qubo(mu, cov, list(mu.index), 3, 0.5, solver="exact",
+                                             deadline=None, return_info=True)
+    assert info['solver_path'] == "exact"
+    assert vec.sum() == 3 and len(assets) == 3
+
+
+def test_deadline_cobyla_stops_after_the_deadline():
+    calls = []
+
+    def objective(x):
+        calls.append(x)
+        return float(np.sum((x - 1.0) ** 2))
+
+    result = quantum_utils.deadline_cobyla(200, 0.5, time.monotonic() - 1.0)(objective, np.zeros(3))
+    assert len(calls) == 1 and result.nfev == 1
+    assert np.array_equal(result.x, np.zeros(3))
+
+    unbounded = quantum_utils.deadline_cobyla(200, 0.5, time.monotonic() + 60.0)(objective, np.zeros(3))
+    assert unbounded.nfev > 1 and unbounded.fun < 1e-3
+
+
+def slow_solver(selection):
+    def solve(qubo, deadline=None, **_):
+        time.sleep(2 * deadline)
+        return qubo.selection(np.asarray(selection))
+    return solve
+
+
+def test_deadline_overrun_with_infeasible_answer_falls_back(monkeypatch):
+    mu, cov = random_universe(6, 1)
+    monkeypatch.setitem(quantum_utils.QUBO_SOLVERS, "qaoa", slow_solver([1, 1, 1, 1, 0, 0]))
+    vec, assets, info = build_and_solve_qubo(mu, cov, list(mu.index), 3, 0.5, solver="qaoa",
+                                             use_cache=False, deadline=0.05, return_info=True)
+    assert info['solver_path'] == f"fallback:{quantum_utils.FALLBACK_SOLVER}"
+    assert info['deadline_hit'] and info['elapsed_s'] >= 0.05
+    assert vec.sum() == 3 and assets == [mu.index[i] for i in np.flatnonzero(vec)]
+
+
+def test_failing_solver_falls_back(monkeypatch):
+    mu, cov = random_universe(6, 2)
+
+    def broken(qubo, **_):
+        raise RuntimeError("simulator unavailable")
+
+    monkeypatch.setitem(quantum_utils.QUBO_SOLVERS, "qaoa", broken)
+    vec, _, info = build_and_solve_qubo(mu, cov, list(mu.index), 2, 0.5, solver="qaoa",
+                                        use_cache=False, deadline=None, return_info=True)
+    assert info['solver_path'] == f"fallback:{quantum_utils.FALLBACK_SOLVER}"
+    assert not info['deadline_hit'] and vec.sum() == 2
+
+
+def test_late_feasible_answer_is_returned_but_not_cached(monkeypatch, result_cache):
+    mu, cov = random_universe(6, 3)
+    monkeypatch.setitem(quantum_utils.QUBO_SOLVERS, "qaoa", slow_solver([0, 1, 0, 1, 0, 1]))
+    vec, _, info = build_and_solve_qubo(mu, cov, list(mu.index), 3, 0.5, solver="qaoa",
+                                        deadline=0.05, return_info=True)
+    assert result_cache.get(result_cache.make_key(mu, cov, 3, 0.5, "qaoa")) is None
+    assert info['solver_path'] == "qaoa" and info['deadline_hit']
+    assert vec.tolist() == [0, 1, 0, 1, 0, 1]
+
+
+@pytest.mark.parametrize("solver", ["annealing", "tabu"])
+@pytest.mark.parametrize("n, k", [(6, 2), (10, 3), (12, 6), (16, 4), (16, 9)])
+@pytest.mark.parametrize("seed", range(3))
+def test_heuristics_reach_exact_minimum(solver, n, k, seed):
+    mu, cov = random_universe(n, seed)
+    qubo = build_qubo_matrices(mu, cov, [0.2, 0.5, 0.9][seed], k, list(mu.index))
+    vec, assets = quantum_utils.solve_qubo(qubo, solver)
+    _, optimum = exact_qubo_minimum(qubo)
+    assert vec.sum() == k and assets == [mu.index[i] for i in np.flatnonzero(vec)]
+    assert float(qubo.energy(vec)) == pytest.approx(optimum, rel=1e-9, abs=1e-12)
+
+
+def weights_of_support(state, tol=1e-10):
+    probs = np.abs(np.asarray(state.data)) ** 2
+    support = np.flatnonzero(probs > tol)
+    return {bin(int(s)).count("1") for s in support}, probs
+
+
+@pytest.mark.parametrize("n, k", [(2, 1), (4, 2), (5, 2), (6, 3), (6, 5)])
+def test_dicke_state_is_uniform_over_weight_k(n, k):
+    state = Statevector.from_instruction(quantum_utils.dicke_state(n, k))
+    weights, probs = weights_of_support(state)
+    assert weights == {k}
+    assert np.allclose(probs[probs > 1e-10], 1 / comb(n, k))
+
+
+@pytest.mark.parametrize("n, k", [(3, 1), (5, 2), (6, 3)])
+def test_xy_mixer_preserves_hamming_weight(n, k):
+    mixer = quantum_utils.xy_ring_mixer(n)
+    layer = mixer.assign_parameters({mixer.parameters[0]: 0.37})
+    start = QuantumCircuit(n)
+    start.x(range(k))
+    for circuit in (quantum_utils.dicke_state(n, k), start):
+        state = Statevector.from_instruction(circuit).evolve(layer)
+        weights, probs = weights_of_support(state)
+        assert weights == {k} and probs.sum() == pytest.approx(1.0)
+    # The mixer actually moves amplitude between weight-k states
+    weights, probs = weights_of_support(Statevector.from_instruction(start).evolve(layer))
+    assert np.count_nonzero(probs > 1e-10) > 1
+
+
+def test_qaoa_xy_returns_k_assets():
+    mu, cov = random_universe(5, 4)
+    qubo = build_qubo_matrices(mu, cov, 0.5, 2, list(mu.index))
+    vec, assets = quantum_utils.solve_qubo(qubo, "qaoa-xy", reps=1, maxiter=30, use_cache=False, seed=7)
+    assert vec.sum() == 2 and assets == [mu.index[i] for i in np.flatnonzero(vec)]
+
+
+@pytest.mark.parametrize("backend", quantum_utils.QAOA_BACKENDS)
+def test_sampler_honours_shots(backend):
+    circuit = QuantumCircuit(3)
+    circuit.h(range(3))
+    circuit.measure_all()
+    exact = quantum_utils.make_qaoa_sampler(backend, shots=0, threads=1, seed=3).run(circuit).result()
+    assert np.allclose(list(exact.quasi_dists[0].values()), 1 / 8) and len(exact.quasi_dists[0]) == 8
+    sampled = quantum_utils.make_qaoa_sampler(backend, shots=64, threads=1, seed=3).run(circuit).result()
+    counts = np.array(list(sampled.quasi_dists[0].values())) * 64
+    assert sampled.metadata[0]['shots'] == 64 and np.allclose(counts, np.round(counts))
+    assert not np.allclose(counts, 8)
+
+
+@pytest.mark.parametrize("mixer", quantum_utils.QAOA_MIXERS)
+def test_exact_qaoa_agrees_across_backends(mixer):
+    mu, cov = random_universe(5, 1)
+    qubo = build_qubo_matrices(mu, cov, 0.5, 2, list(mu.index))
+    selections = [
+        quantum_utils.solve_qubo_qaoa(qubo, reps=1, maxiter=40, use_cache=False, backend=backend, shots=0, threads=1,
+                                      seed=0, mixer=mixer)[1]
+        for backend in quantum_utils.QAOA_BACKENDS
+    ]
+    assert selections[0] == selections[1] and len(selections[0]) == 2
+
+
+def test_solver_passes_shots_to_the_sampler(monkeypatch):
+    made = []
+    make = quantum_utils.make_qaoa_sampler
+
+    def recording(backend, shots, threads, seed):
+        made.append(make(backend, shots, threads, seed))
+        return made[-1]
+
+    monkeypatch.setattr(quantum_utils, "make_qaoa_sampler", recording)
+    mu, cov = random_universe(4, 2)
+    qubo = build_qubo_matrices(mu, cov, 0.5, 2, list(mu.index))
+    vec, _ = quantum_utils.solve_qubo(qubo, "qaoa", reps=1, maxiter=10, use_cache=False, shots=256, seed=1)
+    assert made[0].options.shots == 256 and len(vec) == 4
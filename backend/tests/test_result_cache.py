@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from api.utils.result_cache import QuboResultCache
+
+
+def small_problem():
+    assets = ["A", "B", "C"]
+    mu = pd.Series([0.1, 0.2, 0.15], index=assets)
+    cov = pd.DataFrame(np.eye(3) * 0.04, index=assets, columns=assets)
+    return mu, cov
+
+
+def test_round_trip_and_risk_bucket():
+    mu, cov = small_problem()
+    cache = QuboResultCache(8)
+    key = cache.make_key(mu, cov, 2, 0.501, "qaoa")
+    assert cache.get(key) is None
+    cache.store(key, np.array([1, 1, 0]), ["A", "B"])
+    assert cache.make_key(mu, cov, 2, 0.499, "qaoa") == key
+    vec, assets = cache.get(key)
+    assert vec.tolist() == [1, 1, 0] and assets == ["A", "B"]
+    assert cache.stats() == {'entries': 1, 'disk_entries': 0, 'hits': 1, 'disk_hits': 0, 'misses': 1}
+
+
+def test_evicts_least_recently_used():
+    mu, cov = small_problem()
+    cache = QuboResultCache(2)
+    keys = [cache.make_key(mu, cov, 1, r, "tabu") for r in (0.1, 0.2, 0.3)]
+    cache.store(keys[0], np.array([1, 0, 0]), ["A"])
+    cache.store(keys[1], np.array([0, 1, 0]), ["B"])
+    cache.get(keys[0])
+    cache.store(keys[2], np.array([0, 0, 1]), ["C"])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+
+
+def test_selections_survive_a_restart(tmp_path):
+    mu, cov = small_problem()
+    path = str(tmp_path / "results.jsonl")
+    key = QuboResultCache.make_key(mu, cov, 2, 0.5, "qaoa")
+    QuboResultCache(8, path).store(key, np.array([0, 1, 1]), ["B", "C"])
+    restarted = QuboResultCache(8, path)
+    vec, assets = restarted.get(key)
+    assert vec.tolist() == [0, 1, 1] and assets == ["B", "C"]
+    assert restarted.get(key) is not None
+    assert restarted.stats()['disk_hits'] == 1 and restarted.stats()['hits'] == 1
+
+
+def test_stores_append_and_other_writers_are_seen(tmp_path):
+    mu, cov = small_problem()
+    path = tmp_path / "results.jsonl"
+    first, second = QuboResultCache(8, str(path)), QuboResultCache(8, str(path))
+    keys = [QuboResultCache.make_key(mu, cov, 1, r, "tabu") for r in (0.1, 0.2)]
+    assert first.get(keys[1]) is None
+    first.store(keys[0], np.array([1, 0, 0]), ["A"])
+    second.store(keys[1], np.array([0, 1, 0]), ["B"])
+    assert len(path.read_text().splitlines()) == 2
+    assert first.get(keys[1])[1] == ["B"] and second.get(keys[0])[1] == ["A"]
+
+
+def test_torn_and_corrupt_lines_are_skipped(tmp_path):
+    mu, cov = small_problem()
+    path = tmp_path / "results.jsonl"
+    cache = QuboResultCache(8, str(path))
+    key = cache.make_key(mu, cov, 1, 0.3, "exact")
+    cache.store(key, np.array([0, 0, 1]), ["C"])
+    with open(path, "a") as f:
+        f.write("not json\n{\"key\": \"partial")
+    reader = QuboResultCache(8, str(path))
+    assert reader.get(key)[1] == ["C"]
+    assert reader.get("missing") is None and reader.stats()['disk_entries'] == 1
+
+
+def test_compaction_keeps_newest_entries(tmp_path):
+    mu, cov = small_problem()
+    path = tmp_path / "results.jsonl"
+    cache = QuboResultCache(2, str(path), max_disk_entries=3)
+    keys = [cache.make_key(mu, cov, 1, r / 100, "tabu") for r in range(10)]
+    for i, key in enumerate(keys):
+        cache.store(key, np.eye(3, dtype=int)[i % 3], ["ABC"[i % 3]])
+    assert len(path.read_text().splitlines()) <= 6
+    reader = QuboResultCache(2, str(path))
+    assert all(reader.get(key) is not None for key in keys[-3:])
+    assert reader.get(keys[0]) is None
+
+
+def test_clear_removes_the_file(tmp_path):
+    mu, cov = small_problem()
+    path = tmp_path / "results.jsonl"
+    cache = QuboResultCache(8, str(path))
+    key = cache.make_key(mu, cov, 1, 0.5, "exact")
+    cache.store(key, np.array([1, 0, 0]), ["A"])
+    cache.clear()
+    assert not path.exists() and cache.get(key) is None
+    assert QuboResultCache(8, str(path)).get(key) is None
@@ -0,0 +1,139 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+from api.utils.analytic_utils import normal_portfolio_risk
+from api.utils.metrics_utils import monte_carlo_portfolio, monte_carlo_simulation
+from api.utils.simulation_utils import (SAMPLING_MODES, batch_sizes, bootstrap_asset_scenarios, bootstrap_horizon_returns,
+                                        bootstrap_portfolio_returns, standard_normal_draws)
+
+
+def simulation_inputs():
+    weights = np.array([0.5, 0.3, 0.2])
+    mu = np.array([0.08, 0.12, 0.05])
+    cov = np.array([[0.04, 0.01, 0.0], [0.01, 0.09, 0.02], [0.0, 0.02, 0.03]])
+    return weights, mu, cov
+
+
+def reduced(results):
+    return (results['var'], results['cvar'], results['percentiles'], results['final_value'],
+            results['visualization']['percentile_paths'], results['visualization']['paths'],
+            results['max_drawdown'], results['standard_error'])
+
+
+@pytest.mark.parametrize("sampling", ["mc", "antithetic"])
+def test_streamed_results_do_not_depend_on_workers_or_chunks(sampling):
+    weights, mu, cov = simulation_inputs()
+
+    def run(**kwargs):
+        return reduced(monte_carlo_simulation(weights, mu, cov, 10000, time_horizon=60, num_simulations=1500,
+                                              seed=7, sampling=sampling, **kwargs))
+
+    serial = run(n_workers=1)
+    assert run(n_workers=2) == serial
+    assert run(n_workers=1, chunk_size=128) == serial
+    assert run(chunk_size=500) == serial
+
+
+def test_sobol_batches_are_powers_of_two():
+    sizes = batch_sizes(5000, sampling="sobol")
+    assert sizes.sum() == 5000 and len(sizes) >= 16
+    assert all(size & (size - 1) == 0 for size in sizes[:-1])
+    assert batch_sizes(8192, max_batch=256, sampling="sobol").tolist() == [256] * 32
+
+
+@pytest.mark.parametrize("n", [256, 1000])
+def test_sobol_draws_without_balance_warnings(n):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        z = standard_normal_draws(np.random.default_rng(0), n, 5, "sobol")
+    assert z.shape == (n, 5) and np.isfinite(z).all()
+
+
+@pytest.mark.parametrize("sampling", SAMPLING_MODES)
+def test_var_matches_normal_closed_form_within_stderr(sampling):
+    assets = ["A", "B", "C", "D"]
+    rng = np.random.default_rng(4)
+    factors = rng.normal(size=(4, 2)) * 0.2
+    mu = pd.Series([0.06, 0.1, 0.08, 0.12], index=assets)
+    cov = pd.DataFrame(factors @ factors.T + np.diag([0.02, 0.03, 0.01, 0.04]), index=assets, columns=assets)
+    weights = np.array([0.4, 0.1, 0.3, 0.2])
+
+    _, _, exact_var, exact_cvar = normal_portfolio_risk(mu, cov, weights, 30, 0.05)
+    _, _, var_ret, cvar_ret, _, stderr = monte_carlo_portfolio(
+        mu, cov, weights, 30, 8192, 0.05, seed=11, sampling=sampling, return_stderr=True
+    )
+    assert 0 < stderr['var'] and abs(var_ret - exact_var) <= 4 * stderr['var']
+    assert 0 < stderr['cvar'] and abs(cvar_ret - exact_cvar) <= 4 * stderr['cvar']
+
+
+
+@pytest.mark.parametrize("sampling", ["mc", "antithetic"])
+def test_terminal_values_match_compounded_normal_closed_form(sampling):
+    weights, mu, cov = simulation_inputs()
+    initial, horizon, n = 10000, 252, 20000
+    results = monte_carlo_simulation(weights, mu, cov, initial, time_horizon=horizon, num_simulations=n,
+                                     seed=42, sampling=sampling, path_stats=False)
+
+    # The path compounds horizon - 1 iid N(w'mu, w'Σw) daily returns from the initial value
+    days = horizon - 1
+    daily_mu, daily_var = weights @ mu / 252, weights @ cov @ weights / 252
+    growth = 1 + daily_mu
+    mean = initial * growth ** days
+    std = initial * np.sqrt((growth ** 2 + daily_var) ** days - growth ** (2 * days))
+    assert abs(results['final_value']['mean'] - mean) <= 4 * std / np.sqrt(n)
+    assert results['final_value']['std'] == pytest.approx(std, rel=0.03)
+
+    # Percentiles of the moment-matched log-normal, to within 4 quantile standard errors
+    s = np.sqrt(days * np.log1p(daily_var / growth ** 2))
+    m = np.log(mean) - 0.5 * s ** 2
+    for p, value in results['percentiles'].items():
+        q = float(p) / 100
+        quantile = np.exp(m + s * norm.ppf(q))
+        density = norm.pdf(norm.ppf(q)) / (quantile * s)
+        stderr = np.sqrt(q * (1 - q) / n) / density
+        assert abs(value - quantile) <= 4 * stderr, p
+
+def test_block_bootstrap_draws_wrapped_history_blocks():
+    n_obs, block_length = 7, 5
+    history = np.arange(n_obs) / 100  # each value identifies its history row
+    draws = bootstrap_portfolio_returns(np.random.default_rng(0), history, 23, 400, block_length)
+    assert draws.shape == (23, 400)
+    rows = np.rint(draws * 100).astype(int)
+    assert np.allclose(rows / 100, draws) and set(np.unique(rows)) <= set(range(n_obs))
+    # Within a block consecutive days are consecutive history rows, modulo n_obs
+    steps = (np.diff(rows, axis=0) % n_obs)[np.arange(1, 23) % block_length != 0]
+    assert np.all(steps == 1)
+    # Blocks starting near the end wrap round to the first rows
+    assert np.any((rows[:-1] == n_obs - 1) & (rows[1:] == 0))
+
+
+def test_block_length_longer_than_history_is_clipped():
+    history = np.array([0.01, -0.02, 0.03])
+    draws = bootstrap_portfolio_returns(np.random.default_rng(1), history, 10, 50, block_length=20)
+    assert draws.shape == (10, 50) and np.isin(draws, history).all()
+
+
+def test_horizon_bootstrap_compounds_the_same_blocks():
+    history = np.random.default_rng(2).normal(0.0005, 0.01, size=(30, 3))
+    horizon, block_length = 17, 5
+    got = bootstrap_horizon_returns(np.random.default_rng(3), history, horizon, 200, block_length)
+    assert got.shape == (200, 3)
+    # Same draws, compounded day by day from the daily resampling path
+    days = np.stack([bootstrap_portfolio_returns(np.random.default_rng(3), history[:, j], horizon, 200, block_length)
+                     for j in range(3)], axis=-1)
+    assert np.allclose(got, np.prod(1 + days, axis=0) - 1)
+
+
+def test_bootstrap_scenarios_are_reproducible_under_a_seed():
+    history = np.random.default_rng(4).normal(0.0005, 0.01, size=(250, 4))
+    first = bootstrap_asset_scenarios(history, 21, 3000, seed=11)
+    assert first.shape == (3000, 4)
+    assert np.array_equal(first, bootstrap_asset_scenarios(history, 21, 3000, seed=11))
+    assert np.array_equal(first, bootstrap_asset_scenarios(history, 21, 3000, seed=11, n_workers=2))
+    assert not np.array_equal(first, bootstrap_asset_scenarios(history, 21, 3000, seed=12))
+    assert np.array_equal(bootstrap_portfolio_returns(np.random.default_rng(5), history[:, 0], 30, 10),
+                          bootstrap_portfolio_returns(np.random.default_rng(5), history[:, 0], 30, 10))